@@ -0,0 +1,60 @@
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter, SearchFilter
+
+from orderpiqrApp.utils.search import search_products
+
+
+class UpdatedSinceFilter(BaseFilterBackend):
+    """
+    `?updated_since=<ISO 8601 datetime>` returns only rows changed at or after that moment.
+
+    Views name the timestamp to filter on in `updated_since_field`. Together with keyset
+    pagination (`?cursor=`), external systems can sync incrementally: remember when a
+    sync started and pass it as `updated_since` next time.
+    """
+    query_param = 'updated_since'
+
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get(self.query_param)
+        if not value:
+            return queryset
+
+        try:
+            since = parse_datetime(value)
+        except ValueError:
+            since = None
+        if since is None:
+            raise ValidationError({self.query_param: 'Expected an ISO 8601 datetime, e.g. 2025-01-15T10:30:00Z.'})
+
+        return queryset.filter(**{f'{view.updated_since_field}__gte': since})
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Only return rows changed at or after this ISO 8601 datetime.',
+            'schema': {'type': 'string', 'format': 'date-time'},
+        }]
+
+
+class ProductSearchFilter(SearchFilter):
+    """
+    `?search=` for products through orderpiqrApp.utils.search, so the API matches and ranks
+    like the manage UI and the picker autocomplete.
+
+    Without `?ordering=`, the best matches come first. List this backend after
+    OrderingFilter, so the ranking is put in front of the view's default ordering.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not query.strip():
+            return queryset
+
+        default_ordering = queryset.query.order_by
+        queryset = search_products(queryset, query, fields=view.search_fields)
+        if request.query_params.get(OrderingFilter.ordering_param):
+            return queryset.order_by(*default_ordering)
+        return queryset.order_by('search_rank', *default_ordering)
@@ -1,23 +1,42 @@
 import json
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
 from api.models import APIRequestLog
 
 class APILoggingMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
         response = self.get_response(request)
+        if request.path.startswith('/api/'):
+            self._log(request, response)
+        return response
 
+    async def __acall__(self, request):
+        response = await self.get_response(request)
         if request.path.startswith('/api/'):
-            user = request.user if request.user.is_authenticated else None
-            method = request.method
-            path = request.path
+            # request.user may still be the lazy session user, which needs the ORM
+            await sync_to_async(self._log)(request, response)
+        return response
 
-            APIRequestLog.objects.create(
-                user=user,
-                method=method,
-                path=path,
-                status_code=response.status_code,
-            )
+    def _log(self, request, response):
+        user = request.user if request.user.is_authenticated else None
+        method = request.method
+        path = request.path
 
-        return response
+        APIRequestLog.objects.create(
+            user=user,
+            method=method,
+            path=path,
+            status_code=response.status_code,
+        )
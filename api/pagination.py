@@ -0,0 +1,171 @@
+"""
+Pagination for the REST API.
+
+By default lists are paginated by page number, as they always were. Two additions keep
+deep pages and incremental syncs cheap:
+
+- `?count=false` skips the `COUNT(*)` query; `count` is then null and `next` is
+  determined by fetching one extra row.
+- `?cursor=` switches to keyset pagination: results are ordered by the view's
+  `keyset_ordering` (e.g. `updated_at, pk`) and each page continues after the last row
+  of the previous one, so page 1000 costs the same as page 1. Start with an empty
+  cursor and follow `next` until it is null. `count` is only computed with `?count=true`.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class ApiPagination(PageNumberPagination):
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    default_keyset_ordering = ('pk',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.use_cursor = self.cursor_query_param in request.query_params
+        count = request.query_params.get(self.count_query_param)
+        if count is None:
+            self.include_count = not self.use_cursor
+        else:
+            self.include_count = count.lower() not in ('false', '0')
+
+        if self.use_cursor:
+            return self._paginate_keyset(queryset, request, view)
+        if self.include_count:
+            return super().paginate_queryset(queryset, request, view)
+        return self._paginate_uncounted(queryset, request)
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor and self.include_count:
+            return super().get_paginated_response(data)
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if self.use_cursor:
+            if self.next_position is None:
+                return None
+            return replace_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param, self._encode_cursor(self.next_position)
+            )
+        if self.include_count:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        if self.use_cursor:
+            # Keyset pages only go forward
+            return None
+        if self.include_count:
+            return super().get_previous_link()
+        if self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+    def _paginate_uncounted(self, queryset, request):
+        self.count = None
+        page_size = self.get_page_size(request)
+        try:
+            self.page_number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            self.page_number = 0
+        if self.page_number < 1:
+            raise NotFound(self.invalid_page_message)
+
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def _paginate_keyset(self, queryset, request, view):
+        page_size = self.get_page_size(request)
+        ordering = tuple(getattr(view, 'keyset_ordering', self.default_keyset_ordering))
+        self.count = queryset.count() if self.include_count else None
+
+        queryset = queryset.order_by(*ordering)
+        position = self._decode_cursor(request.query_params[self.cursor_query_param], queryset.model, ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        rows = list(queryset[:page_size + 1])
+        self.next_position = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            self.next_position = [getattr(rows[-1], field) for field in ordering]
+        return rows
+
+    def _after(self, ordering, position):
+        """Rows after `position` in `ordering`: (a > x) OR (a = x AND b > y) ..."""
+        condition = Q(**{f'{ordering[-1]}__gt': position[-1]})
+        for field, value in zip(reversed(ordering[:-1]), reversed(position[:-1])):
+            condition = Q(**{f'{field}__gt': value}) | (Q(**{field: value}) & condition)
+        return condition
+
+    def _encode_cursor(self, position):
+        # isoformat() keeps microseconds, which a JSON encoder for datetimes would round off
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in position]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+    def _decode_cursor(self, cursor, model, ordering):
+        if not cursor:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            if not isinstance(values, list) or len(values) != len(ordering):
+                raise ValueError
+            return [
+                (model._meta.pk if field == 'pk' else model._meta.get_field(field)).to_python(value)
+                for field, value in zip(ordering, values)
+            ]
+        except (binascii.Error, ValueError, TypeError, ValidationError):
+            raise NotFound('Invalid cursor.')
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'].update({
+            'nullable': True,
+            'description': 'Total number of results. Null with `?count=false` and, unless '
+                           '`?count=true`, with `?cursor=`.',
+        })
+        response_schema['properties']['next']['description'] = (
+            'Link to the next page. With `?cursor=`, follow it until it is null.'
+        )
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Use keyset pagination. Pass an empty value for the first page and '
+                               'follow `next` for the rest. Ignores `page` and `ordering`.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Set to `false` to skip counting all results (faster for large lists).',
+                'schema': {'type': 'boolean'},
+            },
+        ]
@@ -0,0 +1,36 @@
+"""
+Request parsers for the REST API.
+"""
+import codecs
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parse newline-delimited JSON (one JSON object per line) into a list of objects.
+
+    Large uploads are read line by line instead of being decoded as one document, and a
+    syntax error is reported with its line number. Blank lines are ignored.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        items = []
+        for line_number, line in enumerate(codecs.getreader(encoding)(stream), start=1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                raise ParseError(f'NDJSON parse error on line {line_number}: {e}')
+            if not isinstance(item, dict):
+                raise ParseError(f'NDJSON parse error on line {line_number}: expected a JSON object.')
+            items.append(item)
+        return items
@@ -0,0 +1,44 @@
+"""
+OpenAPI schema generation for the REST API (drf-spectacular).
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection, models
+from django.db.backends.base.operations import BaseDatabaseOperations
+from drf_spectacular import openapi
+
+
+class AutoSchema(openapi.AutoSchema):
+    """
+    drf-spectacular's AutoSchema with integer ranges that do not depend on the database.
+
+    Django limits integer model fields to the range of the database column, e.g. 64 bits for
+    every integer on SQLite, and DRF copies those limits into the serializer fields. They are
+    documented as Django's default ranges, the ones of PostgreSQL, so the schema (and the
+    committed docs/openapi.yaml) is the same on every backend. Explicit validators are kept.
+    """
+
+    def _insert_min_max(self, field, content):
+        super()._insert_min_max(field, content)
+        model_field = _model_field(field)
+        if not isinstance(model_field, models.IntegerField):
+            return
+        internal_type = model_field.get_internal_type()
+        documented = BaseDatabaseOperations.integer_field_ranges.get(internal_type)
+        if documented is None:
+            return
+        backend_min, backend_max = connection.ops.integer_field_range(internal_type)
+        if content.get('minimum') == backend_min:
+            content['minimum'] = documented[0]
+        if content.get('maximum') == backend_max:
+            content['maximum'] = documented[1]
+
+
+def _model_field(field):
+    """The model field a ModelSerializer field was built from, or None."""
+    model = getattr(getattr(field.parent, 'Meta', None), 'model', None)
+    if model is None or not field.source or '.' in field.source:
+        return None
+    try:
+        return model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        return None
@@ -1,7 +1,15 @@
 from .product_serializer import ProductSerializer, ProductDetailSerializer
-from .order_serializer import OrderSerializer, OrderDetailSerializer, OrderCreateSerializer
-from .orderline_serializer import OrderLineSerializer, OrderLineDetailSerializer, OrderLineCreateSerializer
+from .barcode_serializer import ProductBarcodeSerializer
+from .order_serializer import OrderSerializer, OrderDetailSerializer, OrderCreateSerializer, BulkOrderSerializer
+from .orderline_serializer import (
+    OrderLineSerializer, OrderLineDetailSerializer, OrderLineCreateSerializer, OrderLineNestedSerializer,
+)
 from .picklist_serializer import PickListSerializer, PickListDetailSerializer, PickListCreateSerializer
-from .productpick_serializer import ProductPickSerializer, ProductPickUpdateSerializer, ProductPickBulkUpdateSerializer
+from .productpick_serializer import (
+    ProductPickSerializer, ProductPickUpdateSerializer, ProductPickBulkUpdateSerializer, ProductPickBulkUpdateItemSerializer,
+)
 from .device_serializer import DeviceSerializer, DeviceCreateSerializer, DeviceStatsSerializer
 from .inventory_serializer import InventoryLogSerializer, InventoryModifySerializer
+from .job_serializer import JobSerializer
+from .change_serializer import ChangeEventSerializer
+from .webhook_serializer import WebhookEndpointSerializer, WebhookDeliverySerializer
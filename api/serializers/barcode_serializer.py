@@ -0,0 +1,50 @@
+from rest_framework import serializers
+
+from orderpiqrApp.models import Product, ProductBarcode
+
+
+class ProductBarcodeSerializer(serializers.ModelSerializer):
+    """
+    Serializer for ProductBarcode, an extra code (e.g. supplier EAN) that scans as a product.
+    """
+    product_code = serializers.CharField(source='product.code', read_only=True)
+    quantity = serializers.IntegerField(
+        min_value=1,
+        required=False,
+        help_text="Number of product units one scan of this barcode counts as (e.g. 12 for a case)"
+    )
+
+    class Meta:
+        model = ProductBarcode
+        fields = [
+            'barcode_id',
+            'barcode',
+            'product',
+            'product_code',
+            'quantity',
+            'description',
+            'created_at',
+            'updated_at',
+        ]
+        read_only_fields = ['barcode_id', 'product_code', 'created_at', 'updated_at']
+        # Uniqueness per customer is checked in validate(); the customer is not part of the input
+        validators = []
+
+    def _customer(self):
+        return self.context['request'].user.userprofile.customer
+
+    def validate_product(self, product):
+        if product.customer_id != self._customer().pk:
+            raise serializers.ValidationError("Product not found.")
+        return product
+
+    def validate_barcode(self, barcode):
+        customer = self._customer()
+        if Product.objects.filter(customer=customer, code=barcode).exists():
+            raise serializers.ValidationError("This barcode is already the code of a product.")
+        duplicates = ProductBarcode.objects.filter(customer=customer, barcode=barcode)
+        if self.instance is not None:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError("This barcode is already in use.")
+        return barcode
@@ -0,0 +1,13 @@
+from rest_framework import serializers
+
+from orderpiqrApp.models import ChangeEvent
+
+
+class ChangeEventSerializer(serializers.ModelSerializer):
+    """
+    Serializer for change feed events.
+    """
+    class Meta:
+        model = ChangeEvent
+        fields = ['seq', 'entity', 'object_id', 'action', 'created_at']
+        read_only_fields = fields
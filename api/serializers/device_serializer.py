@@ -1,6 +1,7 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 
-from orderpiqrApp.models import Device
+from orderpiqrApp.models import Device, PickList
 
 
 class DeviceSerializer(serializers.ModelSerializer):
@@ -28,9 +29,23 @@ class DeviceSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['customer', 'lists_picked', 'username', 'recent_activity']
 
+    @classmethod
+    def setup_queryset(cls, queryset):
+        """Prefetch what this serializer reads, so a page of devices takes a fixed number of queries."""
+        return queryset.select_related('user').prefetch_related(
+            Prefetch(
+                'picklist_set',
+                queryset=PickList.objects.select_related('order').order_by('-created_at')[:5],
+                to_attr='recent_picklists',
+            )
+        )
+
     def get_recent_activity(self, obj) -> list[dict]:
         """Get summary of recent picking activity."""
-        recent_picklists = obj.picklist_set.order_by('-created_at')[:5]
+        if hasattr(obj, 'recent_picklists'):
+            recent_picklists = obj.recent_picklists
+        else:
+            recent_picklists = obj.picklist_set.select_related('order').order_by('-created_at')[:5]
         return [
             {
                 'picklist_id': pl.picklist_id,
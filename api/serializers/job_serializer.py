@@ -0,0 +1,42 @@
+from django.urls import reverse
+from rest_framework import serializers
+
+from orderpiqrApp.models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for background jobs, used to poll their progress and result.
+    """
+    job_type_display = serializers.CharField(source='get_job_type_display', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    percentage = serializers.IntegerField(read_only=True, allow_null=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'job_id',
+            'job_type',
+            'job_type_display',
+            'status',
+            'status_display',
+            'progress',
+            'total',
+            'percentage',
+            'result',
+            'error',
+            'download_url',
+            'created_at',
+            'started_at',
+            'finished_at',
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj) -> str:
+        """URL of the result file, once the job has completed."""
+        if obj.status != Job.Status.COMPLETED or not obj.result_file:
+            return None
+        url = reverse('job-download', args=[obj.job_id])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
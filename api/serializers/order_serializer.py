@@ -1,15 +1,19 @@
 from rest_framework import serializers
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import Count, Prefetch, Sum
 
-from orderpiqrApp.models import Order, OrderLine
-from .orderline_serializer import OrderLineSerializer, OrderLineDetailSerializer
+from orderpiqrApp.models import Order, OrderLine, PickList
+from orderpiqrApp.utils.order_lines import sync_order_lines
+from .orderline_serializer import (
+    OrderLineCreateSerializer, OrderLineDetailSerializer, OrderLineNestedSerializer, OrderLineSerializer,
+)
 
 
 class OrderSerializer(serializers.ModelSerializer):
     """
     Serializer for Order model with nested order lines.
     """
-    lines = OrderLineSerializer(many=True)
+    lines = OrderLineNestedSerializer(many=True)
     item_count = serializers.SerializerMethodField(
         help_text="Total number of items (sum of all line quantities)"
     )
@@ -28,18 +32,31 @@ class OrderSerializer(serializers.ModelSerializer):
             'status',
             'queue_position',
             'completed_at',
+            'updated_at',
             'lines',
             'item_count',
             'line_count',
         ]
-        read_only_fields = ['customer', 'created_at', 'completed_at', 'item_count', 'line_count']
+        read_only_fields = ['customer', 'created_at', 'completed_at', 'updated_at', 'item_count', 'line_count']
+
+    @classmethod
+    def setup_queryset(cls, queryset):
+        """Annotate and prefetch what this serializer reads, so a page of orders takes a fixed number of queries."""
+        return queryset.prefetch_related('lines').annotate(
+            annotated_item_count=Sum('lines__quantity'),
+            annotated_line_count=Count('lines'),
+        )
 
     def get_item_count(self, obj) -> int:
         """Calculate total items across all order lines."""
+        if hasattr(obj, 'annotated_item_count'):
+            return obj.annotated_item_count or 0
         return obj.lines.aggregate(total=Sum('quantity'))['total'] or 0
 
     def get_line_count(self, obj) -> int:
         """Count the number of order lines."""
+        if hasattr(obj, 'annotated_line_count'):
+            return obj.annotated_line_count
         return obj.lines.count()
 
     def create(self, validated_data):
@@ -58,18 +75,22 @@ class OrderSerializer(serializers.ModelSerializer):
         """Update order, optionally replacing all lines."""
         orderlines_data = validated_data.pop('lines', None)
 
-        # Update order fields
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        with transaction.atomic():
+            # Update order fields
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+
+            # If lines were provided, bring the existing lines in line with them
+            if orderlines_data is not None:
+                sync_order_lines(instance.customer_id, {
+                    instance.pk: [(line['product'].pk, line['quantity']) for line in orderlines_data]
+                })
 
-        # If lines were provided, replace them all
         if orderlines_data is not None:
-            # Remove existing lines
-            instance.lines.all().delete()
-            # Create new lines
-            for line_data in orderlines_data:
-                OrderLine.objects.create(order=instance, **line_data)
+            # Counts annotated by setup_queryset() no longer match the new lines
+            instance.__dict__.pop('annotated_item_count', None)
+            instance.__dict__.pop('annotated_line_count', None)
 
         return instance
 
@@ -86,9 +107,23 @@ class OrderDetailSerializer(OrderSerializer):
     class Meta(OrderSerializer.Meta):
         fields = OrderSerializer.Meta.fields + ['picklist_info']
 
+    @classmethod
+    def setup_queryset(cls, queryset):
+        return super().setup_queryset(queryset).prefetch_related(
+            'lines__product',
+            Prefetch(
+                'picklist_set',
+                queryset=PickList.objects.select_related('device').order_by('pk')[:1],
+                to_attr='first_picklists',
+            ),
+        )
+
     def get_picklist_info(self, obj) -> dict | None:
         """Get picklist information if order has been claimed."""
-        picklist = obj.picklist_set.first()
+        if hasattr(obj, 'first_picklists'):
+            picklist = obj.first_picklists[0] if obj.first_picklists else None
+        else:
+            picklist = obj.picklist_set.select_related('device').first()
         if picklist:
             return {
                 'picklist_id': picklist.picklist_id,
@@ -105,7 +140,7 @@ class OrderCreateSerializer(serializers.ModelSerializer):
     """
     Simplified serializer for creating orders.
     """
-    lines = OrderLineSerializer(many=True)
+    lines = OrderLineCreateSerializer(many=True)
 
     class Meta:
         model = Order
@@ -118,4 +153,28 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         for line_data in orderlines_data:
             OrderLine.objects.create(order=order, **line_data)
 
-        return order
\ No newline at end of file
+        return order
+
+class BulkOrderLineSerializer(serializers.Serializer):
+    """
+    A line of a bulk-created order. The product is given by ID or by code; both are
+    resolved for the whole request at once, so this serializer does no queries.
+    """
+    product = serializers.IntegerField(required=False, help_text="Product ID")
+    product_code = serializers.CharField(required=False, help_text="Product code, instead of the ID")
+    quantity = serializers.IntegerField(min_value=1)
+
+    def validate(self, attrs):
+        if 'product' not in attrs and not attrs.get('product_code'):
+            raise serializers.ValidationError("Provide either product or product_code.")
+        return attrs
+
+
+class BulkOrderSerializer(serializers.Serializer):
+    """
+    An order in a bulk create request. Validates the structure only; product and order
+    code checks against the database happen in one pass for the whole request.
+    """
+    order_code = serializers.CharField(max_length=Order._meta.get_field('order_code').max_length)
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True, default='')
+    lines = BulkOrderLineSerializer(many=True, allow_empty=False)
@@ -13,6 +13,14 @@ class OrderLineSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
+class OrderLineNestedSerializer(OrderLineSerializer):
+    """
+    OrderLine serializer for lines nested in an order, where the order is implied.
+    """
+    class Meta(OrderLineSerializer.Meta):
+        read_only_fields = ['id', 'order']
+
+
 class OrderLineDetailSerializer(serializers.ModelSerializer):
     """
     Extended serializer with product details included.
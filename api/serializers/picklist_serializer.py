@@ -1,6 +1,7 @@
+from django.db.models import Count, Prefetch
 from rest_framework import serializers
 
-from orderpiqrApp.models import PickList
+from orderpiqrApp.models import PickList, ProductPick
 
 
 class PickListSerializer(serializers.ModelSerializer):
@@ -37,8 +38,15 @@ class PickListSerializer(serializers.ModelSerializer):
             'order_code', 'product_count'
         ]
 
+    @classmethod
+    def setup_queryset(cls, queryset):
+        """Annotate and join what this serializer reads, so a page of pick lists takes a fixed number of queries."""
+        return queryset.select_related('device', 'order').annotate(annotated_product_count=Count('products'))
+
     def get_product_count(self, obj) -> int:
         """Count the number of products in this picklist."""
+        if hasattr(obj, 'annotated_product_count'):
+            return obj.annotated_product_count
         return obj.products.count()
 
 
@@ -56,8 +64,18 @@ class PickListDetailSerializer(PickListSerializer):
     class Meta(PickListSerializer.Meta):
         fields = PickListSerializer.Meta.fields + ['products', 'order_details']
 
+    @classmethod
+    def setup_queryset(cls, queryset):
+        return super().setup_queryset(queryset).prefetch_related(
+            Prefetch('products', queryset=ProductPick.objects.select_related('product'), to_attr='product_picks')
+        )
+
     def get_products(self, obj) -> list[dict]:
         """Get all product picks with details."""
+        if hasattr(obj, 'product_picks'):
+            picks = obj.product_picks
+        else:
+            picks = obj.products.select_related('product')
         return [
             {
                 'id': pp.id,
@@ -70,7 +88,7 @@ class PickListDetailSerializer(PickListSerializer):
                 'time_taken': str(pp.time_taken) if pp.time_taken else None,
                 'notes': pp.notes,
             }
-            for pp in obj.products.select_related('product').all()
+            for pp in picks
         ]
 
     def get_order_details(self, obj) -> dict | None:
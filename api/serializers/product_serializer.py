@@ -1,3 +1,4 @@
+from django.db.models import Count
 from rest_framework import serializers
 
 from orderpiqrApp.models import Product, OrderLine
@@ -28,27 +29,39 @@ class ProductSerializer(serializers.ModelSerializer):
             'customer',
             'order_count',
             'inventory_quantity',
+            'updated_at',
         ]
-        read_only_fields = ['customer', 'order_count', 'inventory_quantity']
+        read_only_fields = ['customer', 'order_count', 'inventory_quantity', 'updated_at']
+
+    @classmethod
+    def setup_queryset(cls, queryset):
+        """Annotate what this serializer reads, so a page of products takes a fixed number of queries."""
+        return queryset.annotate(annotated_order_count=Count('orderline'))
 
     def get_order_count(self, obj) -> int:
         """Count how many order lines reference this product."""
+        if hasattr(obj, 'annotated_order_count'):
+            return obj.annotated_order_count
         return OrderLine.objects.filter(product=obj).count()
 
+    def _inventory_enabled(self):
+        """Check the customer setting once; a list reuses this serializer for every product."""
+        if not hasattr(self, '_inventory_enabled_cache'):
+            enabled = False
+            request = self.context.get('request')
+            if request and hasattr(request, 'user') and request.user.is_authenticated:
+                try:
+                    enabled = is_inventory_enabled(request.user.userprofile.customer)
+                except AttributeError:
+                    pass
+            self._inventory_enabled_cache = enabled
+        return self._inventory_enabled_cache
+
     def to_representation(self, instance):
         """Conditionally include inventory_quantity based on customer settings."""
         data = super().to_representation(instance)
 
-        # Check if inventory is enabled for the customer
-        request = self.context.get('request')
-        if request and hasattr(request, 'user') and request.user.is_authenticated:
-            try:
-                customer = request.user.userprofile.customer
-                if not is_inventory_enabled(customer):
-                    data.pop('inventory_quantity', None)
-            except AttributeError:
-                data.pop('inventory_quantity', None)
-        else:
+        if not self._inventory_enabled():
             data.pop('inventory_quantity', None)
 
         return data
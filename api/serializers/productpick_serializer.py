@@ -26,10 +26,12 @@ class ProductPickSerializer(serializers.ModelSerializer):
             'time_taken',
             'successful',
             'notes',
+            'version',
+            'updated_at',
         ]
         read_only_fields = [
             'id', 'product_code', 'product_description',
-            'product_location', 'picklist_code'
+            'product_location', 'picklist_code', 'version', 'updated_at'
         ]
 
 
@@ -42,19 +44,25 @@ class ProductPickUpdateSerializer(serializers.ModelSerializer):
         fields = ['successful', 'time_taken', 'notes']
 
 
+class ProductPickBulkUpdateItemSerializer(serializers.Serializer):
+    """
+    One pick in a bulk update.
+    """
+    id = serializers.IntegerField()
+    successful = serializers.BooleanField(allow_null=True)
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    time_taken = serializers.DurationField(required=False, allow_null=True)
+    version = serializers.IntegerField(
+        required=False, min_value=1,
+        help_text="Version of the pick the change is based on; the pick is not updated if it has changed since"
+    )
+
+
 class ProductPickBulkUpdateSerializer(serializers.Serializer):
     """
     Serializer for bulk updating multiple product picks.
     """
-    picks = serializers.ListField(
-        child=serializers.DictField(),
-        help_text="List of pick updates with 'id', 'successful', and optional 'notes'"
+    picks = ProductPickBulkUpdateItemSerializer(
+        many=True, allow_empty=False,
+        help_text="List of pick updates with 'id', 'successful', and optional 'notes', 'time_taken' and 'version'"
     )
-
-    def validate_picks(self, value):
-        for pick in value:
-            if 'id' not in pick:
-                raise serializers.ValidationError("Each pick must have an 'id' field")
-            if 'successful' not in pick:
-                raise serializers.ValidationError("Each pick must have a 'successful' field")
-        return value
@@ -0,0 +1,61 @@
+from rest_framework import serializers
+
+from orderpiqrApp.models import WebhookDelivery, WebhookEndpoint
+from orderpiqrApp.utils.webhooks import UnsafeWebhookURL, validate_webhook_url
+
+
+class WebhookEndpointSerializer(serializers.ModelSerializer):
+    """
+    Serializer for webhook endpoints. The secret is generated on creation.
+    """
+    event_types = serializers.ListField(
+        child=serializers.ChoiceField(choices=WebhookEndpoint.EventType.choices),
+        required=False,
+        help_text="Events to send to this endpoint. Empty means all events."
+    )
+
+    class Meta:
+        model = WebhookEndpoint
+        fields = [
+            'endpoint_id',
+            'url',
+            'event_types',
+            'is_active',
+            'description',
+            'secret',
+            'created_at',
+        ]
+        read_only_fields = ['endpoint_id', 'secret', 'created_at']
+
+    def validate_url(self, value):
+        try:
+            validate_webhook_url(value)
+        except UnsafeWebhookURL as e:
+            raise serializers.ValidationError(str(e))
+        return value
+
+
+class WebhookDeliverySerializer(serializers.ModelSerializer):
+    """
+    Serializer for webhook deliveries: one event for one endpoint and its delivery state.
+    """
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+
+    class Meta:
+        model = WebhookDelivery
+        fields = [
+            'delivery_id',
+            'endpoint',
+            'event_id',
+            'event_type',
+            'payload',
+            'status',
+            'status_display',
+            'attempts',
+            'next_attempt_at',
+            'response_status',
+            'last_error',
+            'created_at',
+            'delivered_at',
+        ]
+        read_only_fields = fields
@@ -2,12 +2,16 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 from api.views.product_views import ProductViewSet
+from api.views.barcode_views import ProductBarcodeViewSet
 from api.views.order_views import OrderViewSet
 from api.views.orderline_views import OrderLineViewSet
 from api.views.picklist_views import PickListViewSet
 from api.views.productpick_views import ProductPickViewSet
 from api.views.device_views import DeviceViewSet
 from api.views.inventory_views import InventoryLogViewSet
+from api.views.job_views import JobViewSet
+from api.views.change_views import ChangeEventViewSet
+from api.views.webhook_views import WebhookDeliveryViewSet, WebhookEndpointViewSet
 from api.views.queue_views import (
     queue_list,
     queue_stats,
@@ -20,12 +24,18 @@ from api.views.queue_views import (
 
 router = DefaultRouter()
 router.register(r'products', ProductViewSet, basename='product')
+router.register(r'barcodes', ProductBarcodeViewSet, basename='barcode')
 router.register(r'orders', OrderViewSet, basename='order')
 router.register(r'orderlines', OrderLineViewSet, basename='orderline')
 router.register(r'picklists', PickListViewSet, basename='picklist')
 router.register(r'productpicks', ProductPickViewSet, basename='productpick')
 router.register(r'devices', DeviceViewSet, basename='device')
 router.register(r'inventory', InventoryLogViewSet, basename='inventory')
+router.register(r'jobs', JobViewSet, basename='job')
+router.register(r'changes', ChangeEventViewSet, basename='change')
+# Before 'webhooks', whose detail route would otherwise match 'deliveries'
+router.register(r'webhooks/deliveries', WebhookDeliveryViewSet, basename='webhook-delivery')
+router.register(r'webhooks', WebhookEndpointViewSet, basename='webhook')
 
 
 urlpatterns = [
@@ -0,0 +1,175 @@
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from api.filters import UpdatedSinceFilter
+from api.serializers import ProductBarcodeSerializer, JobSerializer
+from orderpiqrApp.models import Job, ProductBarcode
+from orderpiqrApp.utils.imports import import_barcodes
+from orderpiqrApp.utils.jobs import enqueue_job
+from django.core.exceptions import ValidationError
+from rest_framework import filters
+
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiExample, OpenApiParameter, OpenApiResponse
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="List all barcodes",
+        description="""
+        Retrieve the barcode aliases of the authenticated user's customer.
+
+        A barcode alias is an extra code that scans as a product, such as a supplier EAN/GTIN
+        or the barcode on an outer case. `quantity` is the number of product units one scan
+        counts as (e.g. 12 for a case of 12). The picker, the inventory scanner and
+        `/api/products/lookup/` resolve aliases the same way as product codes.
+
+        **Filtering:**
+        - `?product=123` - Barcodes of one product
+
+        **Search:** Use the `?search=` query parameter to filter by barcode or product code.
+        """
+    ),
+    retrieve=extend_schema(
+        summary="Get barcode details",
+        description="Retrieve a specific barcode alias by its ID."
+    ),
+    create=extend_schema(
+        summary="Create a barcode",
+        description="""
+        Add a barcode alias to a product. A barcode is unique per customer and cannot be
+        the code of an existing product.
+        """
+    ),
+    update=extend_schema(
+        summary="Update a barcode",
+        description="Update all fields of a barcode alias."
+    ),
+    partial_update=extend_schema(
+        summary="Partially update a barcode",
+        description="Update specific fields of a barcode alias, such as the units per scan."
+    ),
+    destroy=extend_schema(
+        summary="Delete a barcode",
+        description="Delete a barcode alias. The product itself is not affected."
+    ),
+)
+@extend_schema(
+    tags=["barcodes"],
+    examples=[
+        OpenApiExample(
+            name="Barcode example",
+            description="A supplier case barcode that counts as 12 units of product 42.",
+            value={
+                "barcode": "08712345678906",
+                "product": 42,
+                "quantity": 12,
+                "description": "Case of 12"
+            },
+            request_only=True
+        )
+    ]
+)
+class ProductBarcodeViewSet(viewsets.ModelViewSet):
+    queryset = ProductBarcode.objects.none()  # Required for drf-spectacular
+    serializer_class = ProductBarcodeSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [filters.OrderingFilter, filters.SearchFilter, UpdatedSinceFilter]
+    search_fields = ['barcode', 'product__code']
+    ordering_fields = ['barcode', 'quantity', 'barcode_id']
+    ordering = ['barcode']
+    keyset_ordering = ('updated_at', 'pk')
+    updated_since_field = 'updated_at'
+
+    def get_queryset(self):
+        queryset = ProductBarcode.objects.filter(
+            customer=self.request.user.userprofile.customer
+        ).select_related('product')
+
+        product = self.request.query_params.get('product')
+        if product:
+            queryset = queryset.filter(product_id=product)
+
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save(customer=self.request.user.userprofile.customer)
+
+    @extend_schema(
+        summary="Import barcodes from a file",
+        description="""
+        Create or update barcode aliases from an uploaded CSV or XLSX file (multipart field `file`).
+
+        **Columns:** `barcode` and `product_code` are required, `quantity` (units per scan,
+        default 1) and `description` are optional. Barcodes are matched on `barcode`: existing
+        aliases are updated (and may move to another product), new barcodes are created.
+
+        Rows with an unknown product code, an invalid quantity or a barcode that is already a
+        product code are skipped and listed in `errors` with their row number; the rest of the
+        file is still imported. The response status is 207 when any row failed.
+
+        With `?async=true` the import runs as a background job: the response (202) contains
+        the job, whose progress and report can be followed at `/api/jobs/{job_id}/`.
+        """,
+        parameters=[
+            OpenApiParameter(name='async', type=bool, required=False,
+                             description="Run the import as a background job")
+        ],
+        request={
+            "multipart/form-data": {
+                "type": "object",
+                "properties": {
+                    "file": {"type": "string", "format": "binary"}
+                },
+                "required": ["file"]
+            }
+        },
+        responses={
+            200: OpenApiResponse(
+                description="Import report",
+                examples=[
+                    OpenApiExample(
+                        name="Import Report",
+                        value={
+                            "created": 800,
+                            "updated": 12,
+                            "unchanged": 190,
+                            "error_count": 1,
+                            "errors": [
+                                {"row": 9, "message": "Unknown product code \"SKU-404\""}
+                            ]
+                        }
+                    )
+                ]
+            ),
+            202: JobSerializer,
+            400: OpenApiResponse(description="No file or unsupported file format")
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_file(self, request):
+        """Import barcode aliases from a CSV or XLSX file."""
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response(
+                {'detail': 'file is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if request.query_params.get('async', '').lower() == 'true':
+            job = enqueue_job(Job.JobType.BARCODE_IMPORT, customer=request.user.userprofile.customer,
+                              user=request.user, params={'filename': upload.name}, input_file=upload)
+            return Response(JobSerializer(job, context={'request': request}).data,
+                            status=status.HTTP_202_ACCEPTED)
+
+        try:
+            report = import_barcodes(upload, request.user.userprofile.customer)
+        except ValidationError as e:
+            return Response(
+                {'detail': e.messages[0]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        response_status = status.HTTP_207_MULTI_STATUS if report.has_errors else status.HTTP_200_OK
+        return Response(report.as_dict(), status=response_status)
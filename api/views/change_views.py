@@ -0,0 +1,115 @@
+from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter, OpenApiResponse
+
+from api.serializers import ChangeEventSerializer
+from orderpiqrApp.models import ChangeEvent
+
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 5000
+
+
+@extend_schema(tags=["changes"])
+class ChangeEventViewSet(viewsets.GenericViewSet):
+    """
+    Change feed for integrations.
+
+    Every create, update and delete of orders, order lines, pick lists, product picks,
+    products and inventory logs gets a sequence number. Poll with the last `seq` you
+    processed to receive only what changed since then.
+    """
+    queryset = ChangeEvent.objects.none()
+    serializer_class = ChangeEventSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    def _int_param(self, name, default):
+        value = self.request.query_params.get(name)
+        if value in (None, ''):
+            return default
+        try:
+            number = int(value)
+        except ValueError:
+            number = -1
+        if number < 0:
+            raise ValidationError({name: 'Expected a non-negative integer.'})
+        return number
+
+    @extend_schema(
+        summary="Get changes",
+        description="""
+        Return the changes after sequence number `after`, oldest first, in batches of up to
+        `limit` (default 500, max 5000) events.
+
+        Start with `after=0`, process the batch, then continue with `after=last_seq` (or follow
+        `next`) until `has_more` is false. Store `last_seq` and poll again later. Fetch changed
+        objects from their endpoints; deleted objects are gone.
+
+        Sequence numbers of a customer only ever increase: after you have seen `last_seq`,
+        no change with a lower number will appear. Events are kept for
+        `CHANGE_FEED_RETENTION_DAYS` (default 30); resync fully if you fall further behind.
+        """,
+        parameters=[
+            OpenApiParameter(name='after', type=int, description='Return changes after this sequence number'),
+            OpenApiParameter(name='limit', type=int, description='Maximum number of changes (max 5000)'),
+            OpenApiParameter(name='entity', type=str,
+                             description='Comma-separated entities to include, e.g. `order,orderline`'),
+        ],
+        responses={
+            200: OpenApiResponse(
+                response=OpenApiTypes.OBJECT,
+                description="A batch of changes",
+                examples=[
+                    OpenApiExample(
+                        name="Changes Response",
+                        value={
+                            "results": [
+                                {"seq": 1041, "entity": "order", "object_id": 12, "action": "updated",
+                                 "created_at": "2025-01-15T10:30:00Z"},
+                                {"seq": 1042, "entity": "orderline", "object_id": 87, "action": "deleted",
+                                 "created_at": "2025-01-15T10:30:00Z"}
+                            ],
+                            "last_seq": 1042,
+                            "has_more": False,
+                            "next": None
+                        }
+                    )
+                ]
+            ),
+            400: OpenApiResponse(description="Invalid parameter"),
+        }
+    )
+    def list(self, request):
+        try:
+            customer = request.user.userprofile.customer
+        except AttributeError:
+            return Response({'results': [], 'last_seq': 0, 'has_more': False, 'next': None})
+
+        after = self._int_param('after', 0)
+        limit = min(self._int_param('limit', DEFAULT_BATCH_SIZE) or DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE)
+
+        events = ChangeEvent.objects.filter(customer=customer, seq__gt=after)
+        entity = request.query_params.get('entity')
+        if entity:
+            entities = [value.strip() for value in entity.split(',') if value.strip()]
+            unknown = set(entities) - set(ChangeEvent.Entity.values)
+            if unknown:
+                raise ValidationError({'entity': f"Unknown entity: {', '.join(sorted(unknown))}"})
+            events = events.filter(entity__in=entities)
+
+        events = list(events.order_by('seq')[:limit + 1])
+        has_more = len(events) > limit
+        events = events[:limit]
+        last_seq = events[-1].seq if events else after
+
+        return Response({
+            'results': self.get_serializer(events, many=True).data,
+            'last_seq': last_seq,
+            'has_more': has_more,
+            'next': replace_query_param(request.build_absolute_uri(), 'after', last_seq) if has_more else None,
+        })
@@ -89,9 +89,9 @@ class DeviceViewSet(viewsets.ModelViewSet):
     ordering = ['-last_login']
 
     def get_queryset(self):
-        queryset = Device.objects.filter(
-            customer=self.request.user.userprofile.customer
-        ).select_related('user')
+        queryset = DeviceSerializer.setup_queryset(
+            Device.objects.filter(customer=self.request.user.userprofile.customer)
+        )
 
         # Manual filtering
         user_id = self.request.query_params.get('user')
@@ -1,7 +1,15 @@
+import hashlib
+import html as html_lib
+import json
 import os
 import re
+import threading
+from typing import NamedTuple
+
 from django.http import HttpResponse
 from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.text import slugify
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from drf_spectacular.utils import extend_schema
@@ -107,17 +115,125 @@ def markdown_to_html(markdown_text):
     return html
 
 
-def get_documentation_html(language='en'):
-    """Read and convert the markdown documentation to HTML."""
-    filename = 'API_DOCUMENTATION_EN.md' if language == 'en' else 'API_DOCUMENTATION_NL.md'
-    filepath = os.path.join(settings.BASE_DIR, 'docs', filename)
+DOCUMENTATION_FILES = {
+    'en': 'API_DOCUMENTATION_EN.md',
+    'nl': 'API_DOCUMENTATION_NL.md',
+}
+
+HEADING_RE = re.compile(r'<h([23])>(.*?)</h\1>')
+ANCHORED_HEADING_RE = re.compile(r'<h([23]) id="[^"]*">.*?</h\1>')
+TAG_RE = re.compile(r'<[^>]+>')
+
+
+class CompiledDocumentation(NamedTuple):
+    """A documentation page rendered once, reused until its markdown file changes."""
+    page: str
+    etag: str
+    search_index: str
+    search_etag: str
+
+
+def _plain_text(fragment):
+    return ' '.join(html_lib.unescape(TAG_RE.sub(' ', fragment)).split())
+
+
+def add_heading_anchors(content):
+    """
+    Give every h2/h3 an id (GitHub-style slugs, so links such as `#jobs-api` work).
+
+    Returns (html, sections): sections is a list of dicts with the level, title and anchor
+    of each heading and the plain text below it, used for the table of contents and search.
+    """
+    sections = []
+    used = {}
+
+    def replace_heading(match):
+        level, title = match.group(1), match.group(2)
+        slug = slugify(_plain_text(title)) or 'section'
+        count = used.get(slug, 0)
+        used[slug] = count + 1
+        anchor = f'{slug}-{count}' if count else slug
+        sections.append({'level': int(level), 'title': _plain_text(title), 'anchor': anchor})
+        return f'<h{level} id="{anchor}">{title}</h{level}>'
+
+    content = HEADING_RE.sub(replace_heading, content)
+
+    # A section's text runs from its heading to the next h2/h3
+    headings = list(ANCHORED_HEADING_RE.finditer(content))
+    for i, (section, match) in enumerate(zip(sections, headings)):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(content)
+        section['text'] = _plain_text(content[match.end():end])
+    return content, sections
+
+
+def render_toc(sections):
+    items = []
+    for section in sections:
+        css_class = 'toc-h3' if section['level'] == 3 else 'toc-h2'
+        items.append(f'<li class="{css_class}"><a href="#{section["anchor"]}">'
+                     f'{html_lib.escape(section["title"])}</a></li>')
+    return '<ul class="toc-list">' + ''.join(items) + '</ul>'
+
+
+def compile_documentation(language, markdown_content):
+    """Render the full documentation page and its search index for one language."""
+    content, sections = add_heading_anchors(markdown_to_html(markdown_content))
+    other_lang = 'nl' if language == 'en' else 'en'
+    page = HTML_TEMPLATE.format(
+        lang=language,
+        content=content,
+        toc=render_toc(sections),
+        other_lang=other_lang,
+        lang_label='Nederlands' if language == 'en' else 'English',
+        search_placeholder='Search the documentation' if language == 'en' else 'Zoek in de documentatie',
+        toc_label='Contents' if language == 'en' else 'Inhoud',
+    )
+    search_index = json.dumps(sections, ensure_ascii=False)
+    return CompiledDocumentation(
+        page=page,
+        etag=f'"{hashlib.sha256(page.encode()).hexdigest()[:32]}"',
+        search_index=search_index,
+        search_etag=f'"{hashlib.sha256(search_index.encode()).hexdigest()[:32]}"',
+    )
+
+
+# language -> (mtime_ns of the markdown file, CompiledDocumentation)
+_compiled = {}
+_compile_lock = threading.Lock()
 
+
+def get_documentation(language='en'):
+    """
+    The compiled documentation for a language.
+
+    Pages are compiled on first use and kept for the lifetime of the process; a request
+    only stats the markdown file, so an edited file is picked up without a restart.
+    """
+    filename = DOCUMENTATION_FILES[language]
+    filepath = os.path.join(settings.BASE_DIR, 'docs', filename)
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            markdown_content = f.read()
-        return markdown_to_html(markdown_content)
+        mtime = os.stat(filepath).st_mtime_ns
     except FileNotFoundError:
-        return f'<p>Documentation file not found: {filename}</p>'
+        return compile_documentation(language, f'Documentation file not found: {filename}')
+
+    cached = _compiled.get(language)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with _compile_lock:
+        cached = _compiled.get(language)
+        if cached is None or cached[0] != mtime:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                cached = (mtime, compile_documentation(language, f.read()))
+            _compiled[language] = cached
+    return cached[1]
+
+
+def _cached_response(request, response, etag):
+    """Answer with 304 when the client has this version, and let it be cached."""
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=settings.API_DOCUMENTATION_MAX_AGE)
+    return get_conditional_response(request, etag=etag, response=response)
 
 
 HTML_TEMPLATE = '''<!DOCTYPE html>
@@ -291,6 +407,77 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             color: var(--primary-color);
         }}
 
+        .doc-search {{
+            position: relative;
+            margin-bottom: 20px;
+        }}
+
+        .doc-search input {{
+            width: 100%;
+            padding: 10px 14px;
+            border: 1px solid var(--border-color);
+            border-radius: 6px;
+            font-size: 1em;
+        }}
+
+        .search-results {{
+            list-style: none;
+            padding: 0;
+            margin: 8px 0 0;
+            background: white;
+            border: 1px solid var(--border-color);
+            border-radius: 6px;
+        }}
+
+        .search-results:empty {{
+            display: none;
+        }}
+
+        .search-results li {{
+            margin: 0;
+            padding: 8px 14px;
+            border-bottom: 1px solid var(--border-color);
+        }}
+
+        .search-results li:last-child {{
+            border-bottom: none;
+        }}
+
+        .search-results small {{
+            display: block;
+            color: #666;
+        }}
+
+        .toc {{
+            background: white;
+            border: 1px solid var(--border-color);
+            border-radius: 6px;
+            padding: 10px 20px;
+            margin-bottom: 30px;
+        }}
+
+        .toc summary {{
+            cursor: pointer;
+            font-weight: 600;
+            color: var(--primary-color);
+        }}
+
+        .toc-list {{
+            columns: 2;
+            list-style: none;
+            padding-left: 0;
+        }}
+
+        .toc-list li {{
+            margin: 4px 0;
+            break-inside: avoid;
+        }}
+
+        .toc-list .toc-h3 {{
+            padding-left: 20px;
+            font-size: 0.9em;
+        }}
+
         @media (max-width: 768px) {{
             body {{
                 padding: 10px;
@@ -314,6 +501,10 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             .api-table td {{
                 padding: 8px 10px;
             }}
+
+            .toc-list {{
+                columns: 1;
+            }}
         }}
     </style>
 </head>
@@ -327,9 +518,59 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             <a href="/api/documentation/{other_lang}/" class="lang-switch">{lang_label}</a>
         </div>
     </nav>
+    <div class="doc-search">
+        <input type="search" id="doc-search" placeholder="{search_placeholder}" autocomplete="off">
+        <ul class="search-results" id="search-results"></ul>
+    </div>
+    <details class="toc" open>
+        <summary>{toc_label}</summary>
+        {toc}
+    </details>
     <main>
         {content}
     </main>
+    <script>
+        (function () {{
+            const input = document.getElementById('doc-search');
+            const results = document.getElementById('search-results');
+            let sections = null;
+
+            function escape(text) {{
+                const div = document.createElement('div');
+                div.textContent = text;
+                return div.innerHTML;
+            }}
+
+            function render() {{
+                const terms = input.value.toLowerCase().split(/\\s+/).filter(Boolean);
+                if (!sections || terms.length === 0) {{
+                    results.innerHTML = '';
+                    return;
+                }}
+                const matches = sections.filter(section => {{
+                    const haystack = (section.title + ' ' + section.text).toLowerCase();
+                    return terms.every(term => haystack.includes(term));
+                }}).slice(0, 10);
+                results.innerHTML = matches.map(section =>
+                    '<li><a href="#' + section.anchor + '">' + escape(section.title) + '</a>' +
+                    '<small>' + escape(section.text.slice(0, 120)) + '</small></li>'
+                ).join('');
+            }}
+
+            input.addEventListener('input', function () {{
+                if (sections) {{
+                    render();
+                    return;
+                }}
+                fetch('/api/documentation/{lang}/search-index.json')
+                    .then(response => response.json())
+                    .then(data => {{
+                        sections = data;
+                        render();
+                    }});
+            }});
+        }})();
+    </script>
 </body>
 </html>
 '''
@@ -340,19 +581,22 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
 @permission_classes([AllowAny])
 def documentation_view(request, language='en'):
     """Render the API documentation as HTML."""
-    if language not in ['en', 'nl']:
+    if language not in DOCUMENTATION_FILES:
         language = 'en'
 
-    content = get_documentation_html(language)
+    documentation = get_documentation(language)
+    return _cached_response(request, HttpResponse(documentation.page, content_type='text/html'),
+                            documentation.etag)
 
-    other_lang = 'nl' if language == 'en' else 'en'
-    lang_label = 'Nederlands' if language == 'en' else 'English'
 
-    html = HTML_TEMPLATE.format(
-        lang=language,
-        content=content,
-        other_lang=other_lang,
-        lang_label=lang_label
-    )
+@extend_schema(exclude=True)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def documentation_search_index_view(request, language='en'):
+    """Sections of the API documentation as JSON, for the search box on the page."""
+    if language not in DOCUMENTATION_FILES:
+        language = 'en'
 
-    return HttpResponse(html, content_type='text/html')
+    documentation = get_documentation(language)
+    response = HttpResponse(documentation.search_index, content_type='application/json')
+    return _cached_response(request, response, documentation.search_etag)
@@ -5,6 +5,7 @@ from rest_framework.response import Response
 
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiExample, OpenApiParameter
 
+from api.filters import UpdatedSinceFilter
 from api.serializers import InventoryLogSerializer, InventoryModifySerializer
 from orderpiqrApp.models import InventoryLog, Product
 from orderpiqrApp.utils.inventory import is_inventory_enabled, modify_inventory
@@ -45,9 +46,11 @@ class InventoryLogViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = InventoryLog.objects.none()
     serializer_class = InventoryLogSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.OrderingFilter, filters.SearchFilter]
+    filter_backends = [filters.OrderingFilter, filters.SearchFilter, UpdatedSinceFilter]
     ordering_fields = ['created_at', 'product__code']
     ordering = ['-created_at']
+    keyset_ordering = ('created_at', 'pk')
+    updated_since_field = 'created_at'
     search_fields = ['product__code', 'product__description', 'notes']
 
     def get_queryset(self):
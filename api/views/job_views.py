@@ -0,0 +1,108 @@
+import os
+
+from django.http import FileResponse, Http404
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiExample, OpenApiResponse
+
+from api.serializers import JobSerializer
+from orderpiqrApp.models import Job
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="List background jobs",
+        description="""
+        Retrieve the background jobs (imports, QR PDF generation) of the authenticated user's customer,
+        newest first.
+
+        **Filtering:**
+        - `?status=running` - Filter by status (pending, running, completed, failed)
+        - `?job_type=product_import` - Filter by job type
+
+        Finished jobs and their result files are removed after `JOB_RESULT_TTL_HOURS` (default 24).
+        """
+    ),
+    retrieve=extend_schema(
+        summary="Get job progress",
+        description="""
+        Poll a single job. `progress` is the number of processed items; `total` and `percentage`
+        are only set when the number of items is known up front.
+
+        Once `status` is `completed`, `result` holds the job report and `download_url` points to
+        the result file, if the job produces one. Failed jobs describe the problem in `error`.
+        """,
+        examples=[
+            OpenApiExample(
+                name="Running Import",
+                value={
+                    "job_id": 12,
+                    "job_type": "product_import",
+                    "job_type_display": "Product Import",
+                    "status": "running",
+                    "status_display": "Running",
+                    "progress": 4000,
+                    "total": None,
+                    "percentage": None,
+                    "result": None,
+                    "error": "",
+                    "download_url": None,
+                    "created_at": "2025-01-15T10:30:00Z",
+                    "started_at": "2025-01-15T10:30:01Z",
+                    "finished_at": None
+                },
+                response_only=True
+            )
+        ]
+    ),
+)
+@extend_schema(tags=["jobs"])
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for following background jobs.
+
+    Jobs are created by endpoints that support `?async=true`.
+    """
+    queryset = Job.objects.none()
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    keyset_ordering = ('created_at', 'pk')
+
+    def get_queryset(self):
+        """Filter jobs to the current user's customer."""
+        try:
+            customer = self.request.user.userprofile.customer
+        except AttributeError:
+            return Job.objects.none()
+
+        queryset = Job.objects.filter(customer=customer)
+
+        job_status = self.request.query_params.get('status')
+        if job_status:
+            queryset = queryset.filter(status=job_status)
+
+        job_type = self.request.query_params.get('job_type')
+        if job_type:
+            queryset = queryset.filter(job_type=job_type)
+
+        return queryset
+
+    @extend_schema(
+        summary="Download job result",
+        description="Download the result file of a completed job, e.g. a generated QR PDF.",
+        responses={
+            (200, 'application/octet-stream'): OpenApiTypes.BINARY,
+            404: OpenApiResponse(description="Job not found or no result file"),
+        }
+    )
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download the result file of a completed job."""
+        job = self.get_object()
+        if job.status != Job.Status.COMPLETED or not job.result_file:
+            raise Http404("This job has no result file.")
+        return FileResponse(job.result_file.open('rb'), as_attachment=True,
+                            filename=os.path.basename(job.result_file.name))
@@ -1,15 +1,24 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from api.serializers import OrderSerializer, OrderDetailSerializer, OrderCreateSerializer
+from api.filters import UpdatedSinceFilter
+from api.parsers import NDJSONParser
+from api.serializers import OrderSerializer, OrderDetailSerializer, OrderCreateSerializer, BulkOrderSerializer
 from orderpiqrApp.models import Order
+from orderpiqrApp.utils.imports import bulk_create_orders
 from rest_framework import filters
+from django.db import IntegrityError
 from django.db.models import Count, Sum
 from django.utils import timezone
 from datetime import timedelta
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiExample, OpenApiResponse, OpenApiParameter
 
+# Orders accepted by one bulk_create request
+MAX_BULK_ORDERS = 10000
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -59,6 +68,8 @@ from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiExam
         Update all fields of an existing order.
 
         **Note:** Updating an order will replace all order lines if the `lines` field is provided.
+        Lines are matched to the existing lines by product: unchanged lines keep their `id`, changed
+        quantities are updated in place, and only lines for new products get a new `id`.
         Orders with status `in_progress` or `completed` should not be modified.
         """
     ),
@@ -94,15 +105,19 @@ class OrderViewSet(viewsets.ModelViewSet):
     queryset = Order.objects.none()  # Required for drf-spectacular
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter, UpdatedSinceFilter]
     search_fields = ['order_code', 'notes']
     ordering_fields = ['created_at', 'order_code', 'status', 'queue_position', 'completed_at']
     ordering = ['-created_at']
+    keyset_ordering = ('updated_at', 'pk')
+    updated_since_field = 'updated_at'
 
     def get_queryset(self):
-        queryset = Order.objects.filter(
-            customer=self.request.user.userprofile.customer
-        ).prefetch_related('lines__product')
+        queryset = Order.objects.filter(customer=self.request.user.userprofile.customer)
+        if self.action == 'retrieve':
+            queryset = OrderDetailSerializer.setup_queryset(queryset)
+        else:
+            queryset = OrderSerializer.setup_queryset(queryset)
 
         # Manual filtering
         order_status = self.request.query_params.get('status')
@@ -276,7 +291,7 @@ class OrderViewSet(viewsets.ModelViewSet):
             )
 
         try:
-            order = Order.objects.get(
+            order = OrderDetailSerializer.setup_queryset(Order.objects).get(
                 order_code=code,
                 customer=request.user.userprofile.customer
             )
@@ -290,11 +305,35 @@ class OrderViewSet(viewsets.ModelViewSet):
 
     @extend_schema(
         summary="Bulk create orders",
-        description="Create multiple orders at once. Useful for importing orders from external systems.",
+        description="""
+        Create many orders at once, e.g. when importing orders from an external system.
+
+        Send `{"orders": [...]}` as JSON, or one order per line as NDJSON
+        (`Content-Type: application/x-ndjson`) for large uploads of up to 10,000 orders. Lines
+        refer to a product by `product` (ID) or `product_code`.
+
+        All orders are validated first, with one lookup for all products and order codes, and
+        then inserted in a single transaction.
+
+        **Modes** (`?mode=`, or `"mode"` in a JSON body):
+        - `partial` (default) - Create the valid orders and report the invalid ones (207)
+        - `atomic` - Create nothing when any order is invalid (400)
+
+        Pass `?queue=true` (or `"queue": true`) to add the created orders to the end of the
+        picking queue, in request order.
+        """,
+        parameters=[
+            OpenApiParameter(name="mode", description="partial (default) or atomic", required=False,
+                             type=str, enum=['partial', 'atomic']),
+            OpenApiParameter(name="queue", description="Add the created orders to the picking queue",
+                             required=False, type=bool),
+        ],
         request={
             "application/json": {
                 "type": "object",
                 "properties": {
+                    "mode": {"type": "string", "enum": ["partial", "atomic"]},
+                    "queue": {"type": "boolean"},
                     "orders": {
                         "type": "array",
                         "items": {
@@ -308,8 +347,10 @@ class OrderViewSet(viewsets.ModelViewSet):
                                         "type": "object",
                                         "properties": {
                                             "product": {"type": "integer"},
+                                            "product_code": {"type": "string"},
                                             "quantity": {"type": "integer"}
-                                        }
+                                        },
+                                        "required": ["quantity"]
                                     }
                                 }
                             },
@@ -318,6 +359,11 @@ class OrderViewSet(viewsets.ModelViewSet):
                     }
                 },
                 "required": ["orders"]
+            },
+            "application/x-ndjson": {
+                "type": "string",
+                "description": "One order object per line, e.g. "
+                               '`{"order_code": "ORD-001", "lines": [{"product_code": "PROD-001", "quantity": 2}]}`'
             }
         },
         responses={
@@ -327,7 +373,8 @@ class OrderViewSet(viewsets.ModelViewSet):
                     OpenApiExample(
                         name="Success Response",
                         value={
-                            "created_count": 5,
+                            "created_count": 2,
+                            "queued_count": 0,
                             "orders": [
                                 {"order_id": 1, "order_code": "ORD-001"},
                                 {"order_id": 2, "order_code": "ORD-002"}
@@ -336,46 +383,99 @@ class OrderViewSet(viewsets.ModelViewSet):
                     )
                 ]
             ),
-            400: OpenApiResponse(description="Validation error")
+            207: OpenApiResponse(
+                description="Some orders were invalid and skipped (partial mode)",
+                examples=[
+                    OpenApiExample(
+                        name="Partial Response",
+                        value={
+                            "created_count": 1,
+                            "queued_count": 0,
+                            "orders": [{"order_id": 1, "order_code": "ORD-001"}],
+                            "errors": [
+                                {
+                                    "index": 1,
+                                    "order_code": "ORD-002",
+                                    "errors": {"lines": [{}, {"product_code": ['Unknown product code "X-1"']}]}
+                                }
+                            ]
+                        }
+                    )
+                ]
+            ),
+            400: OpenApiResponse(description="Validation error, or any invalid order in atomic mode")
         }
     )
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
     def bulk_create(self, request):
         """Bulk create multiple orders."""
-        orders_data = request.data.get('orders', [])
+        if isinstance(request.data, list):
+            orders_data, options = request.data, {}
+        else:
+            orders_data, options = request.data.get('orders', []), request.data
         customer = request.user.userprofile.customer
 
-        if not orders_data:
+        mode = request.query_params.get('mode') or options.get('mode') or 'partial'
+        if mode not in ('partial', 'atomic'):
+            return Response(
+                {'detail': 'Invalid mode. Use "partial" or "atomic".'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queue = request.query_params.get('queue', options.get('queue', False))
+        queue = str(queue).lower() in ('true', '1')
+
+        if not orders_data or not isinstance(orders_data, list):
             return Response(
                 {'detail': 'No orders provided'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        if len(orders_data) > MAX_BULK_ORDERS:
+            return Response(
+                {'detail': f'Too many orders. Send at most {MAX_BULK_ORDERS} orders per request.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        created_orders = []
+        valid_orders = []
         errors = []
-
+        # One serializer for all orders: building its fields is the costly part of validation
+        serializer = BulkOrderSerializer()
         for i, order_data in enumerate(orders_data):
-            serializer = OrderCreateSerializer(data=order_data)
-            if serializer.is_valid():
-                order = serializer.save(customer=customer)
-                created_orders.append({
-                    'order_id': order.order_id,
-                    'order_code': order.order_code
-                })
-            else:
+            try:
+                valid_orders.append((i, serializer.run_validation(order_data)))
+            except ValidationError as e:
                 errors.append({
                     'index': i,
-                    'order_code': order_data.get('order_code'),
-                    'errors': serializer.errors
+                    'order_code': order_data.get('order_code') if isinstance(order_data, dict) else None,
+                    'errors': e.detail
                 })
 
+        created_orders = []
+        if not (errors and mode == 'atomic'):
+            try:
+                created_orders, order_errors = bulk_create_orders(
+                    customer, valid_orders, queue=queue, atomic=(mode == 'atomic')
+                )
+            except IntegrityError:
+                return Response(
+                    {'detail': 'Some of these order codes were created by another request at the same time. '
+                               'Please retry.'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            errors = sorted(errors + order_errors, key=lambda error: error['index'])
+
         response_data = {
             'created_count': len(created_orders),
-            'orders': created_orders
+            'queued_count': len(created_orders) if queue else 0,
+            'orders': [
+                {'order_id': order.order_id, 'order_code': order.order_code}
+                for order in created_orders
+            ]
         }
 
         if errors:
             response_data['errors'] = errors
+            if mode == 'atomic':
+                return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
             return Response(response_data, status=status.HTTP_207_MULTI_STATUS)
 
         return Response(response_data, status=status.HTTP_201_CREATED)
@@ -2,6 +2,7 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from api.filters import UpdatedSinceFilter
 from api.serializers import OrderLineSerializer, OrderLineDetailSerializer
 from orderpiqrApp.models import OrderLine
 from rest_framework import filters
@@ -77,10 +78,12 @@ class OrderLineViewSet(viewsets.ModelViewSet):
     queryset = OrderLine.objects.none()  # Required for drf-spectacular
     serializer_class = OrderLineSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter, UpdatedSinceFilter]
     search_fields = ['product__description', 'product__code']
     ordering_fields = ['quantity', 'product__code', 'product__location', 'order__created_at']
     ordering = ['order', 'product__location']
+    keyset_ordering = ('pk',)
+    updated_since_field = 'order__updated_at'
 
     def get_queryset(self):
         queryset = OrderLine.objects.filter(
@@ -2,9 +2,12 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from api.filters import UpdatedSinceFilter
 from api.serializers import PickListSerializer, PickListDetailSerializer
 from orderpiqrApp.models import PickList
+from orderpiqrApp.utils.webhooks import enqueue_order_completed, enqueue_picklist_completed
 from rest_framework import filters
+from django.db import transaction
 from django.db.models import Avg, Count, Q
 from django.utils import timezone
 from datetime import timedelta
@@ -83,15 +86,19 @@ class PickListViewSet(viewsets.ModelViewSet):
     queryset = PickList.objects.none()  # Required for drf-spectacular
     serializer_class = PickListSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter, UpdatedSinceFilter]
     search_fields = ['picklist_code', 'notes']
     ordering_fields = ['created_at', 'updated_at', 'picklist_code', 'successful']
     ordering = ['-created_at']
+    keyset_ordering = ('updated_at', 'pk')
+    updated_since_field = 'updated_at'
 
     def get_queryset(self):
-        queryset = PickList.objects.filter(
-            customer=self.request.user.userprofile.customer
-        ).select_related('device', 'order')
+        queryset = PickList.objects.filter(customer=self.request.user.userprofile.customer)
+        if self.action == 'retrieve':
+            queryset = PickListDetailSerializer.setup_queryset(queryset)
+        else:
+            queryset = PickListSerializer.setup_queryset(queryset)
 
         # Manual filtering
         successful = self.request.query_params.get('successful')
@@ -177,15 +184,19 @@ class PickListViewSet(viewsets.ModelViewSet):
         picklist.successful = successful
         if notes:
             picklist.notes = notes
-        picklist.save()
 
-        # Update order status if linked
         order_status = None
-        if picklist.order:
-            picklist.order.status = 'completed'
-            picklist.order.completed_at = timezone.now()
-            picklist.order.save(update_fields=['status', 'completed_at'])
-            order_status = 'completed'
+        with transaction.atomic():
+            picklist.save()
+            enqueue_picklist_completed(picklist)
+
+            # Update order status if linked
+            if picklist.order:
+                picklist.order.status = 'completed'
+                picklist.order.completed_at = timezone.now()
+                picklist.order.save(update_fields=['status', 'completed_at'])
+                enqueue_order_completed(picklist.order)
+                order_status = 'completed'
 
         return Response({
             'status': 'ok',
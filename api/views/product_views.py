@@ -1,9 +1,16 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from api.serializers import ProductSerializer, ProductDetailSerializer
-from orderpiqrApp.models import Product, OrderLine
+from api.filters import ProductSearchFilter, UpdatedSinceFilter
+from api.serializers import ProductSerializer, ProductDetailSerializer, JobSerializer
+from orderpiqrApp.models import Job, Product, OrderLine
+from orderpiqrApp.utils.changes import update_tracked
+from orderpiqrApp.utils.imports import import_products
+from orderpiqrApp.utils.jobs import enqueue_job
+from orderpiqrApp.utils.product_index import lookup_product
+from django.core.exceptions import ValidationError
 from rest_framework import filters
 from django.db.models import Count
 
@@ -17,6 +24,8 @@ from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiExam
         Retrieve a list of all products for the authenticated user's customer.
 
         **Search:** Use the `?search=` query parameter to filter products by code or description.
+        Every word must match. Without `?ordering=`, products whose code starts with the search
+        come first, then other code matches, then description matches.
 
         **Filtering:**
         - `?active=true` - Only active products
@@ -82,13 +91,17 @@ class ProductViewSet(viewsets.ModelViewSet):
     queryset = Product.objects.none()  # Required for drf-spectacular
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.OrderingFilter, ProductSearchFilter, UpdatedSinceFilter]
     search_fields = ['code', 'description']
     ordering_fields = ['code', 'description', 'location', 'active', 'product_id']
     ordering = ['location', 'code']
+    keyset_ordering = ('updated_at', 'pk')
+    updated_since_field = 'updated_at'
 
     def get_queryset(self):
-        queryset = Product.objects.filter(customer=self.request.user.userprofile.customer)
+        queryset = ProductSerializer.setup_queryset(
+            Product.objects.filter(customer=self.request.user.userprofile.customer)
+        )
 
         # Manual filtering
         active = self.request.query_params.get('active')
@@ -159,11 +172,12 @@ class ProductViewSet(viewsets.ModelViewSet):
 
     @extend_schema(
         summary="Lookup product by code",
-        description="Find a product by its exact barcode/QR code. Useful for scanning operations.",
+        description="Find a product by its exact barcode/QR code or one of its barcode aliases "
+                    "(see `/api/barcodes/`). Useful for scanning operations.",
         parameters=[
             OpenApiParameter(
                 name='code',
-                description='The exact product code to look up',
+                description='The exact product code or barcode alias to look up',
                 required=True,
                 type=str
             )
@@ -175,7 +189,7 @@ class ProductViewSet(viewsets.ModelViewSet):
     )
     @action(detail=False, methods=['get'])
     def lookup(self, request):
-        """Look up a product by its exact code."""
+        """Look up a product by its exact code or a barcode alias."""
         code = request.query_params.get('code')
         if not code:
             return Response(
@@ -183,10 +197,14 @@ class ProductViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        customer = request.user.userprofile.customer
+        entry = lookup_product(customer.pk, code)
         try:
-            product = Product.objects.get(
-                code=code,
-                customer=request.user.userprofile.customer
+            if entry is None:
+                raise Product.DoesNotExist()
+            product = ProductDetailSerializer.setup_queryset(Product.objects).get(
+                pk=entry.product_id,
+                customer=customer
             )
             serializer = ProductDetailSerializer(product)
             return Response(serializer.data)
@@ -240,12 +258,90 @@ class ProductViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        updated = Product.objects.filter(
-            product_id__in=product_ids,
-            customer=request.user.userprofile.customer
-        ).update(active=active)
+        customer = request.user.userprofile.customer
+        updated = update_tracked(
+            Product.objects.filter(product_id__in=product_ids, customer=customer),
+            customer.pk,
+            active=active,
+        )
 
         return Response({
             'updated_count': updated,
             'message': 'Products updated successfully'
         })
+
+    @extend_schema(
+        summary="Import products from a file",
+        description="""
+        Create or update products from an uploaded CSV or XLSX file (multipart field `file`).
+
+        **Columns:** `code` and `description` are required, `location` and `active` are optional.
+        Products are matched on `code`: existing products are updated, new codes are created.
+
+        Rows with missing values are skipped and listed in `errors` with their row number;
+        the rest of the file is still imported. The response status is 207 when any row failed.
+
+        With `?async=true` the import runs as a background job: the response (202) contains
+        the job, whose progress and report can be followed at `/api/jobs/{job_id}/`.
+        """,
+        parameters=[
+            OpenApiParameter(name='async', type=bool, required=False,
+                             description="Run the import as a background job")
+        ],
+        request={
+            "multipart/form-data": {
+                "type": "object",
+                "properties": {
+                    "file": {"type": "string", "format": "binary"}
+                },
+                "required": ["file"]
+            }
+        },
+        responses={
+            200: OpenApiResponse(
+                description="Import report",
+                examples=[
+                    OpenApiExample(
+                        name="Import Report",
+                        value={
+                            "created": 120,
+                            "updated": 30,
+                            "unchanged": 850,
+                            "error_count": 1,
+                            "errors": [
+                                {"row": 17, "message": "Missing value for \"description\""}
+                            ]
+                        }
+                    )
+                ]
+            ),
+            202: JobSerializer,
+            400: OpenApiResponse(description="No file or unsupported file format")
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_file(self, request):
+        """Import products from a CSV or XLSX file."""
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response(
+                {'detail': 'file is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if request.query_params.get('async', '').lower() == 'true':
+            job = enqueue_job(Job.JobType.PRODUCT_IMPORT, customer=request.user.userprofile.customer,
+                              user=request.user, params={'filename': upload.name}, input_file=upload)
+            return Response(JobSerializer(job, context={'request': request}).data,
+                            status=status.HTTP_202_ACCEPTED)
+
+        try:
+            report = import_products(upload, request.user.userprofile.customer)
+        except ValidationError as e:
+            return Response(
+                {'detail': e.messages[0]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        response_status = status.HTTP_207_MULTI_STATUS if report.has_errors else status.HTTP_200_OK
+        return Response(report.as_dict(), status=response_status)
@@ -1,14 +1,22 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from api.serializers import ProductPickSerializer, ProductPickUpdateSerializer
-from orderpiqrApp.models import ProductPick
+from api.filters import UpdatedSinceFilter
+from api.serializers import (
+    ProductPickSerializer, ProductPickUpdateSerializer, ProductPickBulkUpdateSerializer, ProductPickBulkUpdateItemSerializer,
+)
+from orderpiqrApp.models import ChangeEvent, ProductPick
+from orderpiqrApp.utils.changes import record_changes
 from rest_framework import filters
 from django.db.models import Avg, Count
 from django.db import transaction
+from django.utils import timezone
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiExample, OpenApiResponse
 
+MAX_BULK_PICKS = 1000
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -78,10 +86,12 @@ class ProductPickViewSet(viewsets.ModelViewSet):
     queryset = ProductPick.objects.none()  # Required for drf-spectacular
     serializer_class = ProductPickSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter, UpdatedSinceFilter]
     search_fields = ['product__description', 'product__code']
     ordering_fields = ['product__code', 'product__location', 'successful', 'quantity']
     ordering = ['product__location']
+    keyset_ordering = ('updated_at', 'pk')
+    updated_since_field = 'updated_at'
 
     def get_queryset(self):
         queryset = ProductPick.objects.filter(
@@ -183,89 +193,135 @@ class ProductPickViewSet(viewsets.ModelViewSet):
 
     @extend_schema(
         summary="Bulk update product picks",
-        description="""
-        Update multiple product picks at once. Useful for batch processing pick results.
+        description=f"""
+        Update multiple product picks at once (up to {MAX_BULK_PICKS}). Useful for batch processing pick results.
 
         **Request body:**
         ```json
-        {
+        {{
             "picks": [
-                {"id": 1, "successful": true},
-                {"id": 2, "successful": true},
-                {"id": 3, "successful": false, "notes": "Out of stock"}
+                {{"id": 1, "successful": true, "version": 1}},
+                {{"id": 2, "successful": true, "version": 3}},
+                {{"id": 3, "successful": false, "notes": "Out of stock"}}
             ]
-        }
+        }}
         ```
+
+        **Optimistic concurrency:** every change to a pick raises its `version`. Send the `version`
+        you last read and the pick is only updated if nobody changed it in the meantime; otherwise
+        its result is `conflict` with the current `version`. Picks without a `version` are
+        always updated.
+
+        The response has one result per submitted pick, in request order, with status `updated`,
+        `conflict`, `not_found` or `invalid`. The status code is `200` when every pick was updated
+        and `207` otherwise.
         """,
-        request={
-            "application/json": {
-                "type": "object",
-                "properties": {
-                    "picks": {
-                        "type": "array",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "id": {"type": "integer"},
-                                "successful": {"type": "boolean"},
-                                "notes": {"type": "string"}
-                            },
-                            "required": ["id", "successful"]
-                        }
-                    }
-                },
-                "required": ["picks"]
-            }
-        },
+        request=ProductPickBulkUpdateSerializer,
         responses={
             200: OpenApiResponse(
-                description="Picks updated",
+                description="All picks updated",
                 examples=[
                     OpenApiExample(
                         name="Success Response",
-                        value={"status": "ok", "updated_count": 3}
+                        value={
+                            "status": "ok",
+                            "updated_count": 2,
+                            "results": [
+                                {"id": 1, "status": "updated", "version": 2},
+                                {"id": 2, "status": "updated", "version": 4}
+                            ]
+                        }
                     )
                 ]
-            )
+            ),
+            207: OpenApiResponse(
+                description="Some picks were not updated",
+                examples=[
+                    OpenApiExample(
+                        name="Partial Response",
+                        value={
+                            "status": "partial",
+                            "updated_count": 1,
+                            "results": [
+                                {"id": 1, "status": "updated", "version": 2},
+                                {"id": 2, "status": "conflict", "version": 5},
+                                {"id": 99, "status": "not_found"},
+                                {"id": None, "status": "invalid", "errors": {"successful": ["This field is required."]}}
+                            ]
+                        }
+                    )
+                ]
+            ),
+            400: OpenApiResponse(description="No picks provided, or too many")
         }
     )
     @action(detail=False, methods=['post'])
     def bulk_update(self, request):
-        """Bulk update multiple product picks."""
-        picks_data = request.data.get('picks', [])
+        """Bulk update multiple product picks with one query to read and one to write them."""
+        picks_data = request.data.get('picks') if isinstance(request.data, dict) else None
 
-        if not picks_data:
+        if not picks_data or not isinstance(picks_data, list):
             return Response(
                 {'detail': 'No picks provided'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        if len(picks_data) > MAX_BULK_PICKS:
+            return Response(
+                {'detail': f'At most {MAX_BULK_PICKS} picks can be updated per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Validate every item up front, reusing one serializer instance
+        item_serializer = ProductPickBulkUpdateItemSerializer()
+        results = [None] * len(picks_data)
+        changes = []
+        for index, pick_data in enumerate(picks_data):
+            try:
+                changes.append((index, item_serializer.run_validation(pick_data)))
+            except ValidationError as e:
+                pick_id = pick_data.get('id') if isinstance(pick_data, dict) else None
+                results[index] = {'id': pick_id, 'status': 'invalid', 'errors': e.detail}
 
         customer = request.user.userprofile.customer
-        updated_count = 0
+        now = timezone.now()
+        updated = {}
 
         with transaction.atomic():
-            for pick_data in picks_data:
-                pick_id = pick_data.get('id')
-                if not pick_id:
-                    continue
+            # Lock the picks, so a concurrent request cannot change them between the version check and the write
+            picks = ProductPick.objects.select_for_update(of=('self',)).filter(
+                picklist__customer=customer
+            ).in_bulk({data['id'] for index, data in changes})
 
-                try:
-                    pick = ProductPick.objects.get(
-                        id=pick_id,
-                        picklist__customer=customer
-                    )
-                    pick.successful = pick_data.get('successful')
-                    if 'notes' in pick_data:
-                        pick.notes = pick_data['notes']
-                    pick.save()
-                    updated_count += 1
-                except ProductPick.DoesNotExist:
+            for index, data in changes:
+                pick = picks.get(data['id'])
+                if pick is None:
+                    results[index] = {'id': data['id'], 'status': 'not_found'}
+                    continue
+                if 'version' in data and data['version'] != pick.version:
+                    results[index] = {'id': pick.pk, 'status': 'conflict', 'version': pick.version}
                     continue
 
+                pick.successful = data['successful']
+                for field in ('notes', 'time_taken'):
+                    if field in data:
+                        setattr(pick, field, data[field])
+                pick.version += 1
+                pick.updated_at = now
+                updated[pick.pk] = pick
+                results[index] = {'id': pick.pk, 'status': 'updated', 'version': pick.version}
+
+            if updated:
+                ProductPick.objects.bulk_update(
+                    list(updated.values()), ['successful', 'notes', 'time_taken', 'version', 'updated_at']
+                )
+                record_changes(customer.pk, ChangeEvent.Entity.PRODUCT_PICK, ChangeEvent.Action.UPDATED, list(updated))
+
+        all_updated = all(result['status'] == 'updated' for result in results)
         return Response({
-            'status': 'ok',
-            'updated_count': updated_count
-        })
+            'status': 'ok' if all_updated else 'partial',
+            'updated_count': sum(result['status'] == 'updated' for result in results),
+            'results': results
+        }, status=status.HTTP_200_OK if all_updated else status.HTTP_207_MULTI_STATUS)
 
     @extend_schema(
         summary="Get picks by picklist",
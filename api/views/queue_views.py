@@ -9,6 +9,8 @@ from datetime import timedelta
 from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter, OpenApiResponse
 
 from orderpiqrApp.models import Order, Device, UserProfile, PickList, ProductPick
+from orderpiqrApp.utils.changes import update_tracked
+from orderpiqrApp.utils.webhooks import enqueue_queue_changed
 
 
 def get_customer_from_request(request):
@@ -258,6 +260,7 @@ def queue_add_order(request, order_id):
             order.queue_position = (max_pos or 0) + 1
             order.status = 'queued'
             order.save(update_fields=['queue_position', 'status'])
+            enqueue_queue_changed(customer.pk, 'added', [order.order_id])
 
             return Response({
                 'status': 'ok',
@@ -333,6 +336,7 @@ def queue_remove_order(request, order_id):
             order.queue_position = None
             order.status = 'draft'
             order.save(update_fields=['queue_position', 'status'])
+            enqueue_queue_changed(customer.pk, 'removed', [order.order_id])
 
             return Response({
                 'status': 'ok',
@@ -490,6 +494,7 @@ def queue_claim_order(request, order_id):
                         quantity=1,
                     )
                     picklist_products.append(line.product.code)
+            enqueue_queue_changed(customer.pk, 'claimed', [order.order_id])
 
             return Response({
                 'status': 'ok',
@@ -575,11 +580,12 @@ def queue_reorder(request):
     try:
         with transaction.atomic():
             for position, order_id in enumerate(order_ids, start=1):
-                Order.objects.filter(
-                    order_id=order_id,
-                    customer=customer,
-                    status__in=['queued', 'in_progress']
-                ).update(queue_position=position)
+                update_tracked(
+                    Order.objects.filter(order_id=order_id, customer=customer, status__in=['queued', 'in_progress']),
+                    customer.pk,
+                    queue_position=position,
+                )
+            enqueue_queue_changed(customer.pk, 'reordered', order_ids)
 
             return Response({
                 'status': 'ok',
@@ -681,6 +687,7 @@ def queue_move_order(request, order_id, direction):
                 order.queue_position, adjacent.queue_position = adjacent.queue_position, order.queue_position
                 order.save(update_fields=['queue_position'])
                 adjacent.save(update_fields=['queue_position'])
+                enqueue_queue_changed(customer.pk, 'moved', [order.order_id, adjacent.order_id])
 
             return Response({
                 'status': 'ok',
@@ -0,0 +1,80 @@
+import gzip
+import hashlib
+import threading
+from typing import NamedTuple
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import translation
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+
+
+class RenderedSchema(NamedTuple):
+    content: bytes
+    gzipped: bytes
+    content_type: str
+    content_disposition: str
+    etag: str
+
+
+# (format, language) -> RenderedSchema
+_schemas = {}
+_schemas_lock = threading.Lock()
+
+
+def clear_schema_cache():
+    with _schemas_lock:
+        _schemas.clear()
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    SpectacularAPIView that generates the schema once per process, format and language.
+
+    The schema only changes with the code, so it is rendered on the first request after a
+    deploy and served from memory afterwards, gzipped when the client accepts it and with
+    an ETag so Swagger UI and ReDoc revalidate with a 304 instead of downloading it again.
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        lang = request.GET.get('lang')
+        if (lang and lang not in dict(settings.LANGUAGES)) or request.GET.get('version'):
+            # Not worth caching (and not bounded): generate as usual
+            return super().get(request, *args, **kwargs)
+
+        key = (request.accepted_renderer.format, lang or translation.get_language())
+        schema = _schemas.get(key)
+        if schema is None:
+            with _schemas_lock:
+                schema = _schemas.get(key)
+                if schema is None:
+                    schema = self._render(request, *args, **kwargs)
+                    _schemas[key] = schema
+
+        use_gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        response = HttpResponse(schema.gzipped if use_gzip else schema.content, content_type=schema.content_type)
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+        response['Content-Disposition'] = schema.content_disposition
+        response['ETag'] = schema.etag
+        patch_vary_headers(response, ['Accept', 'Accept-Encoding'])
+        patch_cache_control(response, public=True, no_cache=True)
+        return get_conditional_response(request, etag=schema.etag, response=response)
+
+    def _render(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        renderer = request.accepted_renderer
+        content = renderer.render(response.data, request.accepted_media_type, self.get_renderer_context())
+        content_type = request.accepted_media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        return RenderedSchema(
+            content=content,
+            gzipped=gzip.compress(content, compresslevel=9),
+            content_type=content_type,
+            content_disposition=response['Content-Disposition'],
+            etag=f'"{hashlib.sha256(content).hexdigest()[:32]}"',
+        )
@@ -0,0 +1,183 @@
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiExample, OpenApiParameter, OpenApiResponse
+
+from api.serializers import WebhookDeliverySerializer, WebhookEndpointSerializer
+from orderpiqrApp.models import WebhookDelivery, WebhookEndpoint, generate_webhook_secret
+from orderpiqrApp.utils.webhooks import retry_deliveries
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="List webhook endpoints",
+        description="Retrieve the webhook endpoints of the authenticated user's customer."
+    ),
+    retrieve=extend_schema(
+        summary="Get webhook endpoint details",
+        description="Retrieve a webhook endpoint, including its signing secret."
+    ),
+    create=extend_schema(
+        summary="Create a webhook endpoint",
+        description="""
+        Register a URL that receives webhook events.
+
+        **Event types:** `order.completed`, `picklist.completed`, `inventory.changed`,
+        `queue.changed`. Leave `event_types` empty to receive all events.
+
+        Events are POSTed in batches as `{"events": [...]}`. Each request carries an
+        `X-OrderPiqR-Signature` header, `t=<timestamp>,v1=<signature>`, where the signature is the
+        hex HMAC-SHA256 of `<timestamp>.<request body>` with the endpoint's `secret`. Answer with
+        a 2xx status to acknowledge the batch; anything else is retried with exponential backoff.
+        Events can arrive more than once, so deduplicate on the event `id`.
+        """,
+        examples=[
+            OpenApiExample(
+                name="Create Endpoint",
+                value={
+                    "url": "https://erp.example.com/hooks/orderpiqr",
+                    "event_types": ["order.completed", "inventory.changed"],
+                    "description": "ERP order sync"
+                },
+                request_only=True
+            )
+        ]
+    ),
+    update=extend_schema(
+        summary="Update a webhook endpoint",
+        description="Update a webhook endpoint's URL, event types or active state."
+    ),
+    partial_update=extend_schema(
+        summary="Partially update a webhook endpoint",
+        description="Update specific fields of a webhook endpoint, e.g. `is_active` to pause it."
+    ),
+    destroy=extend_schema(
+        summary="Delete a webhook endpoint",
+        description="Delete a webhook endpoint together with its pending and past deliveries."
+    ),
+)
+@extend_schema(tags=["webhooks"])
+class WebhookEndpointViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet for managing the webhook endpoints of a customer.
+    """
+    queryset = WebhookEndpoint.objects.none()
+    serializer_class = WebhookEndpointSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Filter endpoints to the current user's customer."""
+        try:
+            customer = self.request.user.userprofile.customer
+        except AttributeError:
+            return WebhookEndpoint.objects.none()
+        return WebhookEndpoint.objects.filter(customer=customer)
+
+    def perform_create(self, serializer):
+        serializer.save(customer=self.request.user.userprofile.customer)
+
+    @extend_schema(
+        summary="Rotate the signing secret",
+        description="Replace the endpoint's secret. Requests are signed with the new secret right away.",
+        request=None,
+        responses={200: WebhookEndpointSerializer}
+    )
+    @action(detail=True, methods=['post'])
+    def rotate_secret(self, request, pk=None):
+        """Generate a new signing secret for an endpoint."""
+        endpoint = self.get_object()
+        endpoint.secret = generate_webhook_secret()
+        endpoint.save(update_fields=['secret'])
+        return Response(self.get_serializer(endpoint).data)
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="List webhook deliveries",
+        description="""
+        Retrieve the webhook deliveries of the authenticated user's customer: one row per event
+        and endpoint.
+
+        **Filtering:**
+        - `?status=dead` - Dead letters: deliveries that failed too often and are no longer retried
+        - `?status=pending` - Deliveries waiting to be sent or retried
+        - `?event_type=order.completed` - Filter by event type
+        - `?endpoint=1` - Filter by endpoint ID
+
+        Delivered and dead deliveries are removed after `WEBHOOK_RETENTION_DAYS` (default 14).
+        """
+    ),
+    retrieve=extend_schema(
+        summary="Get webhook delivery details",
+        description="Retrieve a delivery, including its payload and the last error."
+    ),
+)
+@extend_schema(tags=["webhooks"])
+class WebhookDeliveryViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for following webhook deliveries and retrying dead letters.
+    """
+    queryset = WebhookDelivery.objects.none()
+    serializer_class = WebhookDeliverySerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Filter deliveries to the current user's customer."""
+        try:
+            customer = self.request.user.userprofile.customer
+        except AttributeError:
+            return WebhookDelivery.objects.none()
+
+        queryset = WebhookDelivery.objects.filter(endpoint__customer=customer).order_by('-delivery_id')
+
+        delivery_status = self.request.query_params.get('status')
+        if delivery_status:
+            queryset = queryset.filter(status=delivery_status)
+
+        event_type = self.request.query_params.get('event_type')
+        if event_type:
+            queryset = queryset.filter(event_type=event_type)
+
+        endpoint_id = self.request.query_params.get('endpoint')
+        if endpoint_id:
+            queryset = queryset.filter(endpoint_id=endpoint_id)
+
+        return queryset
+
+    @extend_schema(
+        summary="Retry a delivery",
+        description="Send a pending or dead delivery again, with a fresh set of attempts.",
+        request=None,
+        responses={200: WebhookDeliverySerializer}
+    )
+    @action(detail=True, methods=['post'])
+    def retry(self, request, pk=None):
+        """Queue a single delivery for a new round of attempts."""
+        delivery = self.get_object()
+        retry_deliveries(WebhookDelivery.objects.filter(pk=delivery.pk))
+        delivery.refresh_from_db()
+        return Response(self.get_serializer(delivery).data)
+
+    @extend_schema(
+        summary="Retry all dead deliveries",
+        description="Queue all dead letters again, e.g. after the receiving system was fixed.",
+        parameters=[
+            OpenApiParameter(name="endpoint", description="Only retry the deliveries of this endpoint",
+                             required=False, type=int)
+        ],
+        request=None,
+        responses={
+            200: OpenApiResponse(
+                description="Number of deliveries queued",
+                examples=[OpenApiExample(name="Retry Response", value={"status": "ok", "retried": 42})]
+            )
+        }
+    )
+    @action(detail=False, methods=['post'])
+    def retry_dead(self, request):
+        """Queue all dead deliveries (optionally of one endpoint) for a new round of attempts."""
+        dead = self.get_queryset().filter(status=WebhookDelivery.Status.DEAD)
+        retried = retry_deliveries(WebhookDelivery.objects.filter(pk__in=dead.values('pk')))
+        return Response({'status': 'ok', 'retried': retried})
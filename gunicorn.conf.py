@@ -0,0 +1,65 @@
+"""
+Gunicorn configuration, loaded from the working directory by `gunicorn` (see Procfile).
+
+Every setting can be overridden with an environment variable, so a deploy can switch modes
+without a code change:
+
+- GUNICORN_MODE picks the worker type:
+    gthread (default): orderpiqr.wsgi in threaded workers. A slow client (a PDF download, a
+        queue screen on a bad connection) holds a thread instead of a whole worker.
+    sync: orderpiqr.wsgi in single-threaded workers, gunicorn's default.
+    asgi: orderpiqr.asgi in uvicorn workers (the uvicorn-worker package). File responses
+        are streamed without a thread per download (orderpiqrApp.middleware), and async
+        views run on the event loop.
+- WEB_CONCURRENCY: worker processes (set by Heroku per dyno size), default 2 per CPU + 1.
+- GUNICORN_THREADS: threads per gthread worker, default 4.
+- GUNICORN_MAX_REQUESTS: requests after which a worker is replaced, which bounds the memory
+  a worker can accumulate (caches, fragmentation). Default 1000, 0 disables recycling.
+- GUNICORN_PRELOAD: import the app once in the master before forking (default on), so
+  workers start in milliseconds and share the imported code's memory.
+
+Compare the modes with `manage.py loadtest_picker`.
+"""
+import multiprocessing
+import os
+
+MODES = {
+    'sync': ('sync', 'orderpiqr.wsgi:application'),
+    'gthread': ('gthread', 'orderpiqr.wsgi:application'),
+    'asgi': ('uvicorn_worker.UvicornWorker', 'orderpiqr.asgi:application'),
+}
+
+mode = os.environ.get('GUNICORN_MODE', 'gthread')
+if mode not in MODES:
+    raise RuntimeError(f"GUNICORN_MODE must be one of {', '.join(MODES)}, not {mode!r}.")
+worker_class, wsgi_app = MODES[mode]
+
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4)) if mode == 'gthread' else 1
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+# Worker recycling; the jitter keeps all workers from restarting at the same moment
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+# The Heroku router gives up after 30 seconds; a worker stuck longer than that is restarted
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 20
+# Longer than gunicorn's 2 seconds, so scanners reuse their connection between scans
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Worker heartbeat files on tmpfs: a slow disk can otherwise make healthy workers time out
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+forwarded_allow_ips = '*'
+
+
+def pre_fork(server, worker):
+    # With preload the master has imported the app; make sure no database connection opened
+    # during startup is inherited (and shared) by the workers
+    if preload_app:
+        from django.db import connections
+        connections.close_all()
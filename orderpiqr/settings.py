@@ -67,21 +67,28 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
     'drf_spectacular',
-    'django_user_agents',
+    # django_user_agents is not an installed app: only its parser is used, loaded lazily by
+    # orderpiqrApp.middleware.LazyUserAgentMiddleware (its template tags would import it at startup)
 ]
 
 MIDDLEWARE = [
+    # First, so it measures the rest (see orderpiqrApp.utils.request_metrics)
+    'orderpiqrApp.middleware.RequestMetricsMiddleware',
+    'orderpiqrApp.middleware.QueryPatternMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Before WhiteNoise, so static files are streamed too under ASGI
+    'orderpiqrApp.middleware.ASGIFileStreamingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoiseMiddleware, async-capable like the rest so ASGI requests stay on the event loop
+    'orderpiqrApp.middleware.AsyncWhiteNoiseMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'api.middleware.api_logger.APILoggingMiddleware',
-    'django_user_agents.middleware.UserAgentMiddleware',
+    'orderpiqrApp.middleware.LazyUserAgentMiddleware',
 
 ]
 
@@ -161,6 +168,17 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Uploads outside the job storage (batch QR PDFs rendered outside a job)
+MEDIA_ROOT = env('MEDIA_ROOT', default=os.path.join(BASE_DIR, 'media'))
+
+# 'staticfiles' as Django's default (STATICFILES_STORAGE above is no longer read since Django 5.1).
+# Job files live in the database, so the web and worker processes need no shared disk.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'jobs': {'BACKEND': 'orderpiqrApp.storage.DatabaseStorage'},
+}
+
 STATICI18N_ROOT = os.path.join(BASE_DIR, 'static', 'jsi18n')
 STATICI18N_PACKAGES = ['orderpiqrApp']  # app(s) with .po files
 # Default primary key field type
@@ -225,6 +243,63 @@ LOGGING = {
     },
 }
 
+# Background jobs: with JOB_WORKERS_ENABLED, imports and PDF generation are queued for
+# `python manage.py run_workers` (Procfile `worker`); otherwise they run inline in the request.
+# Their input and result files are kept in STORAGES['jobs'] (the database), which web and worker
+# dynos share; a filesystem backend there only works when they share a disk.
+JOB_WORKERS_ENABLED = env.bool('JOB_WORKERS_ENABLED', default=False)
+JOB_WORKER_PROCESSES = env.int('JOB_WORKER_PROCESSES', default=2)
+JOB_RESULT_TTL_HOURS = env.int('JOB_RESULT_TTL_HOURS', default=24)
+JOB_TIMEOUT_MINUTES = env.int('JOB_TIMEOUT_MINUTES', default=60)
+
+# Change feed (/api/changes/): events older than this are removed by the job cleanup
+CHANGE_FEED_RETENTION_DAYS = env.int('CHANGE_FEED_RETENTION_DAYS', default=30)
+
+# Outbound webhooks, sent by `python manage.py run_webhooks` (Procfile `webhooks`)
+WEBHOOK_BATCH_SIZE = env.int('WEBHOOK_BATCH_SIZE', default=100)  # Events per request
+WEBHOOK_DISPATCH_THREADS = env.int('WEBHOOK_DISPATCH_THREADS', default=4)
+WEBHOOK_TIMEOUT_SECONDS = env.int('WEBHOOK_TIMEOUT_SECONDS', default=10)
+WEBHOOK_MAX_ATTEMPTS = env.int('WEBHOOK_MAX_ATTEMPTS', default=12)  # About 15 hours of retries
+WEBHOOK_RETENTION_DAYS = env.int('WEBHOOK_RETENTION_DAYS', default=14)
+# Allow http and loopback/private webhook URLs; only for local development with manage.py webhook_stub
+WEBHOOK_ALLOW_PRIVATE_URLS = env.bool('WEBHOOK_ALLOW_PRIVATE_URLS', default=False)
+
+# In-process product code index used by the scanners (see orderpiqrApp.utils.product_index)
+PRODUCT_CODE_INDEX_MAX_CODES = env.int('PRODUCT_CODE_INDEX_MAX_CODES', default=100000)  # Per process
+PRODUCT_CODE_INDEX_MAX_AGE = env.int('PRODUCT_CODE_INDEX_MAX_AGE', default=300)  # Seconds
+
+# Serve the async picker endpoints (orderpiqrApp.views.scan_picklist_async_view); on by default
+# under ASGI (GUNICORN_MODE=asgi, see gunicorn.conf.py). Under WSGI every async view needs its own event loop.
+PICKER_ASYNC_VIEWS = env.bool('PICKER_ASYNC_VIEWS', default=env('GUNICORN_MODE', default='gthread') == 'asgi')
+# Threads writing device heartbeats after the response (orderpiqrApp.utils.background)
+BACKGROUND_WRITE_THREADS = env.int('BACKGROUND_WRITE_THREADS', default=2)
+
+# Requests taking at least this long are logged with their slowest query (orderpiqrApp.utils.request_metrics)
+SLOW_REQUEST_MS = env.int('SLOW_REQUEST_MS', default=1000)
+# N+1 query detection (orderpiqrApp.utils.query_patterns): 'off', 'log' (staging) or 'raise' (tests)
+QUERY_PATTERN_MODE = env('QUERY_PATTERN_MODE', default='off')
+QUERY_PATTERN_THRESHOLD = env.int('QUERY_PATTERN_THRESHOLD', default=10)  # Runs of one query shape per request
+
+# Browser cache lifetime of /api/documentation/; clients revalidate with the ETag afterwards
+API_DOCUMENTATION_MAX_AGE = env.int('API_DOCUMENTATION_MAX_AGE', default=86400)  # Seconds
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+    # Rendered QR codes, keyed by a hash of their content (see orderpiqrApp.utils.qr).
+    # Use e.g. filecache:///var/tmp/orderpiqr-qr or a Redis URL to share them between processes.
+    'qr': env.cache('QR_CACHE_URL', default='locmemcache://qr?MAX_ENTRIES=5000&TIMEOUT=604800'),
+}
+
+# The product code index needs a default cache shared by all processes: with a per-process one,
+# the other gunicorn workers keep resolving renamed, reassigned or deactivated codes for up to
+# PRODUCT_CODE_INDEX_MAX_AGE, and scans would write picks for the wrong product. Off otherwise.
+PRODUCT_CODE_INDEX_ENABLED = env.bool('PRODUCT_CODE_INDEX_ENABLED', default=CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache', 'django.core.cache.backends.dummy.DummyCache',
+))
+
+# Processes used to render QR codes for large PDF batches (0 = one per CPU)
+QR_RENDER_PROCESSES = env.int('QR_RENDER_PROCESSES', default=0)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -232,9 +307,9 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.ApiPagination',
     'PAGE_SIZE': 50,
-    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_SCHEMA_CLASS': 'api.schema.AutoSchema',
 
 }
 
@@ -260,12 +335,16 @@ All endpoints require JWT authentication. Obtain a token via `POST /api/token/`
     'VERSION': '1.1.0',
     'TAGS': [
         {'name': 'products', 'description': 'Product management - inventory items that can be ordered and picked'},
+        {'name': 'barcodes', 'description': 'Barcode aliases - supplier EANs and case barcodes that scan as a product'},
         {'name': 'orders', 'description': 'Order management - customer requests with order lines'},
         {'name': 'queue', 'description': 'Queue management - prioritize and manage picking operations'},
         {'name': 'devices', 'description': 'Device management - register and track picking devices'},
         {'name': 'picklists', 'description': 'Pick list management - picking jobs assigned to devices'},
         {'name': 'productpicks', 'description': 'Product picks - individual items within a pick list'},
         {'name': 'orderlines', 'description': 'Order lines - individual items within an order'},
+        {'name': 'jobs', 'description': 'Background jobs - progress and results of imports and PDF generation'},
+        {'name': 'changes', 'description': 'Change feed - incremental sync of everything that changed since a sequence number'},
+        {'name': 'webhooks', 'description': 'Webhooks - endpoints that receive events, and their deliveries'},
     ]
 }
 
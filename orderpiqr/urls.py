@@ -6,9 +6,11 @@ from django.views.i18n import JavaScriptCatalog
 
 from orderpiqr.views import *
 from orderpiqrApp.views import scan_picklist, complete_picklist, product_pick
+from orderpiqrApp.views import scan_picklist_async, complete_picklist_async, product_pick_async
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenVerifyView
-from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
-from api.views.documentation_views import documentation_view
+from drf_spectacular.views import SpectacularRedocView, SpectacularSwaggerView
+from api.views.documentation_views import documentation_search_index_view, documentation_view
+from api.views.schema_views import CachedSpectacularAPIView
 from django.views.generic import TemplateView
 from django.views.static import serve
 from django.conf import settings
@@ -49,16 +51,20 @@ urlpatterns = [
          name='password_reset_complete'),
     path('admin/loginas/', include('loginas.urls')),
     path('admin/download_batch_qr_pdf/<str:file_name>/', download_batch_qr_pdf, name='download_batch_qr_pdf'),
-    path('orderpiqr/scan-picklist', scan_picklist, name='scan-picklist'),  # Keep this outside of i18n to enable POST
-    path('orderpiqr/product-pick', product_pick, name='product-pick'),
-    path('orderpiqr/complete-picklist', complete_picklist, name='complete-picklist'),
+    # Keep these outside of i18n to enable POST; the async versions are for ASGI deployments
+    path('orderpiqr/scan-picklist', scan_picklist_async if settings.PICKER_ASYNC_VIEWS else scan_picklist,
+         name='scan-picklist'),
+    path('orderpiqr/product-pick', product_pick_async if settings.PICKER_ASYNC_VIEWS else product_pick,
+         name='product-pick'),
+    path('orderpiqr/complete-picklist', complete_picklist_async if settings.PICKER_ASYNC_VIEWS else complete_picklist,
+         name='complete-picklist'),
     # Keep this outside of i18n to enable POST
     path('offline/', TemplateView.as_view(template_name='offline.html'), name='offline'),
     re_path(r'^serviceWorker\.js$', serve, {'document_root': settings.BASE_DIR, 'path': 'serviceWorker.js'}),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+    path('api/schema/', CachedSpectacularAPIView.as_view(), name='schema'),
     # Swagger UI
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
 
@@ -70,8 +76,14 @@ urlpatterns = [
     path('api/documentation/', documentation_view, {'language': 'en'}, name='api-documentation'),
     path('api/documentation/en/', documentation_view, {'language': 'en'}, name='api-documentation-en'),
     path('api/documentation/nl/', documentation_view, {'language': 'nl'}, name='api-documentation-nl'),
+    path('api/documentation/en/search-index.json', documentation_search_index_view, {'language': 'en'},
+         name='api-documentation-search-en'),
+    path('api/documentation/nl/search-index.json', documentation_search_index_view, {'language': 'nl'},
+         name='api-documentation-search-nl'),
 
     path('api/', include('api.urls')),  # your actual API
+    # Outside of i18n, so scrapers get a fixed URL
+    path('metrics/', staff_member_required(request_metrics_prometheus), name='request-metrics'),
 
 ]
 
@@ -5,16 +5,15 @@ from django.contrib.auth import authenticate, login
 from django.contrib.auth.forms import AuthenticationForm
 from orderpiqrApp.models import Device, UserProfile
 from orderpiqrApp.utils.inventory import is_inventory_enabled, is_orderpicking_enabled
+from orderpiqrApp.utils.request_metrics import request_metrics
 from django.utils.encoding import smart_str
 from django.utils.translation import gettext_lazy as _
-from django.http import FileResponse, Http404, JsonResponse
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.conf import settings
 from django.contrib.auth.views import PasswordResetView
 from django.contrib.auth.models import User
 from django.contrib import messages
 import os
-import threading
-import time
 import logging
 import sys
 from django.db.models.functions import TruncDate
@@ -166,28 +165,12 @@ def name_entry(request):
 
 @login_required
 def download_batch_qr_pdf(request, file_name):
-    file_path = os.path.join(settings.MEDIA_ROOT, 'qr_pdfs', file_name)
+    # Files are removed by the scheduled job cleanup (see orderpiqrApp.utils.jobs.cleanup_jobs)
+    file_path = os.path.join(settings.MEDIA_ROOT, 'qr_pdfs', os.path.basename(file_name))
     if not os.path.exists(file_path):
         raise Http404("Batch QR PDF not found.")
 
-    response = FileResponse(open(file_path, 'rb'), as_attachment=True, filename=file_name)
-    # Schedule deletion in the background
-    delete_file_delayed(file_path)
-
-    return response
-
-
-def delete_file_delayed(path, delay=10):
-    """Delete file after a short delay (in seconds)."""
-
-    def _delete():
-        time.sleep(delay)
-        try:
-            os.remove(path)
-        except Exception as e:
-            print(f"Failed to delete {path}: {e}")
-
-    threading.Thread(target=_delete).start()
+    return FileResponse(open(file_path, 'rb'), as_attachment=True, filename=file_name)
 
 PLAN_LIMIT = 50
 
@@ -230,6 +213,11 @@ def picklists_this_month_cumulative(request):
     })
 
 
+def request_metrics_prometheus(request):
+    """Request metrics of this worker process in the Prometheus text format (see orderpiqrApp.utils.request_metrics)."""
+    return HttpResponse(request_metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 # Custom error views
 def error_400(request, exception=None):
     logger.warning(
@@ -8,3 +8,4 @@ from .userprofile_admin import *
 from .preferences_admin import *
 from .email_admin import *
 from .inventory_admin import *
+from .webhook_admin import *
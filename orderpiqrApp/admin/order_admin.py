@@ -1,14 +1,12 @@
-import openpyxl
-import csv
 from django.contrib import admin, messages
 from django.core.exceptions import ValidationError
 from django import forms
-from orderpiqrApp.models import Order, OrderLine, Product, UserProfile, PickList, ProductPick
+from orderpiqrApp.models import Job, Order, OrderLine, Product, UserProfile, PickList, ProductPick
 from django.utils.translation import gettext_lazy as _
-from orderpiqrApp.utils.qr_pdf_generator import QRPDFGenerator  # You’ll build this next
+from orderpiqrApp.utils.jobs import enqueue_job
 from django.shortcuts import redirect
 from django.urls import reverse
-from django.db import transaction
+from django.utils.html import format_html
 
 
 class OrderUploadForm(forms.Form):
@@ -38,13 +36,17 @@ class OrderAdmin(admin.ModelAdmin):
             self.message_user(request, _("No orders selected."), level=messages.WARNING)
             return
 
-        try:
-            generator = QRPDFGenerator()
-            filename = generator.generate_multiple(queryset)
-            return redirect(reverse('download_batch_qr_pdf', args=[filename]))
-
-        except Exception as e:
-            self.message_user(request, _("Failed to generate QR batch: %(error)s") % {"error": e}, level=messages.ERROR)
+        order_ids = list(queryset.values_list('order_id', flat=True))
+        customer = getattr(getattr(request.user, 'userprofile', None), 'customer', None)
+        job = enqueue_job(Job.JobType.QR_PDF, customer=None if request.user.is_superuser else customer,
+                          user=request.user, params={'order_ids': order_ids}, total=len(order_ids))
+        if job.status == Job.Status.FAILED:
+            self.message_user(request, _("Failed to generate QR batch: %(error)s") % {"error": job.error},
+                              level=messages.ERROR)
+            return
+        if job.is_finished:
+            return redirect(reverse('manage_job_download', args=[job.job_id]))
+        return redirect(reverse('manage_job_detail', args=[job.job_id]))
 
     @admin.action(description=_("Add selected orders to queue"))
     def add_to_queue(self, request, queryset):
@@ -120,120 +122,6 @@ class OrderAdmin(admin.ModelAdmin):
                 raise ValidationError(_("Your account is not linked to a customer."))
         super().save_model(request, obj, form, change)
 
-    def parse_csv(self, file):
-        decoded_file = file.read().decode('utf-8').splitlines()
-        csv_reader = csv.reader(decoded_file)
-        header = next(csv_reader)
-        header_mapping = {col.strip().lower(): index for index, col in enumerate(header)}
-
-        rows = list(csv_reader)
-        return header_mapping, rows
-
-    def parse_xlsx(self, file):
-        wb = openpyxl.load_workbook(file)
-        sheet = wb.active
-        header = [str(cell.value).strip().lower() if cell.value else '' for cell in sheet[1]]
-        header_mapping = {col: index for index, col in enumerate(header)}
-        rows = list(sheet.iter_rows(min_row=2, values_only=True))
-        return header_mapping, rows
-
-    def validate_order_data(self, rows, header_mapping, customer):
-        required_columns = ['order_code', 'product_code', 'quantity']
-        for column in required_columns:
-            if column not in header_mapping:
-                raise ValidationError(_('Missing required column: "%(column)s"') % {'column': column})
-
-        cleaned_rows = []
-        errors = []
-        product_queryset = Product.objects.filter(customer=customer)
-        product_map = {product.code: product for product in product_queryset}
-
-        for idx, row in enumerate(rows, start=2):
-            if not row or all(cell is None or str(cell).strip() == '' for cell in row):
-                break  # Empty row = end of file
-
-            order_code = str(row[header_mapping['order_code']]).strip()
-            product_code = str(row[header_mapping['product_code']]).strip()
-            quantity = row[header_mapping['quantity']]
-
-            if not order_code:
-                errors.append(_('Missing value for "order_code" in row %(row)d') % {'row': idx})
-                continue
-
-            try:
-                quantity = int(quantity)
-            except (ValueError, TypeError):
-                raise ValidationError(_('Invalid quantity for product code "%(code)s" in row %(row)d') % {
-                    'code': product_code,
-                    'row': idx
-                })
-
-            product = product_map.get(product_code)
-            if not product:
-                errors.append(_('Unknown product code "%(code)s" in row %(row)d') % {
-                    'code': product_code, 'row': idx})
-                continue
-
-            cleaned_rows.append({
-                'order_code': order_code,
-                'product': product,
-                'quantity': quantity,
-            })
-
-        if errors:
-            raise ValidationError(errors[0])
-
-        return cleaned_rows
-
-
-    def add_orders(self, cleaned_rows, customer):
-        order_map = {}
-        lines_to_create = []
-        orders_created = 0
-        lines_added = 0
-        overwritten_orders = set()
-
-        with transaction.atomic():
-            for item in cleaned_rows:
-                order_code = item['order_code']
-                product = item['product']
-                quantity = item['quantity']
-
-                if order_code not in order_map:
-                    order_obj, created = Order.objects.get_or_create(
-                        order_code=order_code,
-                        customer=customer
-                    )
-                    order_map[order_code] = order_obj
-                    if created:
-                        orders_created += 1
-                    else:
-                        OrderLine.objects.filter(order=order_obj).delete()
-                        overwritten_orders.add(order_code)
-                else:
-                    order_obj = order_map[order_code]
-
-                lines_to_create.append(OrderLine(
-                    order=order_obj,
-                    product=product,
-                    quantity=quantity,
-                ))
-                lines_added += 1
-
-            OrderLine.objects.bulk_create(lines_to_create)
-
-        return orders_created, lines_added, overwritten_orders
-
-    def process_csv_file(self, file, customer):
-        header_mapping, rows = self.parse_csv(file)
-        cleaned_rows = self.validate_order_data(rows, header_mapping, customer)
-        return self.add_orders(cleaned_rows, customer)
-
-    def process_xlsx_file(self, file, customer):
-        header_mapping, rows = self.parse_xlsx(file)
-        cleaned_rows = self.validate_order_data(rows, header_mapping, customer)
-        return self.add_orders(cleaned_rows, customer)
-
     def upload_file(self, request, queryset):
         if 'upload_file' in request.FILES:
             file = request.FILES['upload_file']
@@ -241,23 +129,31 @@ class OrderAdmin(admin.ModelAdmin):
                 user_profile = UserProfile.objects.get(user=request.user)
                 customer = user_profile.customer
 
-                if file.name.endswith('.csv'):
-                    orders_created, lines_added, overwritten_orders = self.process_csv_file(file, customer)
-                elif file.name.endswith('.xlsx'):
-                    orders_created, lines_added, overwritten_orders = self.process_xlsx_file(file, customer)
-                else:
-                    raise ValidationError("Unsupported file format, only .csv and .xlsx are supported")
+                if not file.name.lower().endswith(('.csv', '.xlsx')):
+                    raise ValidationError(_("Unsupported file format, only .csv and .xlsx are supported"))
+
+                job = enqueue_job(Job.JobType.ORDER_IMPORT, customer=customer, user=request.user, input_file=file,
+                                  params={'filename': file.name, 'replace_existing': True})
+                if not job.is_finished:
+                    messages.info(request, format_html(
+                        _('Import started in the background. <a href="{}">Follow its progress</a>.'),
+                        reverse('manage_job_detail', args=[job.job_id])))
+                    return
+                if job.status == Job.Status.FAILED:
+                    raise ValidationError(job.error)
 
+                report = job.result
                 msg = _("%(orders)s orders and %(lines)s lines added.") % {
-                    "orders": orders_created,
-                    "lines": lines_added
+                    "orders": report['created'],
+                    "lines": report['lines']
                 }
 
-                if overwritten_orders:
-                    overwritten_list = ", ".join(sorted(str(code) for code in overwritten_orders))
-                    msg += " " + _("Overwritten orders: %(codes)s.") % {"codes": overwritten_list}
+                if report['updated']:
+                    msg += " " + _("%(count)s existing orders overwritten.") % {"count": report['updated']}
 
                 messages.success(request, msg)
+                for error in report['errors'][:10]:
+                    messages.warning(request, _("Row %(row)d: %(message)s") % error)
 
             except Exception as e:
                 error_message = str(e)
@@ -325,5 +221,10 @@ def save_model(self, request, obj, form, change):
     super().save_model(request, obj, form, change)
 
 
+class OrderLineAdmin(admin.ModelAdmin):
+    # OrderLine.__str__ shows the order and product of every row
+    list_select_related = ('order', 'product')
+
+
 admin.site.register(Order, OrderAdmin)
-admin.site.register(OrderLine)
+admin.site.register(OrderLine, OrderLineAdmin)
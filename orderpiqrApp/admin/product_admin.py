@@ -1,128 +1,77 @@
-import openpyxl
 from django.contrib import admin
-import csv
 from django.core.exceptions import ValidationError
-from orderpiqrApp.models import Product, UserProfile
+from django.urls import reverse
+from django.utils.html import format_html
+from orderpiqrApp.models import Job, Product, ProductBarcode, UserProfile
+from orderpiqrApp.utils.jobs import enqueue_job
 from django.contrib import messages
 from django import forms
 from django.utils.translation import gettext_lazy as _
-from django.db import transaction
 
 
 class ProductUploadForm(forms.Form):
     upload_file = forms.FileField()
 
 
+class ProductBarcodeInlineFormSet(forms.BaseInlineFormSet):
+    """
+    Validates the barcodes against the customer of the product: `customer` is not a form
+    field, so the model's unique check on (customer, barcode) does not run on its own.
+    """
+    # Set by ProductBarcodeInline for company admins, whose product form has no customer field
+    customer_id = None
+
+    def clean(self):
+        super().clean()
+        customer_id = self.customer_id or self.instance.customer_id
+        forms_by_barcode = {}
+        for form in self.forms:
+            if not hasattr(form, 'cleaned_data') or self._should_delete_form(form):
+                continue
+            barcode = form.cleaned_data.get('barcode')
+            if not barcode:
+                continue
+            if barcode in forms_by_barcode:
+                form.add_error('barcode', _('This barcode is entered more than once.'))
+            else:
+                forms_by_barcode[barcode] = form
+        if not forms_by_barcode or customer_id is None:
+            return
+
+        product_codes = set(Product.objects.filter(customer_id=customer_id, code__in=forms_by_barcode)
+                            .values_list('code', flat=True))
+        if self.instance.code in forms_by_barcode:
+            product_codes.add(self.instance.code)
+        own_ids = [form.instance.pk for form in self.forms if form.instance.pk is not None]
+        taken = set(ProductBarcode.objects.filter(customer_id=customer_id, barcode__in=forms_by_barcode)
+                    .exclude(pk__in=own_ids).values_list('barcode', flat=True))
+        for barcode, form in forms_by_barcode.items():
+            if barcode in product_codes:
+                form.add_error('barcode', _('This barcode is already the code of a product.'))
+            elif barcode in taken:
+                form.add_error('barcode', _('This barcode is already in use.'))
+
+
+class ProductBarcodeInline(admin.TabularInline):
+    model = ProductBarcode
+    formset = ProductBarcodeInlineFormSet
+    fields = ('barcode', 'quantity', 'description')
+    extra = 0
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        if request.user.groups.filter(name='companyadmin').exists():
+            formset.customer_id = UserProfile.objects.get(user=request.user).customer_id
+        return formset
+
+
 class ProductAdmin(admin.ModelAdmin):
     list_display = ('code', 'description', 'location', 'customer')  # Display relevant fields
-    search_fields = ['code', 'description']
+    search_fields = ['code', 'description', 'barcodes__barcode']
+    inlines = [ProductBarcodeInline]
 
     # actions = ['upload_file']  # Add the CSV upload action to the admin
 
-    def parse_csv(self, file):
-        """Parse CSV and return list of dicts."""
-        decoded_file = file.read().decode('utf-8').splitlines()
-        csv_reader = csv.reader(decoded_file)
-        header = next(csv_reader)
-        header_mapping = {col.strip().lower(): index for index, col in enumerate(header)}
-
-        data = []
-        for row in csv_reader:
-            data.append({
-                'code': row[header_mapping['code']],
-                'description': row[header_mapping['description']],
-                'location': row[header_mapping['location']],
-            })
-        return data
-
-    def parse_xlsx(self, file):
-        """Parse XLSX and return list of dicts."""
-        wb = openpyxl.load_workbook(file)
-        sheet = wb.active
-        header = [str(cell.value).strip().lower() if cell.value else '' for cell in sheet[1]]
-
-        header_mapping = {col: idx for idx, col in enumerate(header)}
-        data = []
-        for row in sheet.iter_rows(min_row=2, values_only=True):
-            data.append({
-                'code': row[header_mapping['code']],
-                'description': row[header_mapping['description']],
-                'location': row[header_mapping['location']],
-            })
-        return data
-
-    def validate_product_data(self, data):
-        """Validate product data and return cleaned data or raise ValidationError."""
-        required_fields = ['code', 'description', 'location']
-        cleaned_data = []
-
-        for idx, item in enumerate(data, start=2):
-            for field in required_fields:
-                if not item.get(field):
-                    raise ValidationError(_('Missing value for "%(field)s" in row %(row)d') % {
-                        'field': field,
-                        'row': idx,
-                    })
-            # try:
-            #     item['location'] = int(item['location'])
-            # except ValueError:
-            #     raise ValidationError(_('Invalid number for "location" in row %(row)d') % {
-            #         'row': idx,
-            #     })
-            cleaned_data.append(item)
-        return cleaned_data
-
-    from django.db import transaction
-
-    def add_products(self, cleaned_data, customer):
-        """Bulk add or update products"""
-        added = 0
-        overwritten = 0
-        existing_products = Product.objects.filter(
-            customer=customer,
-            code__in=[item['code'] for item in cleaned_data]
-        )
-        existing_map = {p.code: p for p in existing_products}
-        to_create = []
-        to_update = []
-
-        for item in cleaned_data:
-            code = item['code']
-            if code in existing_map:
-                product = existing_map[code]
-                product.description = item['description']
-                product.location = item['location']
-                product.active = True
-                to_update.append(product)
-            else:
-                to_create.append(Product(
-                    code=code,
-                    description=item['description'],
-                    location=item['location'],
-                    customer=customer,
-                    active=True,
-                ))
-
-        with transaction.atomic():
-            if to_create:
-                Product.objects.bulk_create(to_create)
-            if to_update:
-                Product.objects.bulk_update(to_update, ['description', 'location', 'active'])
-
-        added = len(to_create)
-        overwritten = len(to_update)
-        return added, overwritten
-
-    def process_csv_file(self, file, customer):
-        data = self.parse_csv(file)
-        cleaned_data = self.validate_product_data(data)
-        return self.add_products(cleaned_data, customer)
-
-    def process_xlsx_file(self, file, customer):
-        data = self.parse_xlsx(file)
-        cleaned_data = self.validate_product_data(data)
-        return self.add_products(cleaned_data, customer)
-
     def upload_file(self, request, queryset):
         """Handle CSV and XLSX upload"""
         if 'upload_file' in request.FILES:
@@ -132,18 +81,27 @@ class ProductAdmin(admin.ModelAdmin):
                 user_profile = UserProfile.objects.get(user=request.user)
                 customer = user_profile.customer
 
-                # Determine file type
-                if file.name.endswith('.csv'):
-                    added, overwritten = self.process_csv_file(file, customer)
-                elif file.name.endswith('.xlsx'):
-                    added, overwritten = self.process_xlsx_file(file, customer)
-                else:
+                if not file.name.lower().endswith(('.csv', '.xlsx')):
                     raise ValidationError(_('Unsupported file format, only .csv and .xlsx are supported'))
 
+                job = enqueue_job(Job.JobType.PRODUCT_IMPORT, customer=customer, user=request.user, input_file=file,
+                                  params={'filename': file.name,
+                                          'required_fields': ['code', 'description', 'location']})
+                if not job.is_finished:
+                    messages.info(request, format_html(
+                        _('Import started in the background. <a href="{}">Follow its progress</a>.'),
+                        reverse('manage_job_detail', args=[job.job_id])))
+                    return
+                if job.status == Job.Status.FAILED:
+                    raise ValidationError(job.error)
+
+                report = job.result
                 messages.success(request, _('%(added)d products added, %(overwritten)d products overwritten.') % {
-                    'added': added,
-                    'overwritten': overwritten,
+                    'added': report['created'],
+                    'overwritten': report['updated'] + report['unchanged'],
                 })
+                for error in report['errors'][:10]:
+                    messages.warning(request, _('Row %(row)d: %(message)s') % error)
 
             except Exception as e:
                 messages.error(request, _('Error processing file: %(error)s') % {
@@ -199,6 +157,16 @@ class ProductAdmin(admin.ModelAdmin):
         else:
             raise ValidationError(_('User is not allowed to save products.'))
 
+    def save_formset(self, request, form, formset, change):
+        """Barcodes belong to the customer of their product"""
+        barcodes = formset.save(commit=False)
+        # Deleted first, so a barcode can move from a deleted row to a new one
+        for barcode in formset.deleted_objects:
+            barcode.delete()
+        for barcode in barcodes:
+            barcode.customer_id = form.instance.customer_id
+            barcode.save()
+
     def message_user(self, request, message, level=messages.INFO, extra_tags='',
                      fail_silently=False):
         pass
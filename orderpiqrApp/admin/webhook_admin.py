@@ -0,0 +1,56 @@
+from django.contrib import admin, messages
+from django.utils.html import format_html
+from django.utils.translation import gettext_lazy as _
+from orderpiqrApp.models import WebhookDelivery, WebhookEndpoint
+from orderpiqrApp.utils.webhooks import retry_deliveries
+
+
+@admin.register(WebhookEndpoint)
+class WebhookEndpointAdmin(admin.ModelAdmin):
+    list_display = ('url', 'customer', 'event_types', 'is_active', 'created_at')
+    list_filter = ('is_active', 'customer')
+    search_fields = ('url', 'description')
+    readonly_fields = ('created_at',)
+
+
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    list_display = (
+        'delivery_id', 'event_type', 'endpoint', 'status_badge', 'attempts',
+        'response_status', 'next_attempt_at', 'created_at'
+    )
+    list_filter = ('status', 'event_type', 'endpoint__customer')
+    search_fields = ('endpoint__url', 'last_error')
+    date_hierarchy = 'created_at'
+    readonly_fields = (
+        'endpoint', 'event_id', 'event_type', 'payload', 'status', 'attempts', 'next_attempt_at',
+        'response_status', 'last_error', 'created_at', 'delivered_at'
+    )
+    actions = ['retry_selected']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def status_badge(self, obj):
+        colors = {
+            WebhookDelivery.Status.DELIVERED: '#118f11',
+            WebhookDelivery.Status.DEAD: '#dc3545',
+        }
+        return format_html(
+            '<span style="color:{}; font-weight:600;">{}</span>',
+            colors.get(obj.status, '#6c757d'), obj.get_status_display()
+        )
+    status_badge.short_description = _('Status')
+    status_badge.admin_order_field = 'status'
+
+    @admin.action(description=_('Retry selected deliveries'))
+    def retry_selected(self, request, queryset):
+        retried = retry_deliveries(queryset)
+        self.message_user(request, _('%(count)d delivery(s) queued again.') % {'count': retried}, messages.SUCCESS)
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.select_related('endpoint')
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class OrderpiqrAppConfig(AppConfig):
+    name = 'orderpiqrApp'
+
+    def ready(self):
+        from orderpiqrApp.signals import (
+            connect_change_feed, connect_device_pick_counts, connect_product_code_index, connect_query_observers,
+        )
+        connect_change_feed()
+        connect_product_code_index()
+        connect_device_pick_counts()
+        connect_query_observers()
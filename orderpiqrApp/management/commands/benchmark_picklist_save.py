@@ -0,0 +1,78 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from orderpiqrApp.models import Customer, Device, PickList
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark saving pick lists for a device with a long history, against the recount of "
+        "Device.lists_picked that PickList.save used to do. Creates temporary pick lists inside "
+        "a transaction that is rolled back afterwards, so the database is left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--picklists', type=int, default=100000, help="Pick lists in the device's history.")
+        parser.add_argument('--runs', type=int, default=50, help="Saves per measurement.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            device = self._create_history(options['picklists'])
+            runs = options['runs']
+            existing = PickList.objects.filter(device=device).order_by('-pk').first()
+
+            def recount():
+                device.lists_picked = device.picklist_set.count()
+                device.save()
+
+            def update():
+                existing.pick_started = True
+                existing.save()
+
+            created = iter(range(runs * 2))
+
+            def create():
+                PickList.objects.create(customer=device.customer, device=device,
+                                        picklist_code=f'BENCH-NEW-{next(created)}', updated_at=timezone.now())
+
+            self.stdout.write(f"{'operation':<32} {'median (ms)':>12}")
+            self.stdout.write(f"{'old recount (count + save)':<32} {self._time(recount, runs):>12.2f}")
+            self.stdout.write(f"{'PickList.save() (update)':<32} {self._time(update, runs):>12.2f}")
+            self.stdout.write(f"{'PickList.objects.create()':<32} {self._time(create, runs):>12.2f}")
+
+            device.refresh_from_db(fields=['lists_picked'])
+            expected = device.picklist_set.count()
+            self.stdout.write(f"lists_picked {device.lists_picked}, pick lists {expected}")
+
+            transaction.set_rollback(True)
+
+    def _create_history(self, picklist_count):
+        customer = Customer.objects.create(name='Pick list save benchmark', description='')
+        user = User.objects.create_user('picklist-save-benchmark', password=None)
+        device = Device.objects.create(user=user, customer=customer, device_fingerprint='picklist-save-benchmark',
+                                       name='Pick list save benchmark', description='',
+                                       last_login=timezone.now(), lists_picked=picklist_count)
+        start = time.perf_counter()
+        now = timezone.now()
+        # bulk_create skips PickList.save, so the count is set on the device above
+        PickList.objects.bulk_create((
+            PickList(customer=customer, device=device, picklist_code=f'BENCH-{i:07d}', updated_at=now,
+                     pick_started=True, successful=True)
+            for i in range(picklist_count)
+        ), batch_size=5000)
+        self.stdout.write(f"Created {picklist_count} pick lists in {time.perf_counter() - start:.1f}s")
+        return device
+
+    def _time(self, func, runs):
+        """Median time in milliseconds of calling func."""
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,73 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from orderpiqrApp.models import Customer, Product
+from orderpiqrApp.utils.search import search_products
+
+MATERIALS = ['steel', 'brass', 'nylon', 'oak', 'rubber', 'copper', 'plastic', 'zinc']
+ITEMS = ['bolt', 'washer', 'hinge', 'bracket', 'cable', 'gasket', 'spring', 'valve', 'handle', 'clamp']
+SIZES = ['M4', 'M6', 'M8', 'M10', '12mm', '25mm', '1/2"', 'XL']
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark product search on a large catalog. Creates temporary products inside a "
+        "transaction that is rolled back afterwards, so the database is left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=500000, help="Number of products in the catalog.")
+        parser.add_argument('--runs', type=int, default=5, help="Runs per query.")
+        parser.add_argument('--explain', action='store_true', help="Print the query plan of every query.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            customer = self._create_catalog(options['products'])
+            products = Product.objects.filter(customer=customer, active=True)
+
+            queries = ['SKU-0001', '12345', 'gasket', 'brass valve', 'M10 hinge', 'no-such-product']
+            self.stdout.write(f"{'query':<18} {'old (ms)':>10} {'new (ms)':>10} {'matches':>8}")
+            for query in queries:
+                old = products.filter(Q(code__icontains=query) | Q(description__icontains=query)).order_by('code')
+                new = search_products(products, query)
+                old_ms = self._time(old[:20], options['runs'])
+                new_ms = self._time(new[:20], options['runs'])
+                self.stdout.write(f"{query:<18} {old_ms:>10.1f} {new_ms:>10.1f} {new.count():>8}")
+                if options['explain']:
+                    self.stdout.write(new[:20].explain())
+
+            transaction.set_rollback(True)
+
+    def _create_catalog(self, product_count):
+        customer = Customer.objects.create(name='Product search benchmark', description='')
+        rng = random.Random(42)
+        start = time.perf_counter()
+        Product.objects.bulk_create((
+            Product(
+                customer=customer,
+                code=f'SKU-{i:07d}',
+                description=f'{rng.choice(MATERIALS)} {rng.choice(ITEMS)} {rng.choice(SIZES)}',
+                location=f'{chr(65 + i % 6)}{i % 40}-{i % 12}',
+            )
+            for i in range(product_count)
+        ), batch_size=5000)
+        if connection.vendor == 'postgresql':
+            # The planner needs statistics to pick the trigram indexes for the new rows
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE "orderpiqrApp_product"')
+        self.stdout.write(f"Created {product_count} products in {time.perf_counter() - start:.1f}s")
+        return customer
+
+    def _time(self, queryset, runs):
+        """Median time in milliseconds of evaluating the queryset."""
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,67 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from orderpiqrApp.models import Customer, Order, OrderLine, Product
+from orderpiqrApp.utils.qr_pdf_generator import QRPDFGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark batch QR PDF generation. Creates temporary orders inside a transaction "
+        "that is rolled back afterwards, so the database is left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1000, help="Number of orders in the batch.")
+        parser.add_argument('--lines', type=int, default=5, help="Lines per order.")
+        parser.add_argument('--runs', type=int, default=2,
+                            help="Number of runs; runs after the first reuse the QR cache.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            orders = self._create_orders(options['orders'], options['lines'])
+
+            for run in range(1, options['runs'] + 1):
+                query_count = 0
+
+                def count_queries(execute, sql, params, many, context):
+                    nonlocal query_count
+                    query_count += 1
+                    return execute(sql, params, many, context)
+
+                with connection.execute_wrapper(count_queries):
+                    start = time.perf_counter()
+                    filename = QRPDFGenerator().generate_multiple(orders)
+                    elapsed = time.perf_counter() - start
+
+                path = os.path.join(settings.MEDIA_ROOT, 'qr_pdfs', filename)
+                size_kb = os.path.getsize(path) / 1024
+                os.remove(path)
+
+                self.stdout.write(
+                    f"Run {run}: {options['orders']} orders in {elapsed:.2f}s "
+                    f"({options['orders'] / elapsed:.0f} pages/s, {size_kb:.0f} KB, {query_count} queries)"
+                )
+
+            transaction.set_rollback(True)
+
+    def _create_orders(self, order_count, line_count):
+        customer = Customer.objects.create(name='QR PDF benchmark', description='')
+        products = Product.objects.bulk_create([
+            Product(customer=customer, code=f'BENCH-{i:04d}', description=f'Benchmark product {i}',
+                    location=f'A{i % 20}-{i % 7}')
+            for i in range(max(line_count, 50))
+        ])
+        orders = Order.objects.bulk_create([
+            Order(customer=customer, order_code=f'BENCH-QR-{i:06d}') for i in range(order_count)
+        ])
+        OrderLine.objects.bulk_create([
+            OrderLine(order=order, product=products[(i + j) % len(products)], quantity=j + 1)
+            for i, order in enumerate(orders)
+            for j in range(line_count)
+        ])
+        return Order.objects.filter(customer=customer).order_by('order_id')
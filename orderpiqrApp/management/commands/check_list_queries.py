@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+from django.utils import translation
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.urls import router
+from orderpiqrApp.management.commands.check_query_patterns import create_sample_data
+from orderpiqrApp.utils.request_metrics import QueryTimer
+
+# API lists outside the router
+EXTRA_LIST_URL_NAMES = ['queue-list']
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every API list endpoint with a few and with many sample rows and fail when one "
+        "of them runs more queries with more rows: a query per row that select_related, "
+        "prefetch_related or an annotation should have avoided. Runs on sample data (see "
+        "check_query_patterns) inside transactions that are rolled back, so the database is left "
+        "untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--small', type=int, default=3, help="Sample rows per list in the first run.")
+        parser.add_argument('--large', type=int, default=20,
+                            help="Sample rows per list in the second run; keep it within one page.")
+        parser.add_argument('--path', action='append', dest='paths', default=[],
+                            help="Only check paths starting with this (repeatable).")
+
+    def handle(self, *args, **options):
+        if not 0 < options['small'] < options['large']:
+            raise CommandError("--large must be more than --small, and --small more than 0.")
+        if options['large'] > settings.REST_FRAMEWORK['PAGE_SIZE']:
+            raise CommandError(f"--large must fit on one page of {settings.REST_FRAMEWORK['PAGE_SIZE']} rows.")
+
+        with translation.override('en'):
+            paths = [reverse(f'{basename}-list') for _, _, basename in router.registry]
+            paths += [reverse(name) for name in EXTRA_LIST_URL_NAMES]
+        if options['paths']:
+            paths = [path for path in paths if any(path.startswith(p) for p in options['paths'])]
+
+        small = self._count_queries(paths, options['small'])
+        large = self._count_queries(paths, options['large'])
+
+        self.stdout.write(f"{'endpoint':<32} {'status':>6} {'rows':>9} {'queries':>9}")
+        failed = []
+        for path in paths:
+            (status, rows, queries), (large_status, large_rows, large_queries) = small[path], large[path]
+            if status != 200 or large_status != 200:
+                note = '  <- error'
+            elif large_queries > queries:
+                note = '  <- grows'
+            else:
+                note = ''
+            if note:
+                failed.append(path)
+            self.stdout.write(f"{path:<32} {large_status:>6} {f'{rows}/{large_rows}':>9} "
+                              f"{f'{queries}/{large_queries}':>9}{note}")
+
+        if failed:
+            raise CommandError(f"{len(failed)} of {len(paths)} list endpoints failed or run more queries "
+                               f"with more rows: {', '.join(failed)}.")
+        self.stdout.write(self.style.SUCCESS(f"Queries do not grow with the rows on {len(paths)} list endpoints."))
+
+    def _count_queries(self, paths, rows):
+        """{path: (status, rows returned, queries)} with `rows` sample rows per list."""
+        counts = {}
+        with transaction.atomic():
+            user, _ = create_sample_data(rows)
+            host = next((h for h in settings.ALLOWED_HOSTS if not h.startswith('.') and h != '*'), 'localhost')
+            api = Client(raise_request_exception=False, HTTP_HOST=host,
+                         headers={'Authorization': f'Bearer {AccessToken.for_user(user)}'})
+            for path in paths:
+                # The first request fills the per-process caches (customer settings, product index)
+                api.get(path)
+                timer = QueryTimer()
+                with connection.execute_wrapper(timer):
+                    response = api.get(path)
+                counts[path] = (response.status_code, self._rows(response), timer.count)
+            transaction.set_rollback(True)
+        return counts
+
+    @staticmethod
+    def _rows(response):
+        if response.status_code != 200:
+            return 0
+        data = response.json()
+        if isinstance(data, dict):
+            # 'results' of a page, or the named list of a plain view ('orders' of the queue)
+            data = next((value for value in data.values() if isinstance(value, list)), [])
+        return len(data)
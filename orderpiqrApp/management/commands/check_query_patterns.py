@@ -0,0 +1,163 @@
+import re
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone, translation
+from rest_framework_simplejwt.tokens import AccessToken
+
+from orderpiqrApp.models import (
+    ChangeEvent, Customer, CustomerSettingValue, Device, InventoryLog, Job, Order, OrderLine, PickList, Product,
+    ProductBarcode, ProductPick, SettingDefinition, UserProfile, WebhookDelivery, WebhookEndpoint,
+)
+from orderpiqrApp.utils.query_patterns import QueryPatternDetector, format_repeated_queries
+
+# Pages with side effects (logging out, switching user or language) or that are not pages
+SKIPPED_URL_NAME_RE = re.compile(r'logout|loginas|set_language|javascript-catalog|request-metrics')
+
+
+def _list_urls(resolver, prefix=''):
+    """(name, path) of every named URL pattern without arguments."""
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            namespace = f'{prefix}{pattern.namespace}:' if pattern.namespace else prefix
+            yield from _list_urls(pattern, namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name and not pattern.pattern.regex.groups:
+            name = f'{prefix}{pattern.name}'
+            try:
+                yield name, reverse(name)
+            except Exception:
+                # Patterns with an extra default kwarg or a format suffix only
+                continue
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every page, API list and admin page with the N+1 query detector on and report the "
+        "query shapes that run QUERY_PATTERN_THRESHOLD times or more (see "
+        "orderpiqrApp.utils.query_patterns). Runs on sample data inside a transaction that is "
+        "rolled back, so the database is left untouched. Fails when a repeated query is found or "
+        "a page answers with a server error."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=int, default=settings.QUERY_PATTERN_THRESHOLD,
+                            help="Runs of one query shape that count as repeated.")
+        parser.add_argument('--rows', type=int, default=25,
+                            help="Sample rows per list; keep it above the threshold.")
+        parser.add_argument('--path', action='append', dest='paths', default=[],
+                            help="Only check paths starting with this (repeatable).")
+
+    def handle(self, *args, **options):
+        findings = []
+        errors = []
+        checked = 0
+        with transaction.atomic(), translation.override('en'):
+            user, device = create_sample_data(options['rows'])
+            host = next((h for h in settings.ALLOWED_HOSTS if not h.startswith('.') and h != '*'), 'localhost')
+            web = Client(raise_request_exception=False, HTTP_HOST=host)
+            web.force_login(user)
+            session = web.session
+            session['device_fingerprint'] = device.device_fingerprint
+            session.save()
+            api = Client(raise_request_exception=False, HTTP_HOST=host,
+                         headers={'Authorization': f'Bearer {AccessToken.for_user(user)}'})
+
+            for label, path in self._paths():
+                if options['paths'] and not any(path.startswith(p) for p in options['paths']):
+                    continue
+                client = api if path.startswith('/api/') else web
+                detector = QueryPatternDetector(options['threshold'])
+                with connection.execute_wrapper(detector):
+                    response = client.get(path)
+                checked += 1
+                repeated = detector.repeated()
+                status = response.status_code
+                if repeated:
+                    findings.append(format_repeated_queries(f"GET {path} ({label}, {status})", repeated))
+                if status >= 500:
+                    # A page that fails may skip the queries it would repeat
+                    exc_info = getattr(response, 'exc_info', None)
+                    error = f": {exc_info[0].__name__}: {exc_info[1]}" if exc_info else ''
+                    errors.append(f"GET {path} ({label}) answered {status}{error}")
+                if options['verbosity'] > 1:
+                    self.stdout.write(f"{status} {path}{' - repeated queries' if repeated else ''}")
+
+            transaction.set_rollback(True)
+
+        for finding in findings:
+            self.stdout.write(finding)
+            self.stdout.write('')
+        for error in errors:
+            self.stdout.write(error)
+        if findings or errors:
+            raise CommandError(f"{len(findings)} of {checked} pages repeat queries, {len(errors)} fail.")
+        self.stdout.write(self.style.SUCCESS(f"No repeated queries on {checked} pages."))
+
+    def _paths(self):
+        for name, path in _list_urls(get_resolver()):
+            if not SKIPPED_URL_NAME_RE.search(name):
+                yield name, path
+
+        # The admin change lists are named URLs above; add the change form of their last object
+        for model, model_admin in admin.site._registry.items():
+            info = (model._meta.app_label, model._meta.model_name)
+            obj = model._default_manager.order_by('-pk').first()
+            if obj is not None:
+                yield f'{model_admin} change', reverse('admin:%s_%s_change' % info, args=[obj.pk])
+
+
+def create_sample_data(rows):
+    """A customer with `rows` of every kind of object and its admin user; returns (user, device)."""
+    customer = Customer.objects.create(name='Query pattern check', description='')
+    user = User.objects.create_user('query-pattern-check', password=None, is_staff=True, is_superuser=True)
+    UserProfile.objects.create(user=user, customer=customer)
+    group, _ = Group.objects.get_or_create(name='companyadmin')
+    user.groups.add(group)
+
+    definition, _ = SettingDefinition.objects.get_or_create(
+        key='inventory_management_enabled',
+        defaults={'label': 'Inventory management', 'setting_type': SettingDefinition.SettingType.BOOLEAN},
+    )
+    CustomerSettingValue.objects.create(customer=customer, definition=definition, value='true')
+
+    now = timezone.now()
+    device = Device.objects.create(user=user, customer=customer, device_fingerprint='query-pattern-check',
+                                   name='Query pattern check', description='', last_login=now,
+                                   lists_picked=0)
+    for i in range(1, rows):
+        Device.objects.create(user=user, customer=customer, device_fingerprint=f'query-pattern-check-{i:03d}',
+                              name=f'Query pattern check {i}', description='', last_login=now, lists_picked=0)
+    products = [
+        Product.objects.create(customer=customer, code=f'QPC-{i:03d}', description=f'Product {i}',
+                               location=f'A{i}', inventory_quantity=10)
+        for i in range(rows)
+    ]
+    for i, product in enumerate(products):
+        ProductBarcode.objects.create(customer=customer, product=product, barcode=f'QPC-EAN-{i:03d}')
+        InventoryLog.objects.create(product=product, user=user, old_quantity=0, new_quantity=10,
+                                    change_type=InventoryLog.ChangeType.SET,
+                                    reason=InventoryLog.Reason.STOCK_COUNT)
+    for i in range(rows):
+        order = Order.objects.create(customer=customer, order_code=f'QPC-ORDER-{i:03d}',
+                                     status='queued', queue_position=i + 1)
+        for product in products[i:i + 3]:
+            OrderLine.objects.create(order=order, product=product, quantity=1)
+        picklist = PickList.objects.create(customer=customer, device=device, picklist_code=order.order_code,
+                                           order=order, updated_at=now, pick_started=True)
+        for product in products[i:i + 3]:
+            ProductPick.objects.create(picklist=picklist, product=product, quantity=1)
+        # The signals write change events on commit, which never comes here
+        ChangeEvent.objects.create(customer=customer, entity=ChangeEvent.Entity.ORDER,
+                                   action=ChangeEvent.Action.CREATED, object_id=order.pk)
+    for i in range(rows):
+        Job.objects.create(customer=customer, created_by=user, job_type=Job.JobType.QR_PDF,
+                           status=Job.Status.COMPLETED, progress=1, total=1)
+        endpoint = WebhookEndpoint.objects.create(customer=customer, url=f'https://example.com/hooks/{i}')
+        WebhookDelivery.objects.create(endpoint=endpoint, event_type=WebhookEndpoint.EventType.ORDER_COMPLETED,
+                                       payload={})
+    return user, device
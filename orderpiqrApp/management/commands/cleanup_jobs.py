@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from orderpiqrApp.utils.changes import prune_change_events
+from orderpiqrApp.utils.jobs import cleanup_jobs
+from orderpiqrApp.utils.webhooks import prune_webhook_deliveries
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired background job results, change feed events and webhook deliveries, "
+        "and fail jobs that have been running too long."
+    )
+
+    def handle(self, *args, **options):
+        stats = cleanup_jobs()
+        pruned = prune_change_events()
+        deliveries = prune_webhook_deliveries()
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['deleted']} job(s) deleted, {stats['timed_out']} timed out, "
+            f"{stats['removed_files']} PDF file(s) removed, {pruned} change event(s) pruned, "
+            f"{deliveries} webhook deliveries pruned."
+        ))
@@ -0,0 +1,185 @@
+import http.client
+import importlib.util
+import json
+import os
+import random
+import secrets
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from orderpiqrApp.models import Customer, Device, Product
+
+MODES = ['sync', 'gthread', 'asgi']
+HOST = '127.0.0.1'
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the picker scan endpoints (scan-picklist and product-pick) under each gunicorn "
+        "mode of gunicorn.conf.py, with the sync and the async views, and compare throughput "
+        "and latency. Every combination runs against "
+        "the configured database with a temporary customer that is deleted afterwards. Use "
+        "PostgreSQL: SQLite locks the whole database on every write and reports most "
+        "concurrent scans as errors."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default=','.join(MODES), help="Comma separated GUNICORN_MODEs to compare.")
+        parser.add_argument('--views', default='sync,async',
+                            help="Comma separated picker views to compare (PICKER_ASYNC_VIEWS off and on).")
+        parser.add_argument('--duration', type=float, default=20.0, help="Seconds of load per mode.")
+        parser.add_argument('--concurrency', type=int, default=16, help="Simulated scanners sending requests.")
+        parser.add_argument('--workers', type=int, default=2, help="Gunicorn worker processes (WEB_CONCURRENCY).")
+        parser.add_argument('--threads', type=int, default=4, help="Threads per worker in gthread mode.")
+        parser.add_argument('--port', type=int, default=8765, help="Port the server listens on.")
+        parser.add_argument('--products', type=int, default=500, help="Products in the test catalog.")
+        parser.add_argument('--lines', type=int, default=10, help="Products per pick list.")
+
+    def handle(self, *args, **options):
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"Unknown mode(s): {', '.join(sorted(unknown))}.")
+        if 'asgi' in modes and importlib.util.find_spec('uvicorn_worker') is None:
+            self.stderr.write("Skipping asgi: the uvicorn-worker package is not installed.")
+            modes.remove('asgi')
+
+        views = [view.strip() for view in options['views'].split(',') if view.strip()]
+        if set(views) - {'sync', 'async'}:
+            raise CommandError("--views takes sync, async or both.")
+
+        customer, fingerprint, codes = self._create_data(options['products'])
+        results = []
+        try:
+            for mode in modes:
+                for view in views:
+                    self.stdout.write(f"Running {mode} with the {view} views for {options['duration']:.0f}s...")
+                    results.append((f'{mode}/{view}', self._run_mode(mode, view, fingerprint, codes, options)))
+        finally:
+            customer.delete()
+
+        # A scan is one product-pick request; per worker, so runs with other --workers compare
+        self.stdout.write('')
+        self.stdout.write(f"{'server':<14} {'endpoint':<14} {'requests':>9} {'errors':>7} "
+                          f"{'req/s':>8} {'/worker':>8} {'p50 ms':>8} {'p99 ms':>8}")
+        for server, endpoints in results:
+            for endpoint, samples in endpoints.items():
+                latencies = sorted(ms for ms, ok in samples if ok)
+                errors = sum(1 for _, ok in samples if not ok)
+                per_second = len(latencies) / options['duration']
+                p50 = statistics.median(latencies) if latencies else 0
+                p99 = statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else p50
+                self.stdout.write(f"{server:<14} {endpoint:<14} {len(samples):>9} {errors:>7} {per_second:>8.1f} "
+                                  f"{per_second / options['workers']:>8.1f} {p50:>8.1f} {p99:>8.1f}")
+
+    def _create_data(self, product_count):
+        customer = Customer.objects.create(name=f'Load test {uuid.uuid4().hex[:8]}', description='')
+        codes = [f'LT-{i:06d}' for i in range(product_count)]
+        Product.objects.bulk_create(
+            [Product(customer=customer, code=code, description=code, location=f'A{i % 40}')
+             for i, code in enumerate(codes)],
+            batch_size=1000,
+        )
+        fingerprint = f'loadtest-{uuid.uuid4().hex}'
+        Device.objects.create(customer=customer, device_fingerprint=fingerprint, name='Load test',
+                              description='', last_login=timezone.now(), lists_picked=0)
+        return customer, fingerprint, codes
+
+    def _run_mode(self, mode, view, fingerprint, codes, options):
+        env = dict(os.environ, GUNICORN_MODE=mode, WEB_CONCURRENCY=str(options['workers']),
+                   GUNICORN_THREADS=str(options['threads']),
+                   PICKER_ASYNC_VIEWS='true' if view == 'async' else 'false')
+        # A file rather than a pipe: nobody reads the log during the test, and a full pipe
+        # would block the workers
+        with tempfile.TemporaryFile('w+') as log:
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', '--config', os.path.join(settings.BASE_DIR, 'gunicorn.conf.py'),
+                 '--bind', f"{HOST}:{options['port']}"],
+                cwd=settings.BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+            )
+            try:
+                self._wait_until_ready(server, log, options['port'])
+                return self._load(fingerprint, codes, options)
+            finally:
+                server.terminate()
+                try:
+                    server.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+
+    def _wait_until_ready(self, server, log, port, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                log.seek(0)
+                raise CommandError(f"The server exited:\n{log.read()[-3000:]}")
+            try:
+                connection = http.client.HTTPConnection(HOST, port, timeout=5)
+                connection.request('GET', '/login/', headers={'Host': 'localhost'})
+                connection.getresponse().read()
+                connection.close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"The server did not answer within {timeout} seconds.")
+
+    def _load(self, fingerprint, codes, options):
+        samples = {'scan-picklist': [], 'product-pick': []}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+
+        def scanner(number):
+            rng = random.Random(number)
+            # Any 32 character secret passes the CSRF check when the cookie and header match
+            csrf = secrets.token_hex(16)
+            headers = {'Host': 'localhost', 'Content-Type': 'application/json',
+                       'Cookie': f'csrftoken={csrf}', 'X-CSRFToken': csrf}
+            connection = http.client.HTTPConnection(HOST, options['port'], timeout=60)
+            local = {'scan-picklist': [], 'product-pick': []}
+
+            def post(endpoint, payload):
+                start = time.perf_counter()
+                try:
+                    connection.request('POST', f'/orderpiqr/{endpoint}', json.dumps(payload), headers)
+                    response = connection.getresponse()
+                    response.read()
+                    ok = response.status == 200
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    ok = False
+                local[endpoint].append(((time.perf_counter() - start) * 1000, ok))
+                return ok
+
+            picklists = 0
+            while time.monotonic() < deadline:
+                picklists += 1
+                order_id = f'LT-{number}-{picklists}'
+                lines = rng.sample(codes, min(options['lines'], len(codes)))
+                if not post('scan-picklist', {'orderID': order_id, 'deviceFingerprint': fingerprint,
+                                              'picklist': lines}):
+                    continue
+                for code in lines:
+                    if time.monotonic() >= deadline:
+                        break
+                    post('product-pick', {'orderID': order_id, 'productCode': code, 'deviceFingerprint': fingerprint,
+                                          'successful': True, 'timeTakenMs': rng.randint(500, 5000)})
+            connection.close()
+            with lock:
+                for endpoint, values in local.items():
+                    samples[endpoint].extend(values)
+
+        threads = [threading.Thread(target=scanner, args=(number,)) for number in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return samples
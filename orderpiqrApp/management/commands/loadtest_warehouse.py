@@ -0,0 +1,226 @@
+import asyncio
+import json
+import random
+import secrets
+import statistics
+import time
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import translation
+
+from orderpiqrApp.models import Customer, Device, Order, UserProfile
+
+# The screens that poll the queue, as their HTMX refresh does
+QUEUE_SCREENS = ['queue_display_partial', 'queue_picker_partial', 'queue_manage_partial']
+
+
+class _Connection:
+    """A keep-alive HTTP/1.1 client connection on asyncio streams, enough for this app's responses."""
+
+    def __init__(self, host, port, headers):
+        self.host, self.port = host, port
+        self.headers = headers
+        self.reader = self.writer = None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def request(self, method, path, payload=None):
+        """Send a request and return (status, body); retried once when a kept-alive connection was closed."""
+        reused = self.writer is not None
+        try:
+            return await self._request(method, path, payload)
+        except (OSError, asyncio.IncompleteReadError):
+            self.close()
+            if not reused:
+                raise
+            return await self._request(method, path, payload)
+
+    async def _request(self, method, path, payload):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = b'' if payload is None else json.dumps(payload).encode()
+        head = [f'{method} {path} HTTP/1.1', *(f'{name}: {value}' for name, value in self.headers.items()),
+                f'Content-Length: {len(body)}']
+        if payload is not None:
+            head.append('Content-Type: application/json')
+        self.writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readuntil(b'\r\n')).split()[1])
+        headers = {}
+        while (line := await self.reader.readuntil(b'\r\n')) != b'\r\n':
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            content = bytearray()
+            while size := int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16):
+                content += (await self.reader.readexactly(size + 2))[:-2]
+            await self.reader.readuntil(b'\r\n')
+        elif 'content-length' in headers:
+            content = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            content = await self.reader.read()
+            headers['connection'] = 'close'
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, bytes(content)
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test a running server with the picker flow on data from `manage.py seed_warehouse`: "
+        "every simulated picker claims the next queued order from the queue, reports every unit "
+        "with product-pick and completes the pick list, while queue screens poll the queue "
+        "partials. Reports throughput and latency percentiles per endpoint. Pickers log in as "
+        "the seeded customer's admin user through sessions created in the database, so the "
+        "server must use the same database. Claimed orders stay claimed or completed; seed again "
+        "with another --prefix for a fresh queue."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Base URL of the server (http only).")
+        parser.add_argument('--prefix', default='SEED', help="--prefix the data was seeded with.")
+        parser.add_argument('--customer', type=int, default=1, help="Number of the seeded customer to use.")
+        parser.add_argument('--pickers', type=int, default=None,
+                            help="Simulated pickers, one per seeded device (default: all devices).")
+        parser.add_argument('--screens', type=int, default=2, help="Queue screens polling the queue.")
+        parser.add_argument('--screen-interval', type=float, default=5.0, help="Seconds between screen refreshes.")
+        parser.add_argument('--think-time', type=float, default=0.0,
+                            help="Average seconds a picker walks between scans; 0 scans back to back.")
+        parser.add_argument('--duration', type=float, default=60.0, help="Seconds of load.")
+        parser.add_argument('--timeout', type=float, default=60.0, help="Seconds before a request counts as failed.")
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http':
+            raise CommandError("Only http:// URLs are supported; test behind the TLS terminator.")
+        customer = Customer.objects.filter(name=f"{options['prefix']} warehouse {options['customer']}").first()
+        if customer is None:
+            raise CommandError("No seeded customer found; run `manage.py seed_warehouse` first.")
+        profile = UserProfile.objects.select_related('user').filter(customer=customer).first()
+        devices = list(Device.objects.filter(customer=customer).order_by('pk'))
+        pickers = options['pickers'] or len(devices)
+        if pickers > len(devices):
+            raise CommandError(f"The customer has {len(devices)} devices; seed more with --devices.")
+        orders = list(Order.objects.filter(customer=customer, status='queued')
+                      .order_by('queue_position').values_list('pk', flat=True))
+        self.stdout.write(f"{customer.name}: {len(orders)} queued orders, {pickers} pickers, "
+                          f"{options['screens']} queue screens, {options['duration']:.0f}s")
+
+        with translation.override(settings.LANGUAGE_CODE):
+            self.paths = {
+                'claim': lambda order_id: reverse('queue_claim_order', args=[order_id]),
+                'product-pick': reverse('product-pick'),
+                'complete-picklist': reverse('complete-picklist'),
+                **{name: reverse(name) for name in QUEUE_SCREENS},
+            }
+        sessions = [self._create_session(profile.user, device) for device in devices[:pickers]]
+        try:
+            samples, completed = asyncio.run(self._load(url, sessions, devices[:pickers], orders, options))
+        finally:
+            for session in sessions:
+                session.delete()
+
+        self.stdout.write('')
+        self.stdout.write(f"{'endpoint':<24} {'requests':>9} {'errors':>7} {'req/s':>8} "
+                          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for endpoint, values in samples.items():
+            latencies = sorted(ms for ms, ok in values if ok)
+            errors = sum(1 for _, ok in values if not ok)
+            if len(latencies) > 1:
+                percentiles = statistics.quantiles(latencies, n=100)
+                p50, p95, p99 = percentiles[49], percentiles[94], percentiles[98]
+            else:
+                p50 = p95 = p99 = latencies[0] if latencies else 0
+            self.stdout.write(f"{endpoint:<24} {len(values):>9} {errors:>7} "
+                              f"{len(latencies) / options['duration']:>8.1f} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f}")
+        self.stdout.write(f"Completed {completed} pick lists ({completed * 60 / options['duration']:.1f}/min).")
+
+    def _create_session(self, user, device):
+        # As django.contrib.auth.login() stores it, plus the device the picker views fall back to
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session['device_fingerprint'] = device.device_fingerprint
+        session.create()
+        return session
+
+    def _connect(self, url, session):
+        # Any 32 character secret passes the CSRF check when the cookie and header match
+        csrf = secrets.token_hex(16)
+        return _Connection(url.hostname, url.port or 80, {
+            'Host': url.netloc,
+            'Cookie': f'{settings.SESSION_COOKIE_NAME}={session.session_key}; {settings.CSRF_COOKIE_NAME}={csrf}',
+            'X-CSRFToken': csrf,
+        })
+
+    async def _load(self, url, sessions, devices, orders, options):
+        samples = {name: [] for name in ['claim', 'product-pick', 'complete-picklist', *QUEUE_SCREENS]}
+        deadline = time.monotonic() + options['duration']
+        queue = iter(orders)
+        completed = 0
+
+        async def call(connection, endpoint, method, path, payload=None):
+            start = time.perf_counter()
+            try:
+                status, body = await asyncio.wait_for(connection.request(method, path, payload), options['timeout'])
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+                connection.close()
+                status, body = None, b''
+            samples[endpoint].append(((time.perf_counter() - start) * 1000, status == 200))
+            return body if status == 200 else None
+
+        async def think(rng):
+            if options['think_time']:
+                await asyncio.sleep(rng.expovariate(1 / options['think_time']))
+
+        async def picker(number, session, device):
+            nonlocal completed
+            rng = random.Random(number)
+            connection = self._connect(url, session)
+            fingerprint = device.device_fingerprint
+            while time.monotonic() < deadline:
+                order_id = next(queue, None)
+                if order_id is None:
+                    break
+                body = await call(connection, 'claim', 'POST', self.paths['claim'](order_id),
+                                  {'deviceFingerprint': fingerprint})
+                if body is None:
+                    continue
+                claim = json.loads(body)
+                for code in claim['picklist']:
+                    if time.monotonic() >= deadline:
+                        break
+                    await think(rng)
+                    await call(connection, 'product-pick', 'POST', self.paths['product-pick'], {
+                        'orderID': claim['order_code'], 'productCode': code, 'deviceFingerprint': fingerprint,
+                        'successful': True, 'timeTakenMs': rng.randint(4000, 25000),
+                    })
+                else:
+                    if await call(connection, 'complete-picklist', 'POST', self.paths['complete-picklist'],
+                                  {'orderID': claim['order_code'], 'deviceFingerprint': fingerprint}) is not None:
+                        completed += 1
+            connection.close()
+
+        async def screen(number, session):
+            connection = self._connect(url, session)
+            name = QUEUE_SCREENS[number % len(QUEUE_SCREENS)]
+            while time.monotonic() < deadline:
+                await call(connection, name, 'GET', self.paths[name])
+                await asyncio.sleep(min(options['screen_interval'], max(deadline - time.monotonic(), 0)))
+            connection.close()
+
+        await asyncio.gather(
+            *(picker(number, session, device) for number, (session, device) in enumerate(zip(sessions, devices))),
+            *(screen(number, sessions[number % len(sessions)]) for number in range(options['screens'])),
+        )
+        return samples, completed
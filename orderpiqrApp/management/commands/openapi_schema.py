@@ -0,0 +1,49 @@
+import difflib
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import translation
+from drf_spectacular.renderers import OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+
+SCHEMA_FILE = os.path.join(settings.BASE_DIR, 'docs', 'openapi.yaml')
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the OpenAPI schema to docs/openapi.yaml, or with --check fail when the committed "
+        "file no longer matches the code (run it in CI after changing a view or serializer). "
+        "The schema is the same on every database backend (see api.schema.AutoSchema)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help="Compare with the committed schema instead of writing it.")
+        parser.add_argument('--file', default=SCHEMA_FILE, help="Schema file to write or check.")
+
+    def handle(self, *args, **options):
+        generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+        # The committed schema is the English one, like /api/schema/ without ?lang=
+        with translation.override('en'):
+            schema = generator.get_schema(request=None, public=True)
+        output = OpenApiYamlRenderer().render(schema, renderer_context={}).decode()
+
+        if not options['check']:
+            with open(options['file'], 'w', encoding='utf-8') as f:
+                f.write(output)
+            self.stdout.write(self.style.SUCCESS(f"Schema written to {options['file']}."))
+            return
+
+        try:
+            with open(options['file'], encoding='utf-8') as f:
+                committed = f.read()
+        except FileNotFoundError:
+            raise CommandError(f"{options['file']} does not exist, run `manage.py openapi_schema` first.")
+
+        if committed != output:
+            diff = difflib.unified_diff(committed.splitlines(keepends=True), output.splitlines(keepends=True),
+                                        fromfile='committed', tofile='generated', n=2)
+            self.stdout.write(''.join(list(diff)[:200]))
+            raise CommandError("The OpenAPI schema is out of date, run `manage.py openapi_schema` and commit it.")
+        self.stdout.write(self.style.SUCCESS("The committed OpenAPI schema is up to date."))
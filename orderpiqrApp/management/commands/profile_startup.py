@@ -0,0 +1,132 @@
+import json
+import re
+import statistics
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(output):
+    """
+    Build the import tree from `-X importtime` output.
+
+    Python prints a module after the modules it imported, indented two spaces per level, so
+    the children of a module are the deeper lines that came right before it. Returns the
+    top-level nodes: dicts with name, self_us, total_us and children.
+    """
+    pending = {}
+    for line in output.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        self_us, total_us, indent, name = match.groups()
+        level = len(indent) // 2
+        node = {
+            'name': name,
+            'self_us': int(self_us),
+            'total_us': int(total_us),
+            'children': pending.pop(level + 1, []),
+        }
+        pending.setdefault(level, []).append(node)
+    return pending.get(0, [])
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile a cold start: start the app in a fresh interpreter the way gunicorn does, time "
+        "the first request and print the per-module import time and memory as a tree."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/login/', help="URL of the first request.")
+        parser.add_argument('--runs', type=int, default=3,
+                            help="Cold starts to run; the median time to first request is reported.")
+        parser.add_argument('--depth', type=int, default=4, help="Levels of the import tree to show.")
+        parser.add_argument('--min-ms', type=float, default=10.0,
+                            help="Hide modules whose cumulative import time is below this.")
+        parser.add_argument('--no-memory', action='store_true', help="Skip the (slower) memory profile.")
+        parser.add_argument('--budget-ms', type=float,
+                            help="Fail when the median time to first request exceeds this (for CI).")
+
+    def handle(self, *args, **options):
+        runs = [self._run(options['url'], importtime=True) for _ in range(max(options['runs'], 1))]
+        # The import tree of the median run
+        runs.sort(key=lambda run: run[0]['time_to_first_request_ms'])
+        result, stderr = runs[len(runs) // 2]
+        if result['status'] >= 400:
+            self.stderr.write(f"Warning: {options['url']} answered {result['status']}.")
+
+        memory = {}
+        if not options['no_memory']:
+            memory = self._run(options['url'], memory=True)[0].get('memory', {})
+
+        tree = parse_importtime(stderr)
+        self.stdout.write(f"{'module':<60} {'self ms':>9} {'total ms':>9} {'memory KiB':>11}")
+        for node in sorted(tree, key=lambda n: -n['total_us']):
+            self._write_node(node, memory, 0, options)
+
+        self.stdout.write('')
+        self._write_packages(tree)
+
+        ttfr = statistics.median(run[0]['time_to_first_request_ms'] for run in runs)
+        self.stdout.write('')
+        self.stdout.write(f"Modules loaded:         {result['modules']}")
+        if 'max_rss_kb' in result:
+            self.stdout.write(f"Peak RSS:               {result['max_rss_kb'] / 1024:.0f} MiB")
+        self.stdout.write(f"App setup (wsgi):       {result['setup_ms']:.0f} ms")
+        self.stdout.write(f"First request:          {result['first_request_ms']:.0f} ms")
+        if result['warm_request_ms'] is not None:
+            self.stdout.write(f"Warm request:           {result['warm_request_ms']:.1f} ms")
+        self.stdout.write(f"Time to first request:  {ttfr:.0f} ms (median of {len(runs)})")
+
+        budget = options['budget_ms']
+        if budget is not None:
+            if ttfr > budget:
+                raise CommandError(f"Time to first request {ttfr:.0f} ms exceeds the budget of {budget:.0f} ms.")
+            self.stdout.write(self.style.SUCCESS(f"Within the budget of {budget:.0f} ms."))
+
+    def _run(self, url, importtime=False, memory=False):
+        command = [sys.executable]
+        if importtime:
+            command += ['-X', 'importtime']
+        command += ['-m', 'orderpiqrApp.utils.startup_profile', '--url', url]
+        if memory:
+            command.append('--memory')
+        process = subprocess.run(command, capture_output=True, text=True)
+        lines = process.stdout.strip().splitlines()
+        if process.returncode != 0 or not lines:
+            raise CommandError(f"Startup failed:\n{process.stderr[-3000:]}")
+        return json.loads(lines[-1]), process.stderr
+
+    def _subtree_memory(self, node, memory):
+        return memory.get(node['name'], 0) + sum(self._subtree_memory(child, memory) for child in node['children'])
+
+    def _write_node(self, node, memory, level, options):
+        if node['total_us'] / 1000 < options['min_ms'] or level >= options['depth']:
+            return
+        name = f"{'  ' * level}{node['name']}"
+        memory_kib = f"{self._subtree_memory(node, memory) / 1024:.0f}" if memory else '-'
+        self.stdout.write(
+            f"{name:<60.60} {node['self_us'] / 1000:>9.1f} {node['total_us'] / 1000:>9.1f} {memory_kib:>11}"
+        )
+        for child in sorted(node['children'], key=lambda n: -n['total_us']):
+            self._write_node(child, memory, level + 1, options)
+
+    def _write_packages(self, tree):
+        """Import time per top-level package, wherever in the tree it was first imported."""
+        packages = {}
+
+        def visit(node):
+            package = node['name'].split('.')[0]
+            packages[package] = packages.get(package, 0) + node['self_us']
+            for child in node['children']:
+                visit(child)
+
+        for node in tree:
+            visit(node)
+        self.stdout.write("Slowest packages (self time of all their modules):")
+        for package, us in sorted(packages.items(), key=lambda item: -item[1])[:12]:
+            self.stdout.write(f"  {package:<30} {us / 1000:>8.1f} ms")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from orderpiqrApp.models import Device, PickList
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount Device.lists_picked from the pick lists. The count is adjusted when pick lists "
+        "are created, moved or deleted (see PickList.save); writes that bypass those, such as "
+        "bulk_create or raw SQL, make it drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only list the devices that drifted.")
+
+    def handle(self, *args, **options):
+        actual = Coalesce(Subquery(
+            PickList.objects.filter(device=OuterRef('pk')).order_by()
+            .values('device').annotate(count=Count('*')).values('count')
+        ), Value(0))
+        drifted = list(
+            Device.objects.annotate(actual=actual).exclude(lists_picked=F('actual'))
+            .values_list('pk', 'name', 'lists_picked', 'actual')
+        )
+        for device_id, name, stored, count in drifted:
+            self.stdout.write(f"Device {device_id} ({name}): {stored} -> {count}")
+
+        if drifted and not options['dry_run']:
+            # Recounted in the UPDATE itself, so pick lists created since the check are included
+            Device.objects.filter(pk__in=[row[0] for row in drifted]).update(lists_picked=actual)
+        verb = "drifted" if options['dry_run'] else "repaired"
+        self.stdout.write(self.style.SUCCESS(f"{len(drifted)} device(s) {verb}."))
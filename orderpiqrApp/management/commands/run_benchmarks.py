@@ -0,0 +1,293 @@
+import io
+import json
+import os
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone, translation
+
+from orderpiqrApp.models import (
+    Customer, CustomerSettingValue, Device, InventoryLog, Order, OrderLine, PickList, Product, ProductBarcode,
+    ProductPick, SettingDefinition, UserProfile,
+)
+from orderpiqrApp.utils.imports import import_orders, import_products
+from orderpiqrApp.utils.qr_pdf_generator import QRPDFGenerator
+from orderpiqrApp.views.main_views import get_customer_settings
+from orderpiqrApp.views.queue_views import get_queue_orders
+
+LINES_PER_ORDER = 5
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the core operations (the picker endpoints, the queue, the dashboard, QR PDFs, "
+        "imports, CSV exports and settings resolution) on generated data and compare them with "
+        "a stored JSON baseline. A benchmark regresses when its median time grows by more than "
+        "--threshold or it runs more queries; the command then fails. Baselines are stored per "
+        "database vendor in benchmarks/, so SQLite and PostgreSQL runs are compared separately; "
+        "record one with --save on the machine that compares against it. Runs inside a "
+        "transaction that is rolled back afterwards, so the database is left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=10, help="Timed rounds per benchmark, after a warm-up.")
+        parser.add_argument('--products', type=int, default=2000, help="Products in the catalog.")
+        parser.add_argument('--queue', type=int, default=100, help="Orders in the picking queue.")
+        parser.add_argument('--only', action='append', default=[], help="Only run this benchmark (repeatable).")
+        parser.add_argument('--baseline', default=None,
+                            help="Baseline file (default: benchmarks/baseline-<database vendor>.json).")
+        parser.add_argument('--save', action='store_true', help="Store the results as the new baseline.")
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help="Allowed growth of the median time before it counts as a regression.")
+
+    def handle(self, *args, **options):
+        benchmarks = self._benchmarks()
+        unknown = set(options['only']) - {name for name, _ in benchmarks}
+        if unknown:
+            raise CommandError(f"Unknown benchmark(s): {', '.join(sorted(unknown))}.")
+        benchmarks = [(name, method) for name, method in benchmarks if not options['only'] or name in options['only']]
+        rounds = max(options['rounds'], 1)
+        scale = {'products': options['products'], 'queue': max(options['queue'], rounds + 1)}
+        path = options['baseline'] or os.path.join(settings.BASE_DIR, 'benchmarks',
+                                                   f'baseline-{connection.vendor}.json')
+        baseline = None
+        if os.path.exists(path):
+            with open(path) as f:
+                baseline = json.load(f)
+            if baseline['scale'] != scale:
+                self.stderr.write(f"The baseline was recorded with {baseline['scale']}, this run uses {scale}.")
+
+        results = {}
+        with transaction.atomic(), translation.override(settings.LANGUAGE_CODE):
+            self._create_data(scale, rounds)
+            for name, method in benchmarks:
+                run = method()
+                results[name] = self._measure(run, rounds)
+            transaction.set_rollback(True)
+
+        regressions = self._report(results, baseline['results'] if baseline else {}, options['threshold'])
+        if options['save']:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            saved = dict(baseline['results']) if baseline and options['only'] else {}
+            saved.update(results)
+            with open(path, 'w') as f:
+                json.dump({'vendor': connection.vendor, 'recorded_at': timezone.now().isoformat(), 'scale': scale,
+                           'rounds': rounds, 'results': saved}, f, indent=2, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(f"Saved the baseline to {path}.")
+        elif regressions:
+            raise CommandError(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}.")
+
+    def _measure(self, run, rounds):
+        timings, queries = [], []
+        for index in range(rounds + 1):
+            count = 0
+
+            def count_queries(execute, sql, params, many, context):
+                nonlocal count
+                count += 1
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(count_queries):
+                start = time.perf_counter()
+                run(index)
+                elapsed = (time.perf_counter() - start) * 1000
+            # Round 0 warms up caches and lazy imports
+            if index:
+                timings.append(elapsed)
+                queries.append(count)
+        return {
+            'median_ms': round(statistics.median(timings), 3),
+            'min_ms': round(min(timings), 3),
+            'queries': int(statistics.median(queries)),
+        }
+
+    def _report(self, results, baseline, threshold):
+        regressions = []
+        self.stdout.write(f"{'benchmark':<28} {'median ms':>10} {'min ms':>9} {'queries':>8} "
+                          f"{'baseline':>10} {'change':>8}")
+        for name, result in results.items():
+            previous = baseline.get(name)
+            line = f"{name:<28} {result['median_ms']:>10.2f} {result['min_ms']:>9.2f} {result['queries']:>8}"
+            if previous:
+                change = result['median_ms'] / previous['median_ms'] - 1 if previous['median_ms'] else 0
+                line += f" {previous['median_ms']:>10.2f} {change:>+8.0%}"
+                if change > threshold or result['queries'] > previous['queries']:
+                    regressions.append(name)
+                    line = self.style.ERROR(f"{line}  regressed")
+            self.stdout.write(line)
+        return regressions
+
+    # Data
+
+    def _create_data(self, scale, rounds):
+        now = timezone.now()
+        self.customer = customer = Customer.objects.create(name='Benchmarks', description='')
+        self.user = user = User.objects.create_user('benchmarks', password=None)
+        user.groups.add(Group.objects.get_or_create(name='companyadmin')[0])
+        UserProfile.objects.create(user=user, customer=customer)
+        definition, _ = SettingDefinition.objects.get_or_create(
+            key='inventory_management_enabled',
+            defaults={'label': 'Inventory management', 'setting_type': SettingDefinition.SettingType.BOOLEAN},
+        )
+        CustomerSettingValue.objects.create(customer=customer, definition=definition, value='true')
+        self.device = device = Device.objects.create(user=user, customer=customer, device_fingerprint='benchmarks',
+                                                     name='Benchmarks', description='', last_login=now,
+                                                     lists_picked=0)
+
+        self.products = products = Product.objects.bulk_create([
+            Product(customer=customer, code=f'BENCH-{i:06d}', description=f'Benchmark product {i}',
+                    location=f'{chr(65 + i % 6)}-{i % 40:02d}-{i % 20:02d}-{i % 6}', inventory_quantity=10 ** 6)
+            for i in range(scale['products'])
+        ], batch_size=1000)
+        ProductBarcode.objects.bulk_create([
+            ProductBarcode(customer=customer, product=product, barcode=f'BENCH-EAN-{i:06d}')
+            for i, product in enumerate(products)
+        ], batch_size=1000)
+        InventoryLog.objects.bulk_create([
+            InventoryLog(product=product, user=user, old_quantity=0, new_quantity=product.inventory_quantity,
+                         change_type=InventoryLog.ChangeType.SET, reason=InventoryLog.Reason.STOCK_COUNT)
+            for product in products
+        ], batch_size=1000)
+
+        # The queue; the claim benchmark takes one order per round from its front
+        self.queued = self._create_orders('BENCH-QUEUE', scale['queue'], 'queued')
+        # One in-progress pick list per round with every unit picked, for complete-picklist
+        self.completable = self._create_orders('BENCH-DONE', rounds + 1, 'in_progress')
+        picklists = PickList.objects.bulk_create([
+            PickList(customer=customer, device=device, order=order, picklist_code=order.order_code,
+                     pick_started=True, updated_at=now)
+            for order in self.completable
+        ])
+        ProductPick.objects.bulk_create([
+            ProductPick(picklist=picklist, product=line.product, quantity=1, successful=True,
+                        time_taken=timedelta(seconds=10))
+            for picklist in picklists
+            for line in OrderLine.objects.filter(order=picklist.order).select_related('product')
+            for _ in range(line.quantity)
+        ], batch_size=1000)
+        # A pick list with a pending unit of the first product for every round, for product-pick
+        self.picking = PickList.objects.create(customer=customer, device=device, picklist_code='BENCH-PICKING',
+                                               pick_started=True, updated_at=now)
+        ProductPick.objects.bulk_create([
+            ProductPick(picklist=self.picking, product=products[0], quantity=1) for _ in range(rounds + 1)
+        ])
+        Device.objects.filter(pk=device.pk).update(lists_picked=len(picklists) + 1)
+
+        host = next((h for h in settings.ALLOWED_HOSTS if not h.startswith('.') and h != '*'), 'localhost')
+        self.client = Client(HTTP_HOST=host)
+        self.client.force_login(user)
+        session = self.client.session
+        session['device_fingerprint'] = device.device_fingerprint
+        session.save()
+
+    def _create_orders(self, prefix, count, status):
+        orders = Order.objects.bulk_create([
+            Order(customer=self.customer, order_code=f'{prefix}-{i:06d}', status=status,
+                  queue_position=i + 1 if status == 'queued' else None)
+            for i in range(count)
+        ])
+        OrderLine.objects.bulk_create([
+            OrderLine(order=order, product=self.products[(i * LINES_PER_ORDER + j) % len(self.products)],
+                      quantity=1 + j % 2)
+            for i, order in enumerate(orders)
+            for j in range(LINES_PER_ORDER)
+        ], batch_size=1000)
+        return orders
+
+    def _request(self, method, name, args=(), payload=None):
+        if method == 'GET':
+            response = self.client.get(reverse(name, args=args))
+        else:
+            response = self.client.post(reverse(name, args=args), json.dumps(payload),
+                                        content_type='application/json')
+        if response.status_code != 200:
+            raise CommandError(f"{method} {name} answered {response.status_code}: {response.content[:300]!r}")
+        # Streaming responses (exports) are only done once they are read
+        return b''.join(response) if response.streaming else response.content
+
+    # Benchmarks: each returns a function that runs round `index`
+
+    def _benchmarks(self):
+        return [
+            ('queue_claim_order', self.bench_queue_claim_order),
+            ('scan_picklist', self.bench_scan_picklist),
+            ('product_pick', self.bench_product_pick),
+            ('complete_picklist', self.bench_complete_picklist),
+            ('get_queue_orders', self.bench_get_queue_orders),
+            ('dashboard', self.bench_dashboard),
+            ('qr_pdf_generate_multiple', self.bench_qr_pdf),
+            ('import_products', self.bench_import_products),
+            ('import_orders', self.bench_import_orders),
+            ('export_products_csv', self.bench_export_products),
+            ('export_inventory_logs_csv', self.bench_export_inventory_logs),
+            ('get_customer_settings', self.bench_get_customer_settings),
+        ]
+
+    def bench_queue_claim_order(self):
+        return lambda index: self._request('POST', 'queue_claim_order', [self.queued[index].pk],
+                                           {'deviceFingerprint': self.device.device_fingerprint})
+
+    def bench_scan_picklist(self):
+        codes = [product.code for product in self.products[:LINES_PER_ORDER * 2]]
+        return lambda index: self._request('POST', 'scan-picklist', payload={
+            'orderID': f'BENCH-SCAN-{index:06d}', 'deviceFingerprint': self.device.device_fingerprint,
+            'picklist': codes,
+        })
+
+    def bench_product_pick(self):
+        return lambda index: self._request('POST', 'product-pick', payload={
+            'orderID': self.picking.picklist_code, 'productCode': self.products[0].code,
+            'deviceFingerprint': self.device.device_fingerprint, 'successful': True, 'timeTakenMs': 5000,
+        })
+
+    def bench_complete_picklist(self):
+        return lambda index: self._request('POST', 'complete-picklist', payload={
+            'orderID': self.completable[index].order_code, 'deviceFingerprint': self.device.device_fingerprint,
+        })
+
+    def bench_get_queue_orders(self):
+        return lambda index: list(get_queue_orders(self.customer, include_lines=True))
+
+    def bench_dashboard(self):
+        return lambda index: self._request('GET', 'manage_dashboard')
+
+    def bench_qr_pdf(self):
+        orders = Order.objects.filter(pk__in=[order.pk for order in self.queued[:50]]).order_by('pk')
+
+        def run(index):
+            filename = QRPDFGenerator().generate_multiple(orders)
+            os.remove(os.path.join(settings.MEDIA_ROOT, 'qr_pdfs', filename))
+        return run
+
+    def bench_import_products(self):
+        # Half updates of existing products, half new ones (new in the warm-up round only)
+        rows = ['code,description,location,active']
+        count = len(self.products)
+        rows += [f'BENCH-{i:06d},Imported product {i},Z-{i % 40:02d},true' for i in range(count // 2, count + count // 2)]
+        content = '\n'.join(rows).encode()
+        return lambda index: import_products(io.BytesIO(content), self.customer, filename='products.csv')
+
+    def bench_import_orders(self):
+        def run(index):
+            rows = ['order_code,product_code,quantity']
+            rows += [f'BENCH-IMPORT-{index}-{i:04d},{self.products[(i + j) % len(self.products)].code},{1 + j % 3}'
+                     for i in range(200) for j in range(LINES_PER_ORDER)]
+            import_orders(io.BytesIO('\n'.join(rows).encode()), self.customer, filename='orders.csv', queue=True)
+        return run
+
+    def bench_export_products(self):
+        return lambda index: self._request('GET', 'manage_products_export')
+
+    def bench_export_inventory_logs(self):
+        return lambda index: self._request('GET', 'manage_inventory_logs_export')
+
+    def bench_get_customer_settings(self):
+        return lambda index: get_customer_settings(self.customer)
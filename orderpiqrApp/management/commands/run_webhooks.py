@@ -0,0 +1,52 @@
+"""
+Webhook dispatcher.
+
+Sends pending webhook deliveries in batches per endpoint, from a pool of threads sharing
+kept-alive connections. Several `run_webhooks` processes can run side by side, since
+claiming uses SKIP LOCKED.
+"""
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Send pending webhook events to the customers' endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=settings.WEBHOOK_DISPATCH_THREADS,
+                            help="Number of requests to send in parallel.")
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Seconds to wait between polls when there is nothing to send.")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit when no deliveries are due instead of polling.")
+
+    def handle(self, *args, **options):
+        from orderpiqrApp.utils.webhooks import ConnectionPool, dispatch_webhooks
+
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        pool = ConnectionPool(timeout=settings.WEBHOOK_TIMEOUT_SECONDS)
+        executor = ThreadPoolExecutor(max_workers=max(1, options['threads']))
+        self.stdout.write("Dispatching webhooks")
+        try:
+            while not self.stopping:
+                sent = dispatch_webhooks(pool, executor)
+                if sent:
+                    self.stdout.write(f"Sent {sent} event(s)")
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll_interval'])
+        finally:
+            executor.shutdown(wait=True)
+            pool.close()
+            self.stdout.write("Webhook dispatcher stopped")
+
+    def _stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,99 @@
+"""
+Background job worker.
+
+Claims pending jobs from the database and runs them in a pool of processes. Several
+`run_workers` processes (or dynos) can run side by side, since claiming uses SKIP LOCKED.
+Expired job results, change feed events and webhook deliveries are cleaned up periodically.
+"""
+import multiprocessing
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+def _init_process():
+    # Worker processes are spawned, not forked, so they never share the parent's
+    # database connections and need their own Django setup.
+    import django
+    django.setup()
+
+
+def _run_job(job_id):
+    from orderpiqrApp.utils.jobs import run_job
+    try:
+        run_job(job_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Run background jobs (imports, QR PDF generation) in a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.JOB_WORKER_PROCESSES,
+                            help="Number of jobs to run in parallel.")
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds to wait between polls when there is no work.")
+        parser.add_argument('--cleanup-interval', type=int, default=3600,
+                            help="Seconds between cleanups of expired job results.")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit when no pending jobs are left instead of polling.")
+
+    def handle(self, *args, **options):
+        from orderpiqrApp.utils.changes import prune_change_events
+        from orderpiqrApp.utils.jobs import claim_jobs, cleanup_jobs
+        from orderpiqrApp.utils.webhooks import prune_webhook_deliveries
+
+        processes = max(1, options['processes'])
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write(f"Starting {processes} worker process(es)")
+        connections.close_all()
+        pool = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_process,
+        )
+        running = set()
+        next_cleanup = 0
+
+        try:
+            while not self.stopping:
+                if time.monotonic() >= next_cleanup:
+                    stats = cleanup_jobs()
+                    stats['change_events'] = prune_change_events()
+                    stats['webhook_deliveries'] = prune_webhook_deliveries()
+                    if any(stats.values()):
+                        self.stdout.write(f"Cleanup: {stats}")
+                    next_cleanup = time.monotonic() + options['cleanup_interval']
+
+                for future in [future for future in running if future.done()]:
+                    running.discard(future)
+                    if future.exception():
+                        self.stderr.write(f"Worker process failed: {future.exception()}")
+                free = processes - len(running)
+                job_ids = claim_jobs(free) if free else []
+                for job_id in job_ids:
+                    self.stdout.write(f"Running job {job_id}")
+                    running.add(pool.submit(_run_job, job_id))
+
+                if options['once'] and not job_ids and not running:
+                    break
+                if not job_ids:
+                    if running:
+                        wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    else:
+                        time.sleep(options['poll_interval'])
+        finally:
+            # Let running jobs finish; jobs killed anyway are failed by the cleanup timeout
+            pool.shutdown(wait=True)
+            self.stdout.write("Workers stopped")
+
+    def _stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,279 @@
+import itertools
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.models import APIRequestLog
+from orderpiqrApp.management.commands.benchmark_product_search import ITEMS, MATERIALS, SIZES
+from orderpiqrApp.models import (
+    Customer, CustomerSettingValue, Device, InventoryLog, Order, OrderLine, PickList, Product, ProductBarcode,
+    ProductPick, SettingDefinition, UserProfile,
+)
+
+ZONES = 'ABCDEF'
+# Share of the orders before the queued and in-progress ones that were cancelled instead of picked
+CANCELLED_SHARE = 0.02
+# Share of the picks that were reported as failed (wrong or missing product)
+FAILED_PICK_SHARE = 0.02
+MAX_LINES = 60
+
+
+@contextmanager
+def _explicit_timestamps(*models):
+    """Let bulk_create store the given created/updated times instead of now, for a history."""
+    fields = [field for model in models for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _ean13(number):
+    digits = f'{number:012d}'[-12:]
+    checksum = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits))
+    return f'{digits}{(10 - checksum % 10) % 10}'
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a generated warehouse history, to reproduce production scale "
+        "locally: customers with an admin user and scanning devices, products with zone-aisle-"
+        "rack-shelf locations and barcodes, orders with a skewed number of lines over popular "
+        "and rare products, their pick lists and picks, inventory logs and API request logs. "
+        "The newest orders of every customer are left queued for `manage.py loadtest_warehouse`. "
+        "Rows are written with bulk inserts in batches of --batch-size orders; --orders 1000000 "
+        "per customer gives about 15 million rows. Signals do not run, so no change feed "
+        "events or webhooks are created. Use a database you can throw away."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=1, help="Customers (warehouses) to create.")
+        parser.add_argument('--products', type=int, default=5000, help="Products per customer.")
+        parser.add_argument('--orders', type=int, default=20000, help="Orders per customer.")
+        parser.add_argument('--devices', type=int, default=20, help="Scanning devices per customer.")
+        parser.add_argument('--queued', type=int, default=500, help="Newest orders per customer left queued.")
+        parser.add_argument('--days', type=int, default=180, help="Days of history the orders span.")
+        parser.add_argument('--api-logs', type=int, default=2, help="API request logs per order.")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Orders per insert transaction.")
+        parser.add_argument('--prefix', default='SEED',
+                            help="Prefix of the generated codes and names; use another one to seed again.")
+        parser.add_argument('--password', default=None,
+                            help="Password of the generated admin users (<prefix>-admin-<n>); unusable without.")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed, for reproducible data.")
+
+    def handle(self, *args, **options):
+        if not connection.features.can_return_rows_from_bulk_insert:
+            raise CommandError(f"{connection.vendor} does not return the keys of bulk inserts; use PostgreSQL.")
+        prefix = options['prefix']
+        if Customer.objects.filter(name__startswith=f'{prefix} warehouse ').exists():
+            raise CommandError(f"Data with prefix {prefix!r} exists already; pass another --prefix.")
+
+        self.rng = random.Random(options['seed'])
+        self.rows = Counter()
+        start = time.perf_counter()
+        with _explicit_timestamps(Order, PickList, ProductPick, Product, ProductBarcode,
+                                  InventoryLog, APIRequestLog):
+            for number in range(1, options['customers'] + 1):
+                self._seed_customer(number, options)
+
+        elapsed = time.perf_counter() - start
+        total = sum(self.rows.values())
+        for model, count in sorted(self.rows.items()):
+            self.stdout.write(f"{model:<16} {count:>12}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {total} rows in {elapsed:.0f}s ({total / max(elapsed, 0.001):.0f} rows/s)."))
+
+    def _bulk_create(self, model, objects, batch_size=5000):
+        objects = model.objects.bulk_create(objects, batch_size=batch_size)
+        self.rows[model.__name__] += len(objects)
+        return objects
+
+    def _seed_customer(self, number, options):
+        prefix = options['prefix']
+        now = timezone.now()
+        history_start = now - timedelta(days=options['days'])
+
+        with transaction.atomic():
+            customer = Customer.objects.create(name=f'{prefix} warehouse {number}',
+                                               description="Generated by manage.py seed_warehouse")
+            user = User.objects.create_user(f'{prefix.lower()}-admin-{number}', password=options['password'])
+            user.groups.add(Group.objects.get_or_create(name='companyadmin')[0])
+            UserProfile.objects.create(user=user, customer=customer)
+            definition, _ = SettingDefinition.objects.get_or_create(
+                key='inventory_management_enabled',
+                defaults={'label': 'Inventory management', 'setting_type': SettingDefinition.SettingType.BOOLEAN},
+            )
+            CustomerSettingValue.objects.create(customer=customer, definition=definition, value='true')
+            devices = self._bulk_create(Device, [
+                Device(user=user, customer=customer, device_fingerprint=f'{prefix.lower()}-{number}-device-{i}',
+                       name=f'Scanner {i}', description="Generated by manage.py seed_warehouse",
+                       last_login=now, lists_picked=0)
+                for i in range(1, options['devices'] + 1)
+            ])
+            products, stock = self._create_products(customer, user, number, options, history_start)
+        self.stdout.write(f"{customer.name}: {len(products)} products")
+
+        # Popular products are picked far more often than the long tail (Zipf-like)
+        cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(products) + 1)))
+        ranked = products[:]
+        self.rng.shuffle(ranked)
+
+        order_count = options['orders']
+        queued = min(options['queued'], order_count)
+        in_progress = min(len(devices), max(order_count - queued, 0), 5)
+        span = (now - history_start).total_seconds()
+        picked = Counter()
+        for chunk_start in range(0, order_count, options['batch_size']):
+            chunk = range(chunk_start, min(chunk_start + options['batch_size'], order_count))
+            statuses = []
+            for i in chunk:
+                from_end = order_count - i
+                if from_end <= queued:
+                    statuses.append(('queued', queued - from_end + 1))
+                elif from_end <= queued + in_progress:
+                    statuses.append(('in_progress', None))
+                else:
+                    statuses.append(('cancelled' if self.rng.random() < CANCELLED_SHARE else 'completed', None))
+            created = [history_start + timedelta(seconds=span * i / order_count + self.rng.uniform(0, 60))
+                       for i in chunk]
+            with transaction.atomic():
+                self._create_orders(customer, user, devices, chunk, statuses, created, ranked, cum_weights,
+                                    stock, picked, options)
+            self.stdout.write(f"{customer.name}: {chunk.stop}/{order_count} orders")
+
+        with transaction.atomic():
+            for product in products:
+                product.inventory_quantity = stock[product.pk]
+            Product.objects.bulk_update(products, ['inventory_quantity'], batch_size=5000)
+            for device in devices:
+                Device.objects.filter(pk=device.pk).update(lists_picked=picked[device.pk])
+
+    def _create_products(self, customer, user, number, options, created):
+        rng = self.rng
+        products = self._bulk_create(Product, [
+            Product(
+                customer=customer,
+                code=f"{options['prefix']}-{number}-{i:07d}",
+                description=f'{rng.choice(MATERIALS)} {rng.choice(ITEMS)} {rng.choice(SIZES)}',
+                location=f'{rng.choice(ZONES)}-{rng.randint(1, 40):02d}-{rng.randint(1, 20):02d}-{rng.randint(1, 6)}',
+                inventory_quantity=0,
+                updated_at=created,
+            )
+            for i in range(options['products'])
+        ])
+        barcodes = []
+        for product in products:
+            barcodes.append(ProductBarcode(customer=customer, product=product, barcode=_ean13(product.pk * 10 + 1),
+                                           description='EAN', created_at=created, updated_at=created))
+            if rng.random() < 0.1:
+                barcodes.append(ProductBarcode(customer=customer, product=product,
+                                               barcode=_ean13(product.pk * 10 + 2), quantity=12,
+                                               description='Case of 12', created_at=created, updated_at=created))
+        self._bulk_create(ProductBarcode, barcodes)
+
+        # The opening stock count of every product
+        stock = {product.pk: rng.randint(20, 500) for product in products}
+        self._bulk_create(InventoryLog, [
+            InventoryLog(product=product, user=user, old_quantity=0, new_quantity=stock[product.pk],
+                         change_type=InventoryLog.ChangeType.SET, reason=InventoryLog.Reason.STOCK_COUNT,
+                         created_at=created)
+            for product in products
+        ])
+        return products, stock
+
+    def _order_lines(self, ranked, cum_weights):
+        rng = self.rng
+        # Most orders have one to three lines, a few have dozens
+        line_count = min(MAX_LINES, len(ranked), max(1, int(rng.lognormvariate(0.7, 0.9))))
+        products = {}
+        while len(products) < line_count:
+            product = rng.choices(ranked, cum_weights=cum_weights)[0]
+            roll = rng.random()
+            products[product.pk] = (product, 1 if roll < 0.8 else rng.randint(2, 3) if roll < 0.95 else rng.randint(4, 12))
+        return list(products.values())
+
+    def _create_orders(self, customer, user, devices, chunk, statuses, created, ranked, cum_weights, stock, picked,
+                       options):
+        # Everything is generated first and inserted in dependency order, without updates:
+        # bulk_create sets the keys of the orders and pick lists the later rows point to
+        rng = self.rng
+        prefix, now = options['prefix'], timezone.now()
+        orders, lines, picklists, picks, logs, api_logs = [], [], [], [], [], []
+        for i, (status, position), when in zip(chunk, statuses, created):
+            order = Order(customer=customer, order_code=f'{prefix}-{customer.pk}-{i:08d}', status=status,
+                          queue_position=position, created_at=when, updated_at=when)
+            orders.append(order)
+            order_lines = self._order_lines(ranked, cum_weights)
+            lines.extend(OrderLine(order=order, product=product, quantity=quantity)
+                         for product, quantity in order_lines)
+            if status in ('completed', 'in_progress'):
+                self._pick_order(order, order_lines, user, rng.choice(devices), stock, now, picklists, picks, logs)
+                picked[picklists[-1].device_id] += 1
+
+            # The integration that pushes the order, then polls it
+            for call in range(options['api_logs']):
+                if call == 0:
+                    api_logs.append(APIRequestLog(user=user, method='POST', path='/api/orders/', status_code=201,
+                                                  payload={'order_code': order.order_code}, timestamp=when))
+                else:
+                    api_logs.append(APIRequestLog(user=user, method='GET', path='/api/orders/', status_code=200,
+                                                  timestamp=order.completed_at or when + timedelta(minutes=5 * call)))
+
+        self._bulk_create(Order, orders)
+        self._bulk_create(OrderLine, lines)
+        self._bulk_create(PickList, picklists)
+        self._bulk_create(ProductPick, picks)
+        self._bulk_create(InventoryLog, logs)
+        self._bulk_create(APIRequestLog, api_logs)
+
+    def _pick_order(self, order, order_lines, user, device, stock, now, picklists, picks, logs):
+        rng = self.rng
+        done = order.status == 'completed'
+        started = min(order.created_at + timedelta(minutes=rng.expovariate(1 / 90)), now)
+        picklist = PickList(customer=order.customer, order=order, picklist_code=order.order_code, device=device,
+                            pick_started=True, created_at=started, pick_time=started, updated_at=started)
+        picklists.append(picklist)
+
+        # One pick per unit, as the scan views create them; an order in progress is partly picked
+        units = [product for product, quantity in order_lines for _ in range(quantity)]
+        picked_units = len(units) if done else rng.randint(0, len(units))
+        when = started
+        for index, product in enumerate(units):
+            pick = ProductPick(picklist=picklist, product=product, quantity=1, updated_at=when)
+            if index < picked_units:
+                taken = timedelta(seconds=rng.uniform(4, 25))
+                when += taken
+                pick.time_taken, pick.updated_at = taken, when
+                pick.successful = rng.random() >= FAILED_PICK_SHARE
+                pick.notes = f"device={device.device_fingerprint}; scanned_at={when.isoformat()}"
+            picks.append(pick)
+        if not done:
+            return
+
+        picklist.successful, picklist.time_taken, picklist.updated_at = True, when - started, when
+        order.completed_at = order.updated_at = when
+        for product, quantity in order_lines:
+            old = stock[product.pk]
+            if old < quantity:
+                # Goods received just in time, so the stock never goes negative
+                logs.append(InventoryLog(product=product, user=user, old_quantity=old, new_quantity=old + 500,
+                                         change_type=InventoryLog.ChangeType.ADJUST,
+                                         reason=InventoryLog.Reason.RECEIVED, created_at=when))
+                old += 500
+            stock[product.pk] = old - quantity
+            logs.append(InventoryLog(product=product, user=user, device=device, old_quantity=old,
+                                     new_quantity=old - quantity, change_type=InventoryLog.ChangeType.ADJUST,
+                                     reason=InventoryLog.Reason.ORDER_PICKED, source_picklist=picklist,
+                                     created_at=when))
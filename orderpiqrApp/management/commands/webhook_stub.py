@@ -0,0 +1,69 @@
+"""
+A local webhook receiver for trying out and testing webhook delivery.
+
+Set WEBHOOK_ALLOW_PRIVATE_URLS=true (webhooks otherwise only go to public https URLs),
+point a webhook endpoint at http://localhost:<port>/ with the same secret, run
+`manage.py run_webhooks`, and every received batch is printed with the result of the
+signature check. `--fail-rate` makes the stub answer some batches with an error, to see
+retries and dead letters in action.
+"""
+import json
+import random
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from orderpiqrApp.utils.webhooks import SIGNATURE_HEADER, verify_signature
+
+
+class Command(BaseCommand):
+    help = "Run a local HTTP server that receives and prints webhook events."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--secret', default='',
+                            help="Endpoint secret, to verify the signatures. Not checked when empty.")
+        parser.add_argument('--fail-rate', type=float, default=0.0,
+                            help="Fraction of batches (0-1) to answer with HTTP 500.")
+
+    def handle(self, *args, **options):
+        command = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, as the dispatcher reuses its connections
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if options['secret'] and not verify_signature(
+                        options['secret'], self.headers.get(SIGNATURE_HEADER), body):
+                    command.stderr.write("Rejected batch: invalid signature")
+                    return self._respond(401, b'invalid signature')
+
+                events = json.loads(body).get('events', [])
+                if random.random() < options['fail_rate']:
+                    command.stdout.write(f"Failing batch of {len(events)} event(s)")
+                    return self._respond(500, b'simulated failure')
+
+                for event in events:
+                    command.stdout.write(f"{event['type']} {event['id']}: {json.dumps(event['data'])}")
+                self._respond(200, b'ok')
+
+            def _respond(self, status, text):
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/plain')
+                self.send_header('Content-Length', str(len(text)))
+                self.end_headers()
+                self.wfile.write(text)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', options['port']), Handler)
+        self.stdout.write(f"Receiving webhooks on http://127.0.0.1:{options['port']}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
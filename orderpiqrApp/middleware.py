@@ -0,0 +1,224 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.functional import SimpleLazyObject
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from orderpiqrApp.utils.query_patterns import QueryPatternDetector, RepeatedQueriesError, format_repeated_queries
+from orderpiqrApp.utils.request_metrics import QueryTimer, fingerprint_sql, observe_queries, request_metrics
+
+logger = logging.getLogger(__name__)
+
+# Bytes read per thread hop when streaming a file under ASGI
+ASGI_FILE_CHUNK_SIZE = 64 * 1024
+
+# Anything else is counted as 'OTHER', so clients cannot create new metric series
+METRIC_METHODS = frozenset(['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'])
+
+
+def _get_user_agent(request):
+    # Imported on first use: user_agents compiles its parser regexes at import, which
+    # adds about 200 ms to every cold start while only the picker page reads it
+    from django_user_agents.utils import get_user_agent
+    return get_user_agent(request)
+
+
+class LazyUserAgentMiddleware:
+    """
+    Same as django_user_agents' UserAgentMiddleware (sets `request.user_agent`), without
+    importing the user agent parser until a request actually reads it.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        # Returns the coroutine of an async get_response as it is
+        request.user_agent = SimpleLazyObject(lambda: _get_user_agent(request))
+        return self.get_response(request)
+
+
+async def _read_chunks(file, chunk_size):
+    read = sync_to_async(file.read, thread_sensitive=False)
+    while chunk := await read(chunk_size):
+        yield chunk
+
+
+class ASGIFileStreamingMiddleware:
+    """
+    Stream FileResponses chunk by chunk when running under ASGI (orderpiqr.asgi).
+
+    Django's ASGI handler cannot iterate a file asynchronously, so it reads the whole file
+    into memory before sending the first byte. This swaps the file iterator for an async
+    one that reads each chunk in a thread, which covers job downloads, batch QR PDFs and
+    the static files served by WhiteNoise. Under WSGI the response is left as it is.
+
+    Must come before WhiteNoiseMiddleware, so it sees the static file responses.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self._stream(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self._stream(request, await self.get_response(request))
+
+    def _stream(self, request, response):
+        file = getattr(response, 'file_to_stream', None)
+        if file is not None and isinstance(request, ASGIRequest) and not response.is_async:
+            # The file is still closed by the response (it was registered as a resource)
+            response.streaming_content = _read_chunks(file, max(response.block_size, ASGI_FILE_CHUNK_SIZE))
+        return response
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware that also runs natively under ASGI. WhiteNoise's own is sync only,
+    which makes Django run every request from there on in a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        # Only looks in the file index built at startup, unless WHITENOISE_AUTOREFRESH (DEBUG) is on
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class RequestMetricsMiddleware:
+    """
+    Measure every request: wall time, database queries and their time, the slowest query,
+    the response size and the view (see orderpiqrApp.utils.request_metrics).
+
+    First in MIDDLEWARE, so the time spent in the other middleware counts too. For streaming
+    responses (file downloads) the time to send the body is not included. Runs natively under
+    ASGI as well; the queries of async views, which run in sync_to_async threads, are counted.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with observe_queries(timer):
+            response = self.get_response(request)
+        return self._record(request, response, timer, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with observe_queries(timer):
+            response = await self.get_response(request)
+        return self._record(request, response, timer, time.perf_counter() - start)
+
+    def _record(self, request, response, timer, duration):
+        match = request.resolver_match
+        if match is not None:
+            view = match.view_name or match._func_path
+        else:
+            # Static files (WhiteNoise answers before URL resolution) and 404s
+            view = '<unresolved>'
+        if response.streaming:
+            response_bytes = int(response.get('Content-Length') or 0)
+        else:
+            response_bytes = len(response.content)
+
+        method = request.method if request.method in METRIC_METHODS else 'OTHER'
+        request_metrics.observe(view, method, response.status_code, duration, timer.duration, timer.count,
+                                response_bytes)
+
+        response['Server-Timing'] = (
+            f'app;dur={duration * 1000:.1f}, db;dur={timer.duration * 1000:.1f};desc="{timer.count} queries"'
+        )
+
+        if duration * 1000 >= settings.SLOW_REQUEST_MS:
+            logger.warning(
+                "Slow request: %s %s (%s) took %.0f ms, %d queries in %.0f ms, %d bytes; slowest query "
+                "%.0f ms: %s",
+                request.method, request.path, view, duration * 1000, timer.count, timer.duration * 1000,
+                response_bytes, timer.slowest_duration * 1000,
+                fingerprint_sql(timer.slowest_sql) if timer.slowest_sql else '-',
+            )
+        return response
+
+
+class QueryPatternMiddleware:
+    """
+    Report requests that run the same query shape QUERY_PATTERN_THRESHOLD times or more
+    (see orderpiqrApp.utils.query_patterns): logged with QUERY_PATTERN_MODE = 'log', an
+    error with 'raise'. Not loaded at all when the mode is 'off', the default.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if settings.QUERY_PATTERN_MODE not in ('log', 'raise'):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        detector = QueryPatternDetector()
+        with observe_queries(detector):
+            response = self.get_response(request)
+        return self._report(request, response, detector)
+
+    async def __acall__(self, request):
+        detector = QueryPatternDetector()
+        with observe_queries(detector):
+            response = await self.get_response(request)
+        return self._report(request, response, detector)
+
+    def _report(self, request, response, detector):
+        repeated = detector.repeated()
+        if repeated:
+            report = format_repeated_queries(f"{request.method} {request.path}", repeated)
+            if settings.QUERY_PATTERN_MODE == 'raise':
+                raise RepeatedQueriesError(report)
+            logger.warning(report)
+        return response
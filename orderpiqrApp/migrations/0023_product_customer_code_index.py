@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-19 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orderpiqrApp', '0022_add_orderpicking_setting'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['customer', 'code'], name='product_customer_code_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2 on 2026-10-19 11:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orderpiqrApp', '0023_product_customer_code_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('job_id', models.AutoField(primary_key=True, serialize=False)),
+                ('job_type', models.CharField(choices=[('product_import', 'Product Import'), ('order_import', 'Order Import'), ('qr_pdf', 'QR PDF')], max_length=30, verbose_name='Job Type')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='Status')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='Parameters')),
+                ('input_file', models.FileField(blank=True, upload_to='jobs/input/', verbose_name='Input File')),
+                ('progress', models.PositiveIntegerField(default=0, help_text='Number of items processed.', verbose_name='Progress')),
+                ('total', models.PositiveIntegerField(blank=True, help_text='Number of items to process, if known.', null=True, verbose_name='Total')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Result')),
+                ('result_file', models.FileField(blank=True, upload_to='jobs/results/', verbose_name='Result File')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started At')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('customer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='orderpiqrApp.customer', verbose_name='Customer')),
+            ],
+            options={
+                'verbose_name': 'Job',
+                'verbose_name_plural': 'Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='job_status_created_idx')],
+            },
+        ),
+    ]
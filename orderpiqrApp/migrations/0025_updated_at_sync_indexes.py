@@ -0,0 +1,57 @@
+# Generated by Django 5.2 on 2026-10-19 12:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orderpiqrApp', '0024_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Updated At'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Updated At'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='productpick',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Updated At'),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='picklist',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Updated At'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', 'updated_at'], name='order_customer_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['customer', 'updated_at'], name='product_customer_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='picklist',
+            index=models.Index(fields=['customer', 'updated_at'], name='picklist_customer_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productpick',
+            index=models.Index(fields=['updated_at'], name='productpick_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorylog',
+            index=models.Index(fields=['created_at'], name='inventorylog_created_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-19 11:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orderpiqrApp', '0025_updated_at_sync_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('entity', models.CharField(choices=[('order', 'Order'), ('orderline', 'Order Line'), ('picklist', 'Pick List'), ('productpick', 'Product Pick'), ('product', 'Product'), ('inventorylog', 'Inventory Log')], max_length=20, verbose_name='Entity')),
+                ('object_id', models.BigIntegerField(verbose_name='Object ID')),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted')], max_length=10, verbose_name='Action')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('customer', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='orderpiqrApp.customer', verbose_name='Customer')),
+            ],
+            options={
+                'verbose_name': 'Change Event',
+                'verbose_name_plural': 'Change Events',
+                'ordering': ['seq'],
+                'indexes': [models.Index(fields=['customer', 'seq'], name='change_customer_seq_idx'), models.Index(fields=['created_at'], name='change_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2 on 2026-10-19 11:49
+
+import django.db.models.deletion
+import django.utils.timezone
+import orderpiqrApp.models.webhooks
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orderpiqrApp', '0026_change_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEndpoint',
+            fields=[
+                ('endpoint_id', models.AutoField(primary_key=True, serialize=False)),
+                ('url', models.URLField(max_length=500, verbose_name='URL')),
+                ('secret', models.CharField(default=orderpiqrApp.models.webhooks.generate_webhook_secret, help_text='Used to sign the requests (HMAC-SHA256), so the receiver can verify them.', max_length=64, verbose_name='Secret')),
+                ('event_types', models.JSONField(blank=True, default=list, help_text='Events to send to this endpoint. Leave empty to send all events.', verbose_name='Event Types')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Active')),
+                ('description', models.CharField(blank=True, max_length=255, verbose_name='Description')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='orderpiqrApp.customer', verbose_name='Customer')),
+            ],
+            options={
+                'verbose_name': 'Webhook Endpoint',
+                'verbose_name_plural': 'Webhook Endpoints',
+                'ordering': ['endpoint_id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WebhookDelivery',
+            fields=[
+                ('delivery_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('event_id', models.UUIDField(default=uuid.uuid4, editable=False, verbose_name='Event ID')),
+                ('event_type', models.CharField(choices=[('order.completed', 'Order Completed'), ('picklist.completed', 'Pick List Completed'), ('inventory.changed', 'Inventory Changed'), ('queue.changed', 'Queue Changed')], max_length=30, verbose_name='Event Type')),
+                ('payload', models.JSONField(verbose_name='Payload')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('delivered', 'Delivered'), ('dead', 'Dead')], default='pending', max_length=20, verbose_name='Status')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Attempts')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Next Attempt At')),
+                ('response_status', models.PositiveIntegerField(blank=True, null=True, verbose_name='Response Status')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('delivered_at', models.DateTimeField(blank=True, null=True, verbose_name='Delivered At')),
+                ('endpoint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='orderpiqrApp.webhookendpoint', verbose_name='Endpoint')),
+            ],
+            options={
+                'verbose_name': 'Webhook Delivery',
+                'verbose_name_plural': 'Webhook Deliveries',
+                'ordering': ['delivery_id'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='webhook_status_next_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 12:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orderpiqrApp', '0027_webhooks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productpick',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Raised by every change, so clients can detect that another device changed the pick', verbose_name='Version'),
+        ),
+    ]
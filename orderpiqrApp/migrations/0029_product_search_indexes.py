@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# Trigram indexes on the expressions `icontains` compiles to on PostgreSQL,
+# UPPER("column"::text) LIKE UPPER('%term%'); see orderpiqrApp.utils.search
+SEARCH_INDEXES = {
+    'product_code_trgm_idx': 'code',
+    'product_description_trgm_idx': 'description',
+    'product_location_trgm_idx': 'location',
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, column in SEARCH_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON "orderpiqrApp_product" '
+            f'USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orderpiqrApp', '0028_productpick_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
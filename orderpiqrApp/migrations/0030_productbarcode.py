@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-19 12:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orderpiqrApp', '0029_product_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='job_type',
+            field=models.CharField(choices=[('product_import', 'Product Import'), ('order_import', 'Order Import'), ('barcode_import', 'Barcode Import'), ('qr_pdf', 'QR PDF')], max_length=30, verbose_name='Job Type'),
+        ),
+        migrations.CreateModel(
+            name='ProductBarcode',
+            fields=[
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+                ('barcode_id', models.AutoField(primary_key=True, serialize=False)),
+                ('barcode', models.CharField(max_length=255, verbose_name='Barcode')),
+                ('quantity', models.PositiveIntegerField(default=1, help_text='Number of product units one scan of this barcode counts as, e.g. 12 for a case.', verbose_name='Units per scan')),
+                ('description', models.CharField(blank=True, default='', max_length=255, verbose_name='Description')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='orderpiqrApp.customer', verbose_name='Customer')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='barcodes', to='orderpiqrApp.product', verbose_name='Product')),
+            ],
+            options={
+                'verbose_name': 'Product Barcode',
+                'verbose_name_plural': 'Product Barcodes',
+                'indexes': [models.Index(fields=['customer', 'updated_at'], name='barcode_customer_updated_idx')],
+                'unique_together': {('customer', 'barcode')},
+            },
+        ),
+    ]
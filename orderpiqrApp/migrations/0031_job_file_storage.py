@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-19 13:24
+
+import orderpiqrApp.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orderpiqrApp', '0030_productbarcode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Name')),
+                ('content', models.BinaryField(verbose_name='Content')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Size')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+            ],
+            options={
+                'verbose_name': 'Job File',
+                'verbose_name_plural': 'Job Files',
+            },
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='input_file',
+            field=models.FileField(blank=True, storage=orderpiqrApp.storage.job_storage, upload_to='jobs/input/', verbose_name='Input File'),
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='result_file',
+            field=models.FileField(blank=True, storage=orderpiqrApp.storage.job_storage, upload_to='jobs/results/', verbose_name='Result File'),
+        ),
+    ]
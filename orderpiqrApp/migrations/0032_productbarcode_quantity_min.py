@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 13:27
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orderpiqrApp', '0031_job_file_storage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='productbarcode',
+            name='quantity',
+            field=models.PositiveIntegerField(default=1, help_text='Number of product units one scan of this barcode counts as, e.g. 12 for a case.', validators=[django.core.validators.MinValueValidator(1)], verbose_name='Units per scan'),
+        ),
+    ]
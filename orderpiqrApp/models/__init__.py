@@ -1,3 +1,4 @@
+from .tracking import *
 from .customers import *
 from .products import *
 from .orders import *
@@ -6,3 +7,6 @@ from .devices import *
 from .preferences import *
 from .email_log import *
 from .inventory import *
+from .jobs import *
+from .changes import *
+from .webhooks import *
@@ -0,0 +1,48 @@
+from django.utils.translation import gettext_lazy as _
+from django.db import models
+
+from .customers import Customer
+
+
+class ChangeEvent(models.Model):
+    """
+    One create, update or delete of a synced object, read by integrations through
+    `GET /api/changes/?after=<seq>`. Written by orderpiqrApp.utils.changes.
+    """
+
+    class Entity(models.TextChoices):
+        ORDER = 'order', _('Order')
+        ORDER_LINE = 'orderline', _('Order Line')
+        PICKLIST = 'picklist', _('Pick List')
+        PRODUCT_PICK = 'productpick', _('Product Pick')
+        PRODUCT = 'product', _('Product')
+        INVENTORY_LOG = 'inventorylog', _('Inventory Log')
+
+    class Action(models.TextChoices):
+        CREATED = 'created', _('Created')
+        UPDATED = 'updated', _('Updated')
+        DELETED = 'deleted', _('Deleted')
+
+    seq = models.BigAutoField(primary_key=True)
+    customer = models.ForeignKey(
+        Customer,
+        on_delete=models.CASCADE,
+        db_index=False,  # Covered by change_customer_seq_idx
+        verbose_name=_("Customer")
+    )
+    entity = models.CharField(_("Entity"), max_length=20, choices=Entity.choices)
+    object_id = models.BigIntegerField(_("Object ID"))
+    action = models.CharField(_("Action"), max_length=10, choices=Action.choices)
+    created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Change Event")
+        verbose_name_plural = _("Change Events")
+        ordering = ['seq']
+        indexes = [
+            models.Index(fields=['customer', 'seq'], name='change_customer_seq_idx'),
+            models.Index(fields=['created_at'], name='change_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.seq} {self.entity} {self.object_id} {self.action}"
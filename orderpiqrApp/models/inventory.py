@@ -83,6 +83,9 @@ class InventoryLog(models.Model):
         verbose_name = _("Inventory Log")
         verbose_name_plural = _("Inventory Logs")
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='inventorylog_created_idx'),
+        ]
 
     @property
     def quantity_change(self):
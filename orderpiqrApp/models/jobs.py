@@ -0,0 +1,100 @@
+from django.utils.translation import gettext_lazy as _
+from django.db import models
+from django.contrib.auth.models import User
+
+from orderpiqrApp.storage import job_storage
+
+from .customers import Customer
+
+
+class Job(models.Model):
+    """
+    A long-running task (import, PDF generation) executed by `manage.py run_workers`.
+    """
+
+    class JobType(models.TextChoices):
+        PRODUCT_IMPORT = 'product_import', _('Product Import')
+        ORDER_IMPORT = 'order_import', _('Order Import')
+        BARCODE_IMPORT = 'barcode_import', _('Barcode Import')
+        QR_PDF = 'qr_pdf', _('QR PDF')
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        RUNNING = 'running', _('Running')
+        COMPLETED = 'completed', _('Completed')
+        FAILED = 'failed', _('Failed')
+
+    job_id = models.AutoField(primary_key=True)
+    customer = models.ForeignKey(
+        Customer,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        verbose_name=_("Customer")
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_("Created By")
+    )
+    job_type = models.CharField(_("Job Type"), max_length=30, choices=JobType.choices)
+    status = models.CharField(
+        _("Status"),
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    params = models.JSONField(_("Parameters"), default=dict, blank=True)
+    input_file = models.FileField(_("Input File"), upload_to='jobs/input/', storage=job_storage, blank=True)
+    progress = models.PositiveIntegerField(_("Progress"), default=0, help_text=_("Number of items processed."))
+    total = models.PositiveIntegerField(_("Total"), null=True, blank=True, help_text=_("Number of items to process, if known."))
+    result = models.JSONField(_("Result"), null=True, blank=True)
+    result_file = models.FileField(_("Result File"), upload_to='jobs/results/', storage=job_storage, blank=True)
+    error = models.TextField(_("Error"), blank=True)
+    created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
+    started_at = models.DateTimeField(_("Started At"), null=True, blank=True)
+    finished_at = models.DateTimeField(_("Finished At"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Job")
+        verbose_name_plural = _("Jobs")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='job_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_job_type_display()} #{self.job_id} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.Status.COMPLETED, self.Status.FAILED)
+
+    @property
+    def percentage(self):
+        """Progress as 0-100, or None when the total is unknown."""
+        if self.status == self.Status.COMPLETED:
+            return 100
+        if not self.total:
+            return None
+        return min(100, int(self.progress * 100 / self.total))
+
+
+class JobFile(models.Model):
+    """
+    An input or result file of a job, stored by orderpiqrApp.storage.DatabaseStorage
+    (STORAGES['jobs']).
+    """
+    name = models.CharField(_("Name"), max_length=255, unique=True)
+    content = models.BinaryField(_("Content"))
+    size = models.PositiveBigIntegerField(_("Size"))
+    created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Job File")
+        verbose_name_plural = _("Job Files")
+
+    def __str__(self):
+        return self.name
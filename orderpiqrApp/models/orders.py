@@ -3,9 +3,10 @@ from django.db import models
 
 from .customers import Customer
 from .products import Product
+from .tracking import UpdateTrackedModel
 
 
-class Order(models.Model):
+class Order(UpdateTrackedModel):
     STATUS_CHOICES = [
         ('draft', _('Draft')),
         ('queued', _('Queued')),
@@ -41,6 +42,9 @@ class Order(models.Model):
         verbose_name = _("Order")
         verbose_name_plural = _("Orders")
         ordering = ['queue_position', 'created_at']
+        indexes = [
+            models.Index(fields=['customer', 'updated_at'], name='order_customer_updated_idx'),
+        ]
 
     def __str__(self):
         return self.order_code
@@ -1,19 +1,20 @@
 from django.utils.translation import gettext_lazy as _
 from django.db import models
+from django.db.models import F
 from .customers import Customer
 from .orders import Order
 from .devices import Device
 from .products import Product
+from .tracking import UpdateTrackedModel
 
 
-class PickList(models.Model):
+class PickList(UpdateTrackedModel):
     picklist_id = models.AutoField(primary_key=True)
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, verbose_name=_("Customer"))
     order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True, verbose_name=_("Source Order"))
     picklist_code = models.CharField(_("Picklist Code"), max_length=255, null=True, blank=True)
     device = models.ForeignKey(Device, on_delete=models.CASCADE, verbose_name=_("Device"))
     created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
-    updated_at = models.DateTimeField(_("Updated At"), auto_now_add=True)
     pick_started = models.BooleanField(_("Pick Started"), null=True, blank=True)
     pick_time = models.DateTimeField(_("Pick Time"), auto_now_add=True, null=True, blank=True)
     time_taken = models.DurationField(_("Time Taken"), null=True, blank=True)
@@ -24,12 +25,32 @@ class PickList(models.Model):
         verbose_name = _("Pick List")
         verbose_name_plural = _("Pick Lists")
         unique_together = ['picklist_code', 'customer']
+        indexes = [
+            models.Index(fields=['customer', 'updated_at'], name='picklist_customer_updated_idx'),
+        ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The device the row was loaded with, so save() can move the count when it changes
+        instance._loaded_device_id = instance.__dict__.get('device_id')
+        return instance
 
     def save(self, *args, **kwargs):
+        adding = self._state.adding
         super().save(*args, **kwargs)
-        self.device.lists_picked = self.device.picklist_set.count()
-        self.device.save()
+        # Device.lists_picked counts the device's pick lists. It is adjusted in place instead of
+        # recounted: a count grows with the device's history and this is the scanning write path.
+        # Deletes are counted in orderpiqrApp.signals; `manage.py repair_lists_picked` fixes drift.
+        update_fields = kwargs.get('update_fields')
+        if adding:
+            Device.objects.filter(pk=self.device_id).update(lists_picked=F('lists_picked') + 1)
+        elif update_fields is None or 'device' in update_fields or 'device_id' in update_fields:
+            loaded_device_id = getattr(self, '_loaded_device_id', None)
+            if loaded_device_id is not None and loaded_device_id != self.device_id:
+                Device.objects.filter(pk=loaded_device_id).update(lists_picked=F('lists_picked') - 1)
+                Device.objects.filter(pk=self.device_id).update(lists_picked=F('lists_picked') + 1)
+        self._loaded_device_id = self.device_id
 
     def __str__(self):
         return _("PickList %(id)s for Device %(device)s") % {
@@ -41,7 +62,7 @@ class PickList(models.Model):
 
 
 
-class ProductPick(models.Model):
+class ProductPick(UpdateTrackedModel):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, verbose_name=_("Product"))
     picklist = models.ForeignKey(PickList, related_name='products', on_delete=models.CASCADE,
                                  verbose_name=_("Pick List"))
@@ -49,10 +70,17 @@ class ProductPick(models.Model):
     time_taken = models.DurationField(_("Time Taken"), null=True, blank=True)
     successful = models.BooleanField(_("Successful"), null=True, blank=True)
     notes = models.TextField(_("Notes"), blank=True, null=True)
+    version = models.PositiveIntegerField(
+        _("Version"), default=1, editable=False,
+        help_text=_("Raised by every change, so clients can detect that another device changed the pick")
+    )
 
     class Meta:
         verbose_name = _("Product Pick")
         verbose_name_plural = _("Product Picks")
+        indexes = [
+            models.Index(fields=['updated_at'], name='productpick_updated_idx'),
+        ]
 
     def __str__(self):
         return _("Pick of %(product)s in PickList %(picklist_id)s") % {
@@ -60,3 +88,18 @@ class ProductPick(models.Model):
             "picklist_id": self.picklist.picklist_id
         }
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        # Raised in the UPDATE itself: two writers that loaded the same version must end up
+        # two versions further, or a client holding the first new version misses the second write
+        self.version = F('version') + 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'version' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'version']
+        super().save(*args, **kwargs)
+        # Deferred rather than refreshed: the new version is loaded on first access, so only
+        # the callers that return it (the API serializers) pay for the extra SELECT
+        del self.__dict__['version']
+
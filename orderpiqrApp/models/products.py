@@ -1,10 +1,12 @@
+from django.core.validators import MinValueValidator
 from django.utils.translation import gettext_lazy as _
 from django.db import models
 
 from .customers import Customer
+from .tracking import UpdateTrackedModel
 
 
-class Product(models.Model):
+class Product(UpdateTrackedModel):
     product_id = models.AutoField(primary_key=True)
     code = models.CharField(_("Product Code"), max_length=255)
     description = models.TextField(_("Description"))
@@ -20,6 +22,45 @@ class Product(models.Model):
     class Meta:
         verbose_name = _("Product")
         verbose_name_plural = _("Products")
+        indexes = [
+            models.Index(fields=['customer', 'code'], name='product_customer_code_idx'),
+            models.Index(fields=['customer', 'updated_at'], name='product_customer_updated_idx'),
+        ]
 
     def __str__(self):
         return self.description
+
+
+class ProductBarcode(UpdateTrackedModel):
+    """
+    An additional code that scans as a product, e.g. a supplier EAN/GTIN or the barcode of
+    an outer case. `quantity` is the number of units one scan of the barcode stands for.
+    """
+    barcode_id = models.AutoField(primary_key=True)
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, verbose_name=_("Customer"))
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='barcodes',
+        verbose_name=_("Product")
+    )
+    barcode = models.CharField(_("Barcode"), max_length=255)
+    quantity = models.PositiveIntegerField(
+        _("Units per scan"),
+        default=1,
+        validators=[MinValueValidator(1)],
+        help_text=_("Number of product units one scan of this barcode counts as, e.g. 12 for a case.")
+    )
+    description = models.CharField(_("Description"), max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Product Barcode")
+        verbose_name_plural = _("Product Barcodes")
+        unique_together = ['customer', 'barcode']
+        indexes = [
+            models.Index(fields=['customer', 'updated_at'], name='barcode_customer_updated_idx'),
+        ]
+
+    def __str__(self):
+        return self.barcode
@@ -0,0 +1,22 @@
+from django.utils.translation import gettext_lazy as _
+from django.db import models
+
+
+class UpdateTrackedModel(models.Model):
+    """
+    Abstract base for models that API clients sync incrementally (`?updated_since=`).
+
+    `updated_at` is also written by saves with `update_fields`. Queryset `update()` and
+    `bulk_update()` bypass it; use orderpiqrApp.utils.changes.update_tracked() or set
+    `updated_at` yourself.
+    """
+    updated_at = models.DateTimeField(_("Updated At"), auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'updated_at' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'updated_at']
+        super().save(*args, **kwargs)
@@ -0,0 +1,102 @@
+import secrets
+import uuid
+
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from django.db import models
+
+from .customers import Customer
+
+
+def generate_webhook_secret():
+    return secrets.token_hex(32)
+
+
+class WebhookEndpoint(models.Model):
+    """
+    A URL of a customer's system that receives webhook events, signed with `secret`.
+    """
+
+    class EventType(models.TextChoices):
+        ORDER_COMPLETED = 'order.completed', _('Order Completed')
+        PICKLIST_COMPLETED = 'picklist.completed', _('Pick List Completed')
+        INVENTORY_CHANGED = 'inventory.changed', _('Inventory Changed')
+        QUEUE_CHANGED = 'queue.changed', _('Queue Changed')
+
+    endpoint_id = models.AutoField(primary_key=True)
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, verbose_name=_("Customer"))
+    url = models.URLField(_("URL"), max_length=500)
+    secret = models.CharField(
+        _("Secret"),
+        max_length=64,
+        default=generate_webhook_secret,
+        help_text=_("Used to sign the requests (HMAC-SHA256), so the receiver can verify them.")
+    )
+    event_types = models.JSONField(
+        _("Event Types"),
+        default=list,
+        blank=True,
+        help_text=_("Events to send to this endpoint. Leave empty to send all events.")
+    )
+    is_active = models.BooleanField(_("Active"), default=True)
+    description = models.CharField(_("Description"), max_length=255, blank=True)
+    created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Webhook Endpoint")
+        verbose_name_plural = _("Webhook Endpoints")
+        ordering = ['endpoint_id']
+
+    def __str__(self):
+        return self.url
+
+    def wants(self, event_type):
+        return not self.event_types or event_type in self.event_types
+
+
+class WebhookDelivery(models.Model):
+    """
+    One event for one endpoint: the webhook outbox.
+
+    Rows are created in the same transaction as the change they describe, and sent by
+    `manage.py run_webhooks`. Deliveries that keep failing end up as dead letters.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        DELIVERED = 'delivered', _('Delivered')
+        DEAD = 'dead', _('Dead')
+
+    delivery_id = models.BigAutoField(primary_key=True)
+    endpoint = models.ForeignKey(
+        WebhookEndpoint,
+        on_delete=models.CASCADE,
+        related_name='deliveries',
+        verbose_name=_("Endpoint")
+    )
+    event_id = models.UUIDField(_("Event ID"), default=uuid.uuid4, editable=False)
+    event_type = models.CharField(_("Event Type"), max_length=30, choices=WebhookEndpoint.EventType.choices)
+    payload = models.JSONField(_("Payload"))
+    status = models.CharField(
+        _("Status"),
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    attempts = models.PositiveIntegerField(_("Attempts"), default=0)
+    next_attempt_at = models.DateTimeField(_("Next Attempt At"), default=timezone.now)
+    response_status = models.PositiveIntegerField(_("Response Status"), null=True, blank=True)
+    last_error = models.TextField(_("Last Error"), blank=True)
+    created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
+    delivered_at = models.DateTimeField(_("Delivered At"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Webhook Delivery")
+        verbose_name_plural = _("Webhook Deliveries")
+        ordering = ['delivery_id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='webhook_status_next_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} #{self.delivery_id} ({self.get_status_display()})"
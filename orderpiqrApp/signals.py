@@ -0,0 +1,53 @@
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+
+from orderpiqrApp.models import ChangeEvent, Device, PickList, Product, ProductBarcode
+from orderpiqrApp.utils.changes import TRACKED_MODELS, is_recording_manually, record_instance_change
+from orderpiqrApp.utils.product_index import BARCODE_INDEXED_FIELDS, INDEXED_FIELDS, invalidate_product_index
+from orderpiqrApp.utils.request_metrics import install_query_observer
+
+
+def record_save(sender, instance, created, raw=False, **kwargs):
+    if raw or is_recording_manually():
+        return
+    record_instance_change(instance, ChangeEvent.Action.CREATED if created else ChangeEvent.Action.UPDATED)
+
+
+def record_delete(sender, instance, **kwargs):
+    if is_recording_manually():
+        return
+    record_instance_change(instance, ChangeEvent.Action.DELETED)
+
+
+def connect_change_feed():
+    for model in TRACKED_MODELS:
+        post_save.connect(record_save, sender=model, dispatch_uid=f'change_feed_save_{model.__name__}')
+        post_delete.connect(record_delete, sender=model, dispatch_uid=f'change_feed_delete_{model.__name__}')
+
+
+def invalidate_product_codes(sender, instance, update_fields=None, **kwargs):
+    indexed_fields = BARCODE_INDEXED_FIELDS if sender is ProductBarcode else INDEXED_FIELDS
+    if update_fields is not None and not indexed_fields.intersection(update_fields):
+        return
+    invalidate_product_index(instance.customer_id)
+
+
+def connect_product_code_index():
+    post_save.connect(invalidate_product_codes, sender=Product, dispatch_uid='product_code_index_save')
+    post_delete.connect(invalidate_product_codes, sender=Product, dispatch_uid='product_code_index_delete')
+    post_save.connect(invalidate_product_codes, sender=ProductBarcode, dispatch_uid='barcode_code_index_save')
+    post_delete.connect(invalidate_product_codes, sender=ProductBarcode, dispatch_uid='barcode_code_index_delete')
+
+
+def uncount_picklist(sender, instance, **kwargs):
+    # Creating and moving a pick list is counted in PickList.save()
+    Device.objects.filter(pk=instance.device_id).update(lists_picked=F('lists_picked') - 1)
+
+
+def connect_device_pick_counts():
+    post_delete.connect(uncount_picklist, sender=PickList, dispatch_uid='device_lists_picked_delete')
+
+
+def connect_query_observers():
+    connection_created.connect(install_query_observer, dispatch_uid='request_query_observer')
@@ -107,17 +107,40 @@ function isPicklist(code) {
     return code.includes("\t") || code.includes(",") || code.includes(";");
 }
 
+// Barcode aliases (supplier EANs, case barcodes) -> {code, quantity}, built on first use
+let barcodeAliases = null;
+
+// Resolve a scanned code to a product code and the number of units the scan counts as.
+// Product codes win over aliases, the same as on the server.
+export function resolveScannedCode(code, productData) {
+    if (barcodeAliases === null) {
+        barcodeAliases = {};
+        const productCodes = new Set((productData || []).map(item => item.code));
+        for (const product of productData || []) {
+            for (const [barcode, quantity] of product.barcodes || []) {
+                if (!productCodes.has(barcode) && !(barcode in barcodeAliases)) {
+                    barcodeAliases[barcode] = {code: product.code, quantity};
+                }
+            }
+        }
+    }
+    return barcodeAliases[code] || {code, quantity: 1};
+}
+
 // Function to handle scanned product codes
 export function handleProductCode(code, currentPicklist, productData, isOrderImportant, currentOrderID) {
     try {
-        code = String(code).trim();
+        const scannedCode = String(code).trim();
+        const resolved = resolveScannedCode(scannedCode, productData);
+        code = resolved.code;
+        const units = resolved.quantity;
         if (isOrderImportant) {
             const firstProductCode = currentPicklist[0];
-            if (code === firstProductCode) {
-                // Correct scan, remove the first product from the list
-                currentPicklist.splice(0, 1);
+            if (code === firstProductCode && currentPicklist.slice(0, units).every(c => c === code)) {
+                // Correct scan, remove the first product(s) from the list
+                currentPicklist.splice(0, units);
                 updateScannedList(currentPicklist, productData); // Update the table after removing the first product
-                onSuccessfulPick(firstProductCode)
+                onSuccessfulPick(scannedCode)
 
                 const product = productData.find(item => item.code === firstProductCode);  // Match code in productData
                 showNotification(gettext("Scanned %(product)s").replace("%(product)s", product.description));
@@ -134,17 +157,23 @@ export function handleProductCode(code, currentPicklist, productData, isOrderImp
                 if (currentPicklist.length === 0) {
                     notifyPicklistCompleted(currentOrderID, csrfToken);  // <- you'll need to make csrfToken available
                 }
+            } else if (code === firstProductCode) {
+                showNotification(tooManyUnitsMessage(units, currentPicklist.filter(c => c === code).length), true);
             } else {
                 // Incorrect scan, show error notification
                 showNotification(gettext("Incorrect scan, please try again."), true);
             }
         } else {
-            const index = currentPicklist.indexOf(code);
-            if (index !== -1) {
-                // Valid scan, remove the product from the list
-                currentPicklist.splice(index, 1);
+            const openCount = currentPicklist.filter(c => c === code).length;
+            if (openCount > 0 && openCount < units) {
+                showNotification(tooManyUnitsMessage(units, openCount), true);
+            } else if (openCount > 0) {
+                // Valid scan, remove the product (or all units of a case) from the list
+                for (let i = 0; i < units; i++) {
+                    currentPicklist.splice(currentPicklist.indexOf(code), 1);
+                }
                 updateScannedList(currentPicklist, productData);  // Update the table after a valid scan
-                onSuccessfulPick(code);
+                onSuccessfulPick(scannedCode);
 
                 const product = productData.find(item => item.code === code);
                 showNotification(gettext("Scanned %(product)s").replace("%(product)s", product.description));
@@ -170,6 +199,12 @@ export function handleProductCode(code, currentPicklist, productData, isOrderImp
     }
 }
 
+function tooManyUnitsMessage(units, remaining) {
+    return gettext("This barcode counts as %(units)s units, but only %(remaining)s are left to pick.")
+        .replace("%(units)s", units)
+        .replace("%(remaining)s", remaining);
+}
+
 // camera_page.js
 export function onSuccessfulPick(scannedCode) {
     try {
@@ -0,0 +1,51 @@
+from io import BytesIO
+
+from django.core.files.base import File
+from django.core.files.storage import Storage, storages
+
+
+def job_storage():
+    """Storage of the job input and result files: STORAGES['jobs']."""
+    return storages['jobs']
+
+
+class DatabaseStorage(Storage):
+    """
+    Stores files in the database (JobFile), so every web and worker process sees the same
+    files without a shared disk; each dyno on Heroku has its own temporary one.
+
+    Files are read and written whole, which suits job uploads and results, not large media.
+    """
+
+    def _open(self, name, mode='rb'):
+        from orderpiqrApp.models import JobFile
+
+        content = JobFile.objects.filter(name=name).values_list('content', flat=True).first()
+        if content is None:
+            raise FileNotFoundError(f"No stored file named {name!r}")
+        return File(BytesIO(content), name=name)
+
+    def _save(self, name, content):
+        from orderpiqrApp.models import JobFile
+
+        data = b''.join(content.chunks())
+        JobFile.objects.create(name=name, content=data, size=len(data))
+        return name
+
+    def exists(self, name):
+        from orderpiqrApp.models import JobFile
+
+        return JobFile.objects.filter(name=name).exists()
+
+    def delete(self, name):
+        from orderpiqrApp.models import JobFile
+
+        JobFile.objects.filter(name=name).delete()
+
+    def size(self, name):
+        from orderpiqrApp.models import JobFile
+
+        size = JobFile.objects.filter(name=name).values_list('size', flat=True).first()
+        if size is None:
+            raise FileNotFoundError(f"No stored file named {name!r}")
+        return size
@@ -1,36 +1,35 @@
 import base64
-from io import BytesIO
 
-import qrcode
 from django import template
+from django.urls import reverse
+
+from orderpiqrApp.utils.qr import get_qr_image, order_qr_payload, payload_hash
 
 register = template.Library()
 
 
+@register.simple_tag
+def qr_code_url(order, fmt='svg'):
+    """
+    Return the URL of an order's QR code image ('svg' or 'png').
+
+    The URL contains a hash of the QR content, so it changes whenever the order does and
+    browsers can cache the image forever instead of receiving it again on every refresh.
+    Nothing is rendered here; the image view renders (and caches) it on first request.
+    """
+    return reverse('order_qr_image', kwargs={
+        'order_id': order.order_id,
+        'key': payload_hash(order_qr_payload(order)),
+        'fmt': fmt,
+    })
+
+
 @register.simple_tag
 def qr_code_base64(order):
     """
     Generate a QR code for an order and return it as a base64 data URL.
     The QR content matches the format used in the PDF generator.
+    Prefer `qr_code_url`, which lets the browser cache the image.
     """
-    lines = [order.order_code]
-    for line in order.lines.all():
-        lines.append(f"{line.quantity}\t{line.product.code}")
-    qr_content = "\n".join(lines)
-
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=2,
-    )
-    qr.add_data(qr_content)
-    qr.make(fit=True)
-
-    img = qr.make_image(fill_color="black", back_color="white")
-
-    buffer = BytesIO()
-    img.save(buffer, format='PNG')
-    img_str = base64.b64encode(buffer.getvalue()).decode()
-
-    return f"data:image/png;base64,{img_str}"
+    png = get_qr_image(order_qr_payload(order), fmt='png', style='screen')
+    return f"data:image/png;base64,{base64.b64encode(png).decode()}"
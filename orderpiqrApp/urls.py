@@ -19,6 +19,7 @@ from orderpiqrApp.views.main_views import *
 from orderpiqrApp.views.queue_views import (
     queue_display,
     queue_display_partial,
+    queue_order_qr,
     queue_picker,
     queue_picker_partial,
     queue_claim_order,
@@ -56,6 +57,9 @@ from orderpiqrApp.views.manage_views import (
     inventory_logs_export,
     inventory_add_correction,
     inventory_logs_bulk_delete,
+    job_detail,
+    job_status,
+    job_download,
 )
 from orderpiqrApp.views.inventory_views import (
     inventory_picker,
@@ -70,6 +74,7 @@ urlpatterns = [
     # Queue Display (Tablet/PC with QR codes)
     path('queue/display/', queue_display, name='queue_display'),
     path('queue/display/partial/', queue_display_partial, name='queue_display_partial'),
+    path('queue/qr/<int:order_id>/<slug:key>.<slug:fmt>', queue_order_qr, name='order_qr_image'),
 
     # Queue Picker (Mobile - tap to select)
     path('queue/', queue_picker, name='queue_picker'),
@@ -126,6 +131,11 @@ urlpatterns = [
     path('manage/inventory/correction/', inventory_add_correction, name='manage_inventory_add_correction'),
     path('manage/inventory/bulk-delete/', inventory_logs_bulk_delete, name='manage_inventory_bulk_delete'),
 
+    # Background Jobs
+    path('manage/jobs/<int:job_id>/', job_detail, name='manage_job_detail'),
+    path('manage/jobs/<int:job_id>/status/', job_status, name='manage_job_status'),
+    path('manage/jobs/<int:job_id>/download/', job_download, name='manage_job_download'),
+
     # Inventory Picker (Mobile)
     path('inventory/', inventory_picker, name='inventory_picker'),
     path('inventory/search/', inventory_product_search, name='inventory_search'),
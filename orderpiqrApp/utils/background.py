@@ -0,0 +1,49 @@
+"""
+Fire-and-forget database writes for the scanning hot paths.
+
+Some writes do not change what a scan answers, like the device heartbeat (`last_login`). The
+async picker views hand them to a small thread pool instead of waiting for them, so the
+response goes out after the writes that matter.
+
+A write handed off here runs after the response, in its own transaction. It is lost when the
+process is killed before it ran (a graceful shutdown waits for the pool), and a failure is
+logged, not reported to the scanner. Only use it for data that is fine to lose in that case.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    # Created on first use: with gunicorn's preload, threads started in the master would not
+    # exist in the forked workers
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.BACKGROUND_WRITE_THREADS,
+                                               thread_name_prefix='background-write')
+    return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background write %s failed", func.__name__)
+    finally:
+        # The pool threads are not request threads, so nothing else closes their connections
+        close_old_connections()
+
+
+def run_in_background(func, *args, **kwargs):
+    """Call `func(*args, **kwargs)` in a background thread, without waiting for it."""
+    _get_executor().submit(_run, func, args, kwargs)
@@ -0,0 +1,128 @@
+"""
+Change feed for integrations.
+
+Every create, update and delete of orders, order lines, pick lists, product picks,
+products and inventory logs is recorded as a ChangeEvent with a sequence number, so
+`GET /api/changes/?after=<seq>` returns exactly what changed since an integration's last
+poll. Model saves and deletes are recorded by the signal handlers in orderpiqrApp.signals;
+bulk operations (bulk_create, bulk_update, queryset update) record their own changes with
+`record_changes()`, inside `manual_change_recording()` so the handlers do not record
+them twice.
+
+Events are written when the surrounding transaction commits, while holding a lock on the
+customer row. A customer's events therefore become visible in sequence order: once a
+reader has seen sequence N, no event below N can still appear, even when a long import
+commits after a short request. The trade-off is that a process that dies between the
+commit and writing its events loses those events.
+"""
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from orderpiqrApp.models import (
+    ChangeEvent, Customer, InventoryLog, Order, OrderLine, PickList, Product, ProductPick,
+)
+from orderpiqrApp.utils.product_index import INDEXED_FIELDS, invalidate_product_index
+
+EVENT_BATCH_SIZE = 5000
+
+_state = threading.local()
+
+
+@lru_cache(maxsize=4096)
+def _parent_customer_id(model, pk):
+    # Orders, pick lists and products never move to another customer, so this is safe to cache
+    return model.objects.filter(pk=pk).values_list('customer_id', flat=True).first()
+
+
+def _customer_via(field_name):
+    """Resolve the customer through a foreign key, without loading the related object."""
+    def resolve(instance):
+        field = instance._meta.get_field(field_name)
+        if field.is_cached(instance):
+            return getattr(instance, field_name).customer_id
+        return _parent_customer_id(field.related_model, getattr(instance, field.attname))
+    return resolve
+
+
+# Model -> (entity, function returning the customer id of an instance)
+TRACKED_MODELS = {
+    Order: (ChangeEvent.Entity.ORDER, lambda order: order.customer_id),
+    OrderLine: (ChangeEvent.Entity.ORDER_LINE, _customer_via('order')),
+    PickList: (ChangeEvent.Entity.PICKLIST, lambda picklist: picklist.customer_id),
+    ProductPick: (ChangeEvent.Entity.PRODUCT_PICK, _customer_via('picklist')),
+    Product: (ChangeEvent.Entity.PRODUCT, lambda product: product.customer_id),
+    InventoryLog: (ChangeEvent.Entity.INVENTORY_LOG, _customer_via('product')),
+}
+
+
+@contextmanager
+def manual_change_recording():
+    """Mute the model signal handlers for code that records its own changes in bulk."""
+    previous = getattr(_state, 'manual', False)
+    _state.manual = True
+    try:
+        yield
+    finally:
+        _state.manual = previous
+
+
+def is_recording_manually():
+    return getattr(_state, 'manual', False)
+
+
+def record_changes(customer_id, entity, action, object_ids):
+    """Record that objects of `entity` were created, updated or deleted, once the transaction commits."""
+    events = [
+        ChangeEvent(customer_id=customer_id, entity=entity, action=action, object_id=object_id)
+        for object_id in object_ids
+    ]
+    if events:
+        transaction.on_commit(lambda: _write_events(customer_id, events))
+
+
+def record_instance_change(instance, action):
+    """Record a change of a single model instance; used by the signal handlers."""
+    entity, get_customer_id = TRACKED_MODELS[type(instance)]
+    customer_id = get_customer_id(instance)
+    if customer_id is not None:
+        record_changes(customer_id, entity, action, [instance.pk])
+
+
+def update_tracked(queryset, customer_id, **values):
+    """
+    `queryset.update(**values)` for a tracked model that also sets `updated_at` and
+    records the change events. Returns the number of updated rows.
+    """
+    entity, _ = TRACKED_MODELS[queryset.model]
+    with transaction.atomic():
+        ids = list(queryset.values_list('pk', flat=True))
+        if not ids:
+            return 0
+        updated = queryset.model.objects.filter(pk__in=ids).update(updated_at=timezone.now(), **values)
+        record_changes(customer_id, entity, ChangeEvent.Action.UPDATED, ids)
+        if queryset.model is Product and INDEXED_FIELDS.intersection(values):
+            invalidate_product_index(customer_id)
+    return updated
+
+
+def _write_events(customer_id, events):
+    with transaction.atomic():
+        # Serialises event writes per customer, so sequence numbers become visible in order
+        locked = Customer.objects.select_for_update(no_key=True).filter(pk=customer_id).exists()
+        if not locked:
+            # The customer was deleted, and its events with it
+            return
+        ChangeEvent.objects.bulk_create(events, batch_size=EVENT_BATCH_SIZE)
+
+
+def prune_change_events():
+    """Delete change events older than CHANGE_FEED_RETENTION_DAYS. Returns the number deleted."""
+    cutoff = timezone.now() - timedelta(days=settings.CHANGE_FEED_RETENTION_DAYS)
+    deleted, _ = ChangeEvent.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,807 @@
+"""
+Streaming CSV/XLSX import engine shared by the manage UI, the Django admin and the REST API.
+
+Rows are read lazily from the uploaded file, validated and written in chunks so
+memory stays bounded regardless of the file size. `bulk_create_orders()` writes orders
+posted to the bulk create API in the same batched way.
+"""
+import codecs
+import csv
+from collections import OrderedDict
+from itertools import islice
+
+from zipfile import BadZipFile
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from orderpiqrApp.models import ChangeEvent, Order, OrderLine, Product, ProductBarcode
+from orderpiqrApp.utils.changes import manual_change_recording, record_changes
+from orderpiqrApp.utils.order_lines import sync_order_lines
+from orderpiqrApp.utils.product_index import invalidate_product_index
+from orderpiqrApp.utils.webhooks import enqueue_queue_changed
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 500
+PRODUCT_CACHE_SIZE = 20000
+
+TRUE_VALUES = ['true', '1', 'yes', 'ja', 'actief']
+
+PRODUCT_REQUIRED_FIELDS = ('code', 'description')
+PRODUCT_UPDATE_FIELDS = ['description', 'location', 'active']
+
+BARCODE_REQUIRED_COLUMNS = ('barcode', 'product_code')
+BARCODE_UPDATE_FIELDS = ['product_id', 'quantity', 'description']
+
+ORDER_REQUIRED_COLUMNS = ('order_code', 'product_code')
+# Orders in these statuses have not been picked yet, so their lines may be replaced
+ORDER_EDITABLE_STATUSES = ('draft', 'queued')
+
+
+class ImportReport:
+    """Counters and row-level errors collected during an import."""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, row, message):
+        self.error_count += 1
+        # Keep the report bounded for very large files; the count stays exact
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row, 'message': str(message)})
+
+    @property
+    def has_errors(self):
+        return self.error_count > 0
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+
+class OrderImportReport(ImportReport):
+    """ImportReport for orders; created/updated count orders, lines counts order lines."""
+
+    def __init__(self):
+        super().__init__()
+        self.lines = 0
+        self.queued = 0
+
+    def as_dict(self):
+        data = super().as_dict()
+        data.update({'lines': self.lines, 'queued': self.queued})
+        return data
+
+
+class ProductCodeCache:
+    """
+    Bounded LRU map of product code -> product_id for a single customer.
+
+    Codes that are not cached are resolved with one `code__in` query per batch, so
+    popular products are looked up once per import instead of once per line.
+    Unknown codes are cached as None so they are not queried again either.
+    """
+
+    def __init__(self, customer, maxsize=PRODUCT_CACHE_SIZE):
+        self.customer = customer
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+
+    def resolve(self, codes):
+        """Return a dict mapping each code in `codes` to a product_id or None."""
+        result = {}
+        missing = []
+        for code in codes:
+            if code in self._cache:
+                self._cache.move_to_end(code)
+                result[code] = self._cache[code]
+            else:
+                missing.append(code)
+
+        if missing:
+            found = dict(
+                Product.objects.filter(customer=self.customer, code__in=missing)
+                .values_list('code', 'product_id')
+            )
+            for code in missing:
+                result[code] = found.get(code)
+                self._cache[code] = result[code]
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+        return result
+
+
+def normalize_header(value):
+    """Normalize a header cell, so 'Order Code' and 'order_code' match."""
+    if value is None:
+        return ''
+    return str(value).strip().lower().replace(' ', '_')
+
+
+def cell_to_str(value):
+    """Convert a CSV/XLSX cell to a stripped string (XLSX numbers come back as int/float)."""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _iter_csv(file):
+    reader = csv.reader(codecs.iterdecode(file, 'utf-8-sig'))
+    try:
+        header = next(reader, None)
+        if header is None:
+            return
+        yield [normalize_header(col) for col in header]
+        yield from reader
+    except (UnicodeDecodeError, csv.Error):
+        raise ValidationError(_('The file is not a valid UTF-8 CSV file.'))
+
+
+def _iter_xlsx(file):
+    # openpyxl takes ~100 ms to import and is only needed for XLSX uploads
+    import openpyxl
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    except (InvalidFileException, BadZipFile, KeyError):
+        raise ValidationError(_('The file is not a valid XLSX file.'))
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        yield [normalize_header(col) for col in header]
+        yield from rows
+    finally:
+        wb.close()
+
+
+def iter_import_rows(file, filename=None, required_columns=()):
+    """
+    Stream rows from an uploaded CSV or XLSX file.
+
+    Yields (row_number, row_dict) tuples, where row_number is the 1-based line in the
+    file (the header is row 1) and row_dict maps normalized header names to string values.
+    Completely empty rows are skipped.
+
+    Raises ValidationError for unsupported files or when a required column is missing.
+    """
+    filename = (filename or getattr(file, 'name', '') or '').lower()
+    if filename.endswith('.csv'):
+        rows = _iter_csv(file)
+    elif filename.endswith('.xlsx'):
+        rows = _iter_xlsx(file)
+    else:
+        raise ValidationError(_('Unsupported file format, only .csv and .xlsx are supported'))
+
+    header = next(rows, None)
+    if not header:
+        raise ValidationError(_('The file is empty.'))
+    for column in required_columns:
+        if column not in header:
+            raise ValidationError(_('Missing required column: "%(column)s"') % {'column': column})
+
+    for row_number, row in enumerate(rows, start=2):
+        values = [cell_to_str(cell) for cell in row]
+        if not any(values):
+            continue
+        yield row_number, dict(zip(header, values))
+
+
+def iter_chunks(iterable, size):
+    """Yield lists of at most `size` items from `iterable`."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def parse_bool(value, default=True):
+    if not value:
+        return default
+    return value.strip().lower() in TRUE_VALUES
+
+
+def _clean_product_row(row, required_fields):
+    """Return (cleaned_dict, error_message) for a single product row."""
+    for field in required_fields:
+        if not row.get(field):
+            return None, _('Missing value for "%(field)s"') % {'field': field}
+
+    for field in ('code', 'location'):
+        if len(row.get(field, '')) > Product._meta.get_field(field).max_length:
+            return None, _('Value for "%(field)s" is too long') % {'field': field}
+
+    return {
+        'code': row['code'],
+        'description': row['description'],
+        'location': row.get('location', ''),
+        'active': parse_bool(row.get('active')),
+    }, None
+
+
+def _write_product_chunk(chunk, customer, report):
+    """Diff one chunk against the database and write it with bulk operations."""
+    existing = {
+        p.code: p
+        for p in Product.objects.filter(customer=customer, code__in=chunk.keys())
+        .only('product_id', 'code', *PRODUCT_UPDATE_FIELDS)
+    }
+
+    to_create = []
+    to_update = []
+    for code, item in chunk.items():
+        product = existing.get(code)
+        if product is None:
+            to_create.append(Product(customer=customer, **item))
+            continue
+
+        if all(getattr(product, field) == item[field] for field in PRODUCT_UPDATE_FIELDS):
+            report.unchanged += 1
+            continue
+
+        for field in PRODUCT_UPDATE_FIELDS:
+            setattr(product, field, item[field])
+        product.updated_at = timezone.now()
+        to_update.append(product)
+
+    with transaction.atomic(), manual_change_recording():
+        if to_create:
+            Product.objects.bulk_create(to_create, batch_size=IMPORT_CHUNK_SIZE)
+            if any(product.pk is None for product in to_create):
+                # Backends without RETURNING support do not set primary keys on bulk_create
+                ids = dict(Product.objects.filter(customer=customer, code__in=[p.code for p in to_create])
+                           .values_list('code', 'product_id'))
+                for product in to_create:
+                    product.pk = ids[product.code]
+            record_changes(customer.pk, ChangeEvent.Entity.PRODUCT, ChangeEvent.Action.CREATED,
+                           [product.pk for product in to_create])
+        if to_update:
+            Product.objects.bulk_update(to_update, [*PRODUCT_UPDATE_FIELDS, 'updated_at'],
+                                        batch_size=IMPORT_CHUNK_SIZE)
+            record_changes(customer.pk, ChangeEvent.Entity.PRODUCT, ChangeEvent.Action.UPDATED,
+                           [product.pk for product in to_update])
+        if to_create or to_update:
+            invalidate_product_index(customer.pk)
+
+    report.created += len(to_create)
+    report.updated += len(to_update)
+
+
+def import_products(file, customer, filename=None, required_fields=PRODUCT_REQUIRED_FIELDS,
+                    chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """
+    Create or update products for a customer from a CSV or XLSX file.
+
+    Columns: code, description, location (optional), active (optional, default true).
+    Existing products are matched on code; rows with missing values are reported
+    and skipped while the rest of the file is imported.
+
+    Args:
+        progress: Optional callable, called with the number of rows read after each chunk.
+
+    Returns:
+        ImportReport
+    """
+    report = ImportReport()
+    rows_read = 0
+
+    rows_iter = iter_import_rows(file, filename, required_columns=('code', 'description'))
+    for rows in iter_chunks(rows_iter, chunk_size):
+        # Keyed by code so a code repeated within the chunk is written once (last row wins)
+        chunk = {}
+        for row_number, row in rows:
+            item, error = _clean_product_row(row, required_fields)
+            if error:
+                report.add_error(row_number, error)
+                continue
+            chunk[item['code']] = item
+
+        if chunk:
+            _write_product_chunk(chunk, customer, report)
+
+        rows_read += len(rows)
+        if progress:
+            progress(rows_read)
+
+    return report
+
+
+def _clean_barcode_row(row, product_ids):
+    """Return (cleaned_dict, error_message) for a single barcode row."""
+    for field in BARCODE_REQUIRED_COLUMNS:
+        if not row.get(field):
+            return None, _('Missing value for "%(field)s"') % {'field': field}
+
+    for field in ('barcode', 'description'):
+        if len(row.get(field, '')) > ProductBarcode._meta.get_field(field).max_length:
+            return None, _('Value for "%(field)s" is too long') % {'field': field}
+
+    quantity = row.get('quantity') or '1'
+    if not quantity.isdigit() or int(quantity) < 1:
+        return None, _('Invalid quantity for barcode "%(barcode)s"') % {'barcode': row['barcode']}
+
+    product_id = product_ids.get(row['product_code'])
+    if product_id is None:
+        return None, _('Unknown product code "%(code)s"') % {'code': row['product_code']}
+
+    return {
+        'barcode': row['barcode'],
+        'product_id': product_id,
+        'quantity': int(quantity),
+        'description': row.get('description', ''),
+    }, None
+
+
+def _write_barcode_chunk(chunk, customer, report):
+    """Diff one chunk of barcode -> (row_number, item) against the database and write it in bulk."""
+    # A barcode that is also a product code would never be resolved, the product code wins
+    for code in Product.objects.filter(customer=customer, code__in=chunk.keys()).values_list('code', flat=True):
+        row_number, _item = chunk.pop(code)
+        report.add_error(row_number, _('Barcode "%(barcode)s" is already a product code') % {'barcode': code})
+
+    existing = {
+        b.barcode: b
+        for b in ProductBarcode.objects.filter(customer=customer, barcode__in=chunk.keys())
+        .only('barcode_id', 'barcode', *BARCODE_UPDATE_FIELDS)
+    }
+
+    to_create = []
+    to_update = []
+    for barcode, (_row_number, item) in chunk.items():
+        alias = existing.get(barcode)
+        if alias is None:
+            to_create.append(ProductBarcode(customer=customer, **item))
+            continue
+
+        if all(getattr(alias, field) == item[field] for field in BARCODE_UPDATE_FIELDS):
+            report.unchanged += 1
+            continue
+
+        for field in BARCODE_UPDATE_FIELDS:
+            setattr(alias, field, item[field])
+        alias.updated_at = timezone.now()
+        to_update.append(alias)
+
+    with transaction.atomic():
+        if to_create:
+            ProductBarcode.objects.bulk_create(to_create, batch_size=IMPORT_CHUNK_SIZE)
+        if to_update:
+            ProductBarcode.objects.bulk_update(to_update, [*BARCODE_UPDATE_FIELDS, 'updated_at'],
+                                               batch_size=IMPORT_CHUNK_SIZE)
+        if to_create or to_update:
+            invalidate_product_index(customer.pk)
+
+    report.created += len(to_create)
+    report.updated += len(to_update)
+
+
+def import_barcodes(file, customer, filename=None, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """
+    Create or update barcode aliases (e.g. supplier EANs) for a customer from a CSV or XLSX file.
+
+    Columns: barcode, product_code, quantity (optional, units per scan, default 1) and
+    description (optional). Existing aliases are matched on barcode and moved to the given
+    product; rows with unknown product codes or invalid values are reported and skipped.
+
+    Args:
+        progress: Optional callable, called with the number of rows read after each chunk.
+
+    Returns:
+        ImportReport
+    """
+    report = ImportReport()
+    products = ProductCodeCache(customer)
+    rows_read = 0
+
+    rows_iter = iter_import_rows(file, filename, required_columns=BARCODE_REQUIRED_COLUMNS)
+    for rows in iter_chunks(rows_iter, chunk_size):
+        product_ids = products.resolve({row.get('product_code', '') for _row_number, row in rows})
+        # Keyed by barcode so a barcode repeated within the chunk is written once (last row wins)
+        chunk = {}
+        for row_number, row in rows:
+            item, error = _clean_barcode_row(row, product_ids)
+            if error:
+                report.add_error(row_number, error)
+                continue
+            chunk[item['barcode']] = (row_number, item)
+
+        if chunk:
+            _write_barcode_chunk(chunk, customer, report)
+
+        rows_read += len(rows)
+        if progress:
+            progress(rows_read)
+
+    return report
+
+
+def iter_order_groups(rows, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Group streamed rows by order_code into chunks of roughly `chunk_size` lines.
+
+    A chunk is only closed between two orders, so consecutive lines of one order
+    always end up in the same chunk. Yields dicts of order_code -> [(row_number, row)].
+    """
+    chunk = {}
+    line_count = 0
+    for row_number, row in rows:
+        order_code = row.get('order_code', '')
+        if line_count >= chunk_size and order_code not in chunk:
+            yield chunk
+            chunk = {}
+            line_count = 0
+        chunk.setdefault(order_code, []).append((row_number, row))
+        line_count += 1
+    if chunk:
+        yield chunk
+
+
+def _clean_order_lines(order_code, rows, product_ids, report):
+    """
+    Validate the rows of one order.
+
+    Returns (lines, notes) where lines is a list of (product_id, quantity), or
+    (None, None) when any row is invalid; every problem is added to the report.
+    """
+    lines = []
+    notes = ''
+    valid = True
+    max_length = Order._meta.get_field('order_code').max_length
+
+    for row_number, row in rows:
+        product_code = row.get('product_code', '')
+        quantity = row.get('quantity') or row.get('amount') or '1'
+
+        if not order_code:
+            error = _('Missing value for "%(field)s"') % {'field': 'order_code'}
+        elif len(order_code) > max_length:
+            error = _('Value for "%(field)s" is too long') % {'field': 'order_code'}
+        elif not product_code:
+            error = _('Missing value for "%(field)s"') % {'field': 'product_code'}
+        elif not quantity.isdigit() or int(quantity) < 1:
+            error = _('Invalid quantity for product code "%(code)s"') % {'code': product_code}
+        elif product_ids.get(product_code) is None:
+            error = _('Unknown product code "%(code)s"') % {'code': product_code}
+        else:
+            error = None
+
+        if error:
+            report.add_error(row_number, error)
+            valid = False
+            continue
+
+        lines.append((product_ids[product_code], int(quantity)))
+        notes = notes or row.get('notes', '')
+
+    if not valid:
+        return None, None
+    return lines, notes
+
+
+def _resolve_chunk_products(chunk, products):
+    return products.resolve({
+        row['product_code'] for rows in chunk.values() for row_number, row in rows if row.get('product_code')
+    })
+
+
+def _find_invalid_orders(rows, products, chunk_size, report):
+    """
+    Validate the lines of every order before anything is written.
+
+    When the file is not sorted by order_code the lines of one order are spread over
+    several chunks: an invalid line in a later chunk would otherwise come after the earlier
+    lines were written, and a replaced order would be synced with part of its lines.
+
+    Returns (invalid, last_chunks): the order codes with an invalid line (every problem is
+    added to the report), and the number of the last chunk of every order spread over
+    several chunks, so it can be written once with all its lines.
+    """
+    invalid = set()
+    # order_code -> number of the last chunk it appeared in
+    chunk_numbers = {}
+    split = set()
+    for number, chunk in enumerate(iter_order_groups(rows, chunk_size)):
+        product_ids = _resolve_chunk_products(chunk, products)
+        for order_code, order_rows in chunk.items():
+            if order_code in chunk_numbers:
+                split.add(order_code)
+            chunk_numbers[order_code] = number
+            if order_code in invalid:
+                report.add_error(order_rows[0][0], _(
+                    'Order "%(code)s" was skipped because of errors in earlier rows') % {'code': order_code})
+                continue
+            lines, _notes = _clean_order_lines(order_code, order_rows, product_ids, report)
+            if lines is None:
+                invalid.add(order_code)
+    return invalid, {order_code: chunk_numbers[order_code] for order_code in split - invalid}
+
+
+def _write_order_chunk(chunk, customer, products, invalid, report, replace_existing, queue):
+    """
+    Write one chunk of orders with bulk operations, skipping the `invalid` order codes.
+
+    Every order is in one chunk only, with all its lines (see import_orders()).
+    """
+    product_ids = _resolve_chunk_products(chunk, products)
+    existing = {
+        order.order_code: order
+        for order in Order.objects.filter(order_code__in=[code for code in chunk if code])
+        .only('order_id', 'order_code', 'customer_id', 'status', 'queue_position')
+    }
+
+    new_orders = []
+    replaced_orders = []
+    lines_by_code = {}
+
+    for order_code, rows in chunk.items():
+        if order_code in invalid:
+            # Reported by _find_invalid_orders()
+            continue
+
+        lines, notes = _clean_order_lines(order_code, rows, product_ids, report)
+        if lines is None:
+            continue
+
+        if order_code in existing:
+            order = existing[order_code]
+            first_row = rows[0][0]
+            if order.customer_id != customer.pk:
+                report.add_error(first_row, _('Order code "%(code)s" is already in use') % {'code': order_code})
+                continue
+            if not replace_existing:
+                report.add_error(first_row, _('Order "%(code)s" already exists') % {'code': order_code})
+                continue
+            if order.status not in ORDER_EDITABLE_STATUSES:
+                report.add_error(first_row, _('Order "%(code)s" is %(status)s and cannot be overwritten') % {
+                    'code': order_code, 'status': order.get_status_display()})
+                continue
+            replaced_orders.append(order)
+        else:
+            new_orders.append(Order(customer=customer, order_code=order_code, notes=notes, status='draft'))
+        lines_by_code[order_code] = lines
+
+    if not lines_by_code:
+        return
+
+    try:
+        queued = _store_orders(customer, new_orders, replaced_orders, lines_by_code, queue)
+    except IntegrityError:
+        # Another import or API request created some of the new order codes meanwhile;
+        # report those and write the rest of the chunk again
+        taken = set(Order.objects.filter(order_code__in=[order.order_code for order in new_orders])
+                    .values_list('order_code', flat=True))
+        if not taken:
+            raise
+        for order_code in taken:
+            report.add_error(chunk[order_code][0][0], _(
+                'Order "%(code)s" was created by another request at the same time') % {'code': order_code})
+        _write_order_chunk({code: rows for code, rows in chunk.items() if code not in taken}, customer, products,
+                           invalid, report, replace_existing, queue)
+        return
+
+    report.created += len(new_orders)
+    report.updated += len(replaced_orders)
+    report.queued += queued
+    report.lines += sum(len(lines) for lines in lines_by_code.values())
+
+
+def _store_orders(customer, new_orders, replaced_orders, lines_by_code, queue):
+    """Create the new orders and replace the lines of the replaced ones; returns the number queued."""
+    to_queue = []
+    with transaction.atomic(), manual_change_recording():
+        if queue:
+            to_queue = new_orders + [order for order in replaced_orders if order.status == 'draft']
+            if to_queue:
+                max_pos = Order.objects.filter(
+                    customer=customer, status__in=['queued', 'in_progress']
+                ).aggregate(max_pos=Max('queue_position'))['max_pos'] or 0
+                for position, order in enumerate(to_queue, start=max_pos + 1):
+                    order.status = 'queued'
+                    order.queue_position = position
+
+        if new_orders:
+            Order.objects.bulk_create(new_orders, batch_size=IMPORT_CHUNK_SIZE)
+            if any(order.pk is None for order in new_orders):
+                # Backends without RETURNING support do not set primary keys on bulk_create
+                ids = dict(Order.objects.filter(order_code__in=[o.order_code for o in new_orders])
+                           .values_list('order_code', 'order_id'))
+                for order in new_orders:
+                    order.pk = ids[order.order_code]
+            record_changes(customer.pk, ChangeEvent.Entity.ORDER, ChangeEvent.Action.CREATED,
+                           [order.pk for order in new_orders])
+
+        if replaced_orders:
+            # Lines of replaced orders are matched to their existing lines, so unchanged lines keep their IDs
+            sync_order_lines(customer.pk, {order.pk: lines_by_code[order.order_code] for order in replaced_orders})
+            now = timezone.now()
+            for order in replaced_orders:
+                order.updated_at = now
+            Order.objects.bulk_update(replaced_orders, ['status', 'queue_position', 'updated_at'])
+            record_changes(customer.pk, ChangeEvent.Entity.ORDER, ChangeEvent.Action.UPDATED,
+                           [order.pk for order in replaced_orders])
+
+        new_lines = OrderLine.objects.bulk_create([
+            OrderLine(order_id=order.pk, product_id=product_id, quantity=quantity)
+            for order in new_orders
+            for product_id, quantity in lines_by_code[order.order_code]
+        ], batch_size=IMPORT_CHUNK_SIZE)
+        # Backends without RETURNING support leave the line pks unset
+        record_changes(customer.pk, ChangeEvent.Entity.ORDER_LINE, ChangeEvent.Action.CREATED,
+                       [line.pk for line in new_lines if line.pk is not None])
+    return len(to_queue)
+
+
+def import_orders(file, customer, filename=None, replace_existing=False, queue=False,
+                  chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """
+    Create orders with their lines for a customer from a CSV or XLSX file.
+
+    Columns: order_code, product_code, quantity or amount (optional, default 1) and
+    notes (optional, taken from the first line of an order). Rows sharing an order_code
+    form one order. An order with any invalid line is skipped as a whole and every
+    invalid line is reported, while the rest of the file is imported.
+
+    The file is read twice, so it must be seekable: first every order is validated as
+    a whole, then the valid orders are written. An order whose lines are spread over the
+    file is held back until its last line, so it is written once with all its lines.
+
+    Args:
+        replace_existing: Replace the lines of existing draft/queued orders instead of
+            reporting them as duplicates.
+        queue: Add the imported draft orders to the end of the picking queue.
+        progress: Optional callable, called with the number of rows read after each chunk.
+
+    Returns:
+        OrderImportReport
+    """
+    report = OrderImportReport()
+    products = ProductCodeCache(customer)
+    rows_read = 0
+
+    rows = iter_import_rows(file, filename, required_columns=ORDER_REQUIRED_COLUMNS)
+    invalid, last_chunks = _find_invalid_orders(rows, products, chunk_size, report)
+
+    file.seek(0)
+    rows = iter_import_rows(file, filename, required_columns=ORDER_REQUIRED_COLUMNS)
+    # order_code -> rows read so far of an order spread over several chunks
+    pending = {}
+    for number, chunk in enumerate(iter_order_groups(rows, chunk_size)):
+        rows_read += sum(len(order_rows) for order_rows in chunk.values())
+        # Held back until the order's last chunk, which then gets all its rows
+        for order_code in [code for code in chunk if code in last_chunks]:
+            order_rows = pending.pop(order_code, []) + chunk.pop(order_code)
+            if number == last_chunks[order_code]:
+                chunk[order_code] = order_rows
+            else:
+                pending[order_code] = order_rows
+        _write_order_chunk(chunk, customer, products, invalid, report, replace_existing, queue)
+
+        if progress:
+            progress(rows_read)
+
+    return report
+
+
+def _values_in_chunks(queryset, field, values, *fields):
+    """Run `queryset.filter(<field>__in=...)` per chunk of `values`, yielding values_list rows."""
+    for chunk in iter_chunks(values, IMPORT_CHUNK_SIZE):
+        yield from queryset.filter(**{f'{field}__in': chunk}).values_list(*fields)
+
+
+def bulk_create_orders(customer, orders, queue=False, atomic=False):
+    """
+    Create many orders with their lines in one transaction, for the bulk create API.
+
+    `orders` is a list of (index, data) pairs, where data is validated by the API's
+    BulkOrderSerializer: order_code, notes and lines of {product or product_code, quantity}.
+    Products and existing order codes are checked with a few batched queries, and all
+    orders and all lines are inserted with one bulk_create each.
+
+    Args:
+        queue: Add the created orders to the end of the picking queue.
+        atomic: Create nothing when any order is invalid, instead of skipping invalid orders.
+
+    Returns:
+        (created orders, errors), where errors is a list of dicts with the index,
+        order_code and field errors of every invalid order.
+    """
+    lines_data = [line for index, data in orders for line in data['lines']]
+    products = Product.objects.filter(customer=customer)
+    product_ids_by_code = dict(_values_in_chunks(
+        products, 'code', {line['product_code'] for line in lines_data if 'product' not in line},
+        'code', 'product_id',
+    ))
+    known_product_ids = {product_id for product_id, in _values_in_chunks(
+        products, 'product_id', {line['product'] for line in lines_data if 'product' in line}, 'product_id',
+    )}
+    taken_codes = {order_code for order_code, in _values_in_chunks(
+        Order.objects.all(), 'order_code', {data['order_code'] for index, data in orders}, 'order_code',
+    )}
+
+    new_orders = []
+    new_lines = []
+    errors = []
+    seen_codes = set()
+
+    for index, data in orders:
+        order_code = data['order_code']
+        order_errors = {}
+        if order_code in taken_codes:
+            order_errors['order_code'] = [_('An order with this order code already exists.')]
+        elif order_code in seen_codes:
+            order_errors['order_code'] = [_('This order code appears more than once in the request.')]
+        seen_codes.add(order_code)
+
+        order = Order(customer=customer, order_code=order_code, notes=data.get('notes'), status='draft')
+        order_lines = []
+        line_errors = []
+        for line in data['lines']:
+            if 'product' in line:
+                product_id = line['product'] if line['product'] in known_product_ids else None
+            else:
+                product_id = product_ids_by_code.get(line['product_code'])
+            if product_id is None and 'product' in line:
+                line_errors.append({'product': [_('Unknown product ID %(id)s') % {'id': line['product']}]})
+            elif product_id is None:
+                line_errors.append({'product_code': [
+                    _('Unknown product code "%(code)s"') % {'code': line['product_code']}]})
+            else:
+                line_errors.append({})
+            order_lines.append(OrderLine(order=order, product_id=product_id, quantity=line['quantity']))
+        if any(line_errors):
+            order_errors['lines'] = line_errors
+
+        if order_errors:
+            errors.append({'index': index, 'order_code': order_code, 'errors': order_errors})
+        else:
+            new_orders.append(order)
+            new_lines.extend(order_lines)
+
+    if (atomic and errors) or not new_orders:
+        return [], errors
+
+    with transaction.atomic(), manual_change_recording():
+        if queue:
+            max_pos = Order.objects.filter(
+                customer=customer, status__in=['queued', 'in_progress']
+            ).aggregate(max_pos=Max('queue_position'))['max_pos'] or 0
+            for position, order in enumerate(new_orders, start=max_pos + 1):
+                order.status = 'queued'
+                order.queue_position = position
+
+        Order.objects.bulk_create(new_orders, batch_size=IMPORT_CHUNK_SIZE)
+        if any(order.pk is None for order in new_orders):
+            # Backends without RETURNING support do not set primary keys on bulk_create
+            ids = dict(_values_in_chunks(
+                Order.objects.all(), 'order_code', [order.order_code for order in new_orders],
+                'order_code', 'order_id',
+            ))
+            for order in new_orders:
+                order.pk = ids[order.order_code]
+        # The lines pick up their order_id from the now saved orders
+        OrderLine.objects.bulk_create(new_lines, batch_size=IMPORT_CHUNK_SIZE)
+
+        order_ids = [order.pk for order in new_orders]
+        record_changes(customer.pk, ChangeEvent.Entity.ORDER, ChangeEvent.Action.CREATED, order_ids)
+        record_changes(customer.pk, ChangeEvent.Entity.ORDER_LINE, ChangeEvent.Action.CREATED,
+                       [line.pk for line in new_lines if line.pk is not None])
+        if queue:
+            enqueue_queue_changed(customer.pk, 'added', order_ids)
+
+    return new_orders, errors
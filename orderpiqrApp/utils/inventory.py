@@ -2,6 +2,7 @@ from django.db import transaction
 from django.utils.translation import gettext as _
 
 from orderpiqrApp.models import Product, SettingDefinition, CustomerSettingValue, InventoryLog
+from orderpiqrApp.utils.webhooks import enqueue_inventory_changed
 
 
 def is_inventory_enabled(customer):
@@ -109,6 +110,7 @@ def modify_inventory(
         notes=notes,
         source_picklist=source_picklist
     )
+    enqueue_inventory_changed(log)
 
     return log
 
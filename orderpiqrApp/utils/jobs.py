@@ -0,0 +1,258 @@
+"""
+Database-backed background jobs.
+
+Heavy operations create a Job and return its id right away. `manage.py run_workers`
+claims pending jobs with SELECT ... FOR UPDATE SKIP LOCKED and runs them in a process
+pool. When JOB_WORKERS_ENABLED is off (e.g. local development) jobs run inline instead.
+"""
+import logging
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import File
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from orderpiqrApp.models import Job, JobFile, Order
+from orderpiqrApp.utils.imports import import_barcodes, import_orders, import_products
+
+logger = logging.getLogger(__name__)
+
+# Minimum number of seconds between two progress writes for a job
+PROGRESS_INTERVAL = 1.0
+
+JOB_HANDLERS = {}
+
+
+def job_handler(job_type):
+    """Register a function as the handler for a job type."""
+    def decorator(func):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return decorator
+
+
+class ProgressReporter:
+    """Callable passed to job handlers that writes progress, throttled to one UPDATE per interval."""
+
+    def __init__(self, job, interval=PROGRESS_INTERVAL):
+        self.job = job
+        self.interval = interval
+        self._last_write = 0
+
+    def __call__(self, done):
+        self.job.progress = done
+        now = time.monotonic()
+        if now - self._last_write < self.interval:
+            return
+        self._last_write = now
+        Job.objects.filter(pk=self.job.pk).update(progress=done)
+
+
+def enqueue_job(job_type, customer=None, user=None, params=None, input_file=None, total=None):
+    """
+    Create a pending job and return it.
+
+    Args:
+        job_type: One of Job.JobType.
+        input_file: Optional uploaded file, stored with the job for the worker to read.
+        total: Number of items to process, if known up front.
+
+    Returns:
+        Job, already finished when background workers are disabled.
+    """
+    job = Job(job_type=job_type, customer=customer, created_by=user, params=params or {}, total=total)
+    if not settings.JOB_WORKERS_ENABLED:
+        # Run inline on the upload itself; only a worker needs it stored
+        job.save()
+        run_job(job.pk, input_file=input_file)
+        job.refresh_from_db()
+        return job
+
+    if input_file is not None:
+        job.input_file.save(os.path.basename(input_file.name), input_file, save=False)
+    job.save()
+    return job
+
+
+def claim_jobs(limit):
+    """
+    Mark up to `limit` pending jobs as running and return their ids.
+
+    Rows locked by another worker are skipped, so several workers can poll at once.
+    """
+    with transaction.atomic():
+        job_ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.Status.PENDING)
+            .order_by('created_at')
+            .values_list('job_id', flat=True)[:limit]
+        )
+        if job_ids:
+            Job.objects.filter(pk__in=job_ids).update(status=Job.Status.RUNNING, started_at=timezone.now())
+    return job_ids
+
+
+def run_job(job_id, input_file=None):
+    """
+    Run a single job and store its outcome. Errors are recorded on the job, not raised.
+
+    `input_file` is the upload of a job run inline, read instead of the stored input file.
+    """
+    job = Job.objects.select_related('customer', 'created_by').get(pk=job_id)
+    if input_file is not None:
+        job.input_file = input_file
+    if job.status == Job.Status.PENDING:
+        job.status = Job.Status.RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+
+    try:
+        JOB_HANDLERS[job.job_type](job, ProgressReporter(job))
+        job.status = Job.Status.COMPLETED
+    except ValidationError as e:
+        job.status = Job.Status.FAILED
+        job.error = '; '.join(e.messages)
+    except Exception as e:
+        logger.exception("Job %s (%s) failed", job.pk, job.job_type)
+        job.status = Job.Status.FAILED
+        job.error = str(e)
+    finally:
+        if input_file is not None:
+            job.input_file = None
+        elif job.input_file:
+            job.input_file.delete(save=False)
+
+    job.finished_at = timezone.now()
+    # Only while still running: cleanup_jobs() may have failed the job as timed out meanwhile
+    updated = Job.objects.filter(pk=job.pk, status=Job.Status.RUNNING).update(
+        status=job.status,
+        progress=job.progress,
+        total=job.total,
+        result=job.result,
+        result_file=job.result_file.name or '',
+        input_file=job.input_file.name or '',
+        error=job.error,
+        finished_at=job.finished_at,
+    )
+    if not updated:
+        logger.warning("Job %s (%s) finished after it was marked as failed; its outcome is discarded",
+                       job.pk, job.job_type)
+        if job.result_file:
+            job.result_file.delete(save=False)
+        job.refresh_from_db()
+    return job
+
+
+def cleanup_jobs():
+    """
+    Remove expired job results and fail jobs whose worker disappeared.
+
+    Returns:
+        dict with the number of timed out jobs, deleted jobs and deleted loose PDF files.
+    """
+    now = timezone.now()
+    expire_before = now - timedelta(hours=settings.JOB_RESULT_TTL_HOURS)
+
+    timed_out = Job.objects.filter(
+        status=Job.Status.RUNNING,
+        started_at__lt=now - timedelta(minutes=settings.JOB_TIMEOUT_MINUTES),
+    ).update(status=Job.Status.FAILED, error='Timed out', finished_at=now)
+
+    expired = Job.objects.filter(finished_at__lt=expire_before)
+    for job in expired.only('job_id', 'input_file', 'result_file').iterator():
+        for field in (job.input_file, job.result_file):
+            if field:
+                field.delete(save=False)
+    deleted, _ = expired.delete()
+
+    # Files of jobs deleted otherwise, e.g. with their customer
+    JobFile.objects.filter(created_at__lt=expire_before).exclude(
+        name__in=Job.objects.values('input_file')
+    ).exclude(name__in=Job.objects.values('result_file')).delete()
+
+    # PDFs served by download_batch_qr_pdf are no longer deleted right after download
+    removed_files = 0
+    pdf_dir = os.path.join(settings.MEDIA_ROOT, 'qr_pdfs')
+    if os.path.isdir(pdf_dir):
+        for name in os.listdir(pdf_dir):
+            path = os.path.join(pdf_dir, name)
+            try:
+                if os.path.getmtime(path) < expire_before.timestamp():
+                    os.remove(path)
+                    removed_files += 1
+            except FileNotFoundError:
+                # Removed meanwhile, e.g. by a concurrent cleanup run
+                continue
+
+    return {'timed_out': timed_out, 'deleted': deleted, 'removed_files': removed_files}
+
+
+def jobs_for_user(user):
+    """Jobs the user may see: their own and those of their customer."""
+    if user.is_superuser:
+        return Job.objects.all()
+    visible = Q(created_by=user)
+    customer = getattr(getattr(user, 'userprofile', None), 'customer', None)
+    if customer:
+        visible |= Q(customer=customer)
+    return Job.objects.filter(visible)
+
+
+# ============================================
+# Job handlers
+# ============================================
+
+@job_handler(Job.JobType.PRODUCT_IMPORT)
+def run_product_import(job, progress):
+    kwargs = {}
+    if job.params.get('required_fields'):
+        kwargs['required_fields'] = tuple(job.params['required_fields'])
+
+    with job.input_file.open('rb') as file:
+        report = import_products(file, job.customer, filename=job.params.get('filename'), progress=progress,
+                                 **kwargs)
+    job.result = report.as_dict()
+
+
+@job_handler(Job.JobType.ORDER_IMPORT)
+def run_order_import(job, progress):
+    with job.input_file.open('rb') as file:
+        report = import_orders(
+            file,
+            job.customer,
+            filename=job.params.get('filename'),
+            replace_existing=job.params.get('replace_existing', False),
+            queue=job.params.get('queue', False),
+            progress=progress,
+        )
+    job.result = report.as_dict()
+
+
+@job_handler(Job.JobType.BARCODE_IMPORT)
+def run_barcode_import(job, progress):
+    with job.input_file.open('rb') as file:
+        report = import_barcodes(file, job.customer, filename=job.params.get('filename'), progress=progress)
+    job.result = report.as_dict()
+
+
+@job_handler(Job.JobType.QR_PDF)
+def run_qr_pdf(job, progress):
+    # reportlab and Pillow are only needed by this job, keep them out of the web process startup
+    from orderpiqrApp.utils.qr_pdf_generator import QRPDFGenerator
+
+    orders = Order.objects.filter(pk__in=job.params.get('order_ids', []))
+    if job.customer:
+        orders = orders.filter(customer=job.customer)
+
+    filename = QRPDFGenerator().generate_multiple(orders, progress=progress)
+    # Into the job storage, where the web process can read it
+    path = os.path.join(settings.MEDIA_ROOT, 'qr_pdfs', filename)
+    with open(path, 'rb') as pdf:
+        job.result_file.save(filename, File(pdf), save=False)
+    os.remove(path)
+    job.result = {'pages': job.progress}
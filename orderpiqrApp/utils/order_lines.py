@@ -0,0 +1,62 @@
+"""
+Replace the lines of orders without rewriting the lines that did not change.
+
+`sync_order_lines()` matches the incoming lines to the existing lines of each order by
+product. Matched lines keep their primary key and are only written when the quantity
+changed; the rest is one bulk_create and one delete. Integrations that stored order line
+IDs can keep using them after an edit, and the change feed gets one event per line that
+actually changed.
+"""
+from collections import defaultdict, deque
+
+from django.db import transaction
+
+from orderpiqrApp.models import ChangeEvent, OrderLine
+from orderpiqrApp.utils.changes import manual_change_recording, record_changes
+
+SYNC_BATCH_SIZE = 1000
+
+
+def sync_order_lines(customer_id, lines_by_order):
+    """
+    Make the lines of each order match `lines_by_order`, a mapping of order ID to a list of
+    (product_id, quantity) tuples.
+
+    A product that appears on several lines is matched line by line, in the order of the
+    existing primary keys. Returns the number of created, updated and deleted lines.
+    """
+    existing = defaultdict(deque)
+    for line in (OrderLine.objects.filter(order_id__in=list(lines_by_order))
+                 .only('id', 'order_id', 'product_id', 'quantity').order_by('pk')):
+        existing[(line.order_id, line.product_id)].append(line)
+
+    to_create = []
+    to_update = []
+    for order_id, lines in lines_by_order.items():
+        for product_id, quantity in lines:
+            matches = existing.get((order_id, product_id))
+            if not matches:
+                to_create.append(OrderLine(order_id=order_id, product_id=product_id, quantity=quantity))
+                continue
+            line = matches.popleft()
+            if line.quantity != quantity:
+                line.quantity = quantity
+                to_update.append(line)
+    to_delete = [line.pk for matches in existing.values() for line in matches]
+
+    with transaction.atomic(), manual_change_recording():
+        for start in range(0, len(to_delete), SYNC_BATCH_SIZE):
+            OrderLine.objects.filter(pk__in=to_delete[start:start + SYNC_BATCH_SIZE]).delete()
+        if to_update:
+            OrderLine.objects.bulk_update(to_update, ['quantity'], batch_size=SYNC_BATCH_SIZE)
+        if to_create:
+            OrderLine.objects.bulk_create(to_create, batch_size=SYNC_BATCH_SIZE)
+
+        record_changes(customer_id, ChangeEvent.Entity.ORDER_LINE, ChangeEvent.Action.DELETED, to_delete)
+        record_changes(customer_id, ChangeEvent.Entity.ORDER_LINE, ChangeEvent.Action.UPDATED,
+                       [line.pk for line in to_update])
+        # Backends without RETURNING support leave the line pks unset
+        record_changes(customer_id, ChangeEvent.Entity.ORDER_LINE, ChangeEvent.Action.CREATED,
+                       [line.pk for line in to_create if line.pk is not None])
+
+    return {'created': len(to_create), 'updated': len(to_update), 'deleted': len(to_delete)}
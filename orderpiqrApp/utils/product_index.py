@@ -0,0 +1,203 @@
+"""
+In-process product code index for the scanning hot paths.
+
+Scanners resolve a customer's product codes many times per minute. Instead of querying
+`(customer, code)` on every scan, each process keeps a map of code -> (product_id,
+location, active) per customer, loaded with one query on first use.
+
+Barcode aliases (ProductBarcode, e.g. supplier EANs or case barcodes) live in the same map,
+so a scan resolves with one lookup whether it is a product code or an alias. The entry
+carries the canonical product code and the number of units the scan counts as. When an
+alias equals a product code, the product code wins.
+
+Consistency:
+- Product and barcode saves and deletes (orderpiqrApp.signals), update_tracked() and the
+  product and barcode imports invalidate a customer's index when their transaction commits. Invalidating stores
+  a new version in the default cache; every lookup compares it with the version the local
+  index was built at. With a shared cache (CACHE_URL pointing at Redis or memcached) other
+  processes notice on their next lookup. With the default per-process cache they notice
+  after PRODUCT_CODE_INDEX_MAX_AGE seconds at the latest.
+- A code that is not in the index is looked up in the database, so products created in
+  another process can be scanned right away.
+- Without a shared cache an invalidation only reaches the other processes after the max age,
+  which is too late for scans that write picks. PRODUCT_CODE_INDEX_ENABLED is therefore off
+  by default unless CACHE_URL points at a shared cache; every lookup then queries the database.
+
+Memory is bounded by PRODUCT_CODE_INDEX_MAX_CODES per process: the least recently used
+customers are evicted first, and a customer with more products than that is not indexed at
+all (its lookups go to the database).
+"""
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from orderpiqrApp.models import Product, ProductBarcode
+
+# Saves that only touch other fields (e.g. inventory_quantity) leave the index valid
+INDEXED_FIELDS = frozenset(['code', 'location', 'active', 'customer'])
+BARCODE_INDEXED_FIELDS = frozenset(['barcode', 'product', 'quantity', 'customer'])
+
+
+class ProductCodeEntry(NamedTuple):
+    product_id: int
+    code: str
+    location: str
+    active: bool
+    # Units one scan counts as; 1 for product codes, the alias quantity for barcodes
+    quantity: int = 1
+
+
+class _CustomerIndex:
+    __slots__ = ('version', 'loaded_at', 'codes')
+
+    def __init__(self, version, codes):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        # None when the catalog is too large to index
+        self.codes = codes
+
+    @property
+    def size(self):
+        return len(self.codes) if self.codes is not None else 0
+
+
+def _version_key(customer_id):
+    return f'product_code_index:{customer_id}'
+
+
+def _entries(queryset):
+    """(code, entry) pairs, the lowest product ID first for codes that appear more than once."""
+    rows = queryset.order_by('pk').values_list('code', 'product_id', 'location', 'active')
+    for code, product_id, location, active in rows.iterator(chunk_size=5000):
+        yield code, ProductCodeEntry(product_id, code, sys.intern(location), active)
+
+
+def _barcode_entries(queryset):
+    """(barcode, entry) pairs for a ProductBarcode queryset, resolved to their product."""
+    rows = queryset.values_list('barcode', 'product_id', 'product__code', 'product__location',
+                                'product__active', 'quantity')
+    for barcode, product_id, code, location, active, quantity in rows.iterator(chunk_size=5000):
+        yield barcode, ProductCodeEntry(product_id, code, sys.intern(location), active, quantity)
+
+
+class ProductCodeIndex:
+    """Per-customer code maps with LRU eviction, shared by all threads of a process."""
+
+    def __init__(self, max_codes, max_age, enabled=True):
+        self.max_codes = max_codes
+        self.max_age = max_age
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._customers = OrderedDict()
+        self._size = 0
+
+    def lookup(self, customer_id, codes):
+        """Resolve codes to entries; unknown codes are left out of the result."""
+        codes = set(codes)
+        if not self.enabled:
+            return self._from_database(customer_id, codes)
+        index = self._get(customer_id)
+        if index.codes is None:
+            return self._from_database(customer_id, codes)
+
+        found = {code: index.codes[code] for code in codes if code in index.codes}
+        missing = codes - found.keys()
+        if missing:
+            # Possibly created after the index was loaded
+            created = self._from_database(customer_id, missing)
+            if created:
+                with self._lock:
+                    for code, entry in created.items():
+                        if code not in index.codes:
+                            index.codes[code] = entry
+                            if self._customers.get(customer_id) is index:
+                                self._size += 1
+                found.update(created)
+        return found
+
+    def invalidate(self, customer_id):
+        cache.set(_version_key(customer_id), uuid.uuid4().hex, None)
+        with self._lock:
+            self._discard(customer_id)
+
+    def clear(self):
+        with self._lock:
+            self._customers.clear()
+            self._size = 0
+
+    def _get(self, customer_id):
+        version = cache.get(_version_key(customer_id))
+        with self._lock:
+            index = self._customers.get(customer_id)
+            if index is not None:
+                if index.version == version and time.monotonic() - index.loaded_at < self.max_age:
+                    self._customers.move_to_end(customer_id)
+                    return index
+                self._discard(customer_id)
+
+        # Loaded outside the lock, so other customers' scans are not held up. The version was
+        # read before loading: an invalidation during the load makes the result stale right away.
+        index = self._load(customer_id, version)
+        with self._lock:
+            self._discard(customer_id)
+            self._customers[customer_id] = index
+            self._size += index.size
+            while self._size > self.max_codes and len(self._customers) > 1:
+                self._discard(next(iter(self._customers)))
+        return index
+
+    def _load(self, customer_id, version):
+        products = Product.objects.filter(customer_id=customer_id)
+        barcodes = ProductBarcode.objects.filter(customer_id=customer_id)
+        if products.count() + barcodes.count() > self.max_codes:
+            return _CustomerIndex(version, None)
+        codes = {}
+        for code, entry in _entries(products):
+            codes.setdefault(code, entry)
+        for barcode, entry in _barcode_entries(barcodes):
+            codes.setdefault(barcode, entry)
+        return _CustomerIndex(version, codes)
+
+    def _from_database(self, customer_id, codes):
+        found = {}
+        for code, entry in _entries(Product.objects.filter(customer_id=customer_id, code__in=codes)):
+            found.setdefault(code, entry)
+        aliases = codes - found.keys()
+        if aliases:
+            barcodes = ProductBarcode.objects.filter(customer_id=customer_id, barcode__in=aliases)
+            found.update(_barcode_entries(barcodes))
+        return found
+
+    def _discard(self, customer_id):
+        index = self._customers.pop(customer_id, None)
+        if index is not None:
+            self._size -= index.size
+
+
+product_code_index = ProductCodeIndex(
+    max_codes=settings.PRODUCT_CODE_INDEX_MAX_CODES,
+    max_age=settings.PRODUCT_CODE_INDEX_MAX_AGE,
+    enabled=settings.PRODUCT_CODE_INDEX_ENABLED,
+)
+
+
+def lookup_product(customer_id, code):
+    """The entry for one product code or barcode of a customer, or None if nothing matches."""
+    return product_code_index.lookup(customer_id, [code]).get(code)
+
+
+def lookup_products(customer_id, codes):
+    """Entries for several product codes or barcodes at once, as a dict keyed by the scanned code."""
+    return product_code_index.lookup(customer_id, codes)
+
+
+def invalidate_product_index(customer_id):
+    """Drop a customer's index in every process, once the current transaction commits."""
+    transaction.on_commit(lambda: product_code_index.invalidate(customer_id))
@@ -0,0 +1,172 @@
+"""
+QR code rendering for orders.
+
+Rendered images are cached by a hash of the QR content, so an order that did not change
+is never rendered twice: first in a small in-process LRU, then in the shared "qr" cache
+(point QR_CACHE_URL at Redis or a file cache to share it between processes). Large
+batches of cache misses are rendered in a process pool.
+"""
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import caches
+
+QR_CACHE_ALIAS = 'qr'
+QR_CACHE_PREFIX = 'qr:'
+
+QR_CONTENT_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+QR_STYLES = {
+    # Printed pick lists
+    'print': {},
+    # Queue display: low error correction and a narrow border keep the code small on screen
+    'screen': {'error_correction': 'L', 'border': 2},
+}
+
+# Entries kept in the in-process LRU; a QR image is a few KB
+MEMORY_CACHE_SIZE = 1000
+
+# Below this number of cache misses, starting worker processes costs more than it saves
+PARALLEL_RENDER_THRESHOLD = 200
+
+
+class _MemoryCache:
+    """A thread-safe LRU in front of the shared cache, saving round trips for hot codes."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+        return found
+
+    def set_many(self, data):
+        with self._lock:
+            for key, value in data.items():
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_memory_cache = _MemoryCache(MEMORY_CACHE_SIZE)
+
+
+def order_qr_payload(order):
+    """
+    The text encoded in an order's QR code: the order code followed by one
+    "<quantity>\\t<product code>" line per order line, as read by the scanner.
+
+    Lines are sorted by pk so the payload (and its hash) does not depend on how the
+    lines were fetched; prefetched lines are used as-is.
+    """
+    lines = [order.order_code]
+    for line in sorted(order.lines.all(), key=lambda line: line.pk):
+        lines.append(f"{line.quantity}\t{line.product.code}")
+    return "\n".join(lines)
+
+
+def payload_hash(payload):
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def render_qr(payload, fmt='png', style='print'):
+    """
+    Render `payload` as a QR code image in `fmt` ('png' or 'svg').
+
+    Runs in worker processes, so it must not use Django.
+    """
+    # Imported on first render rather than at startup (see `manage.py profile_startup`)
+    import qrcode
+    from qrcode.image.svg import SvgPathImage
+
+    options = dict(QR_STYLES[style])
+    if 'error_correction' in options:
+        options['error_correction'] = getattr(qrcode.constants, f"ERROR_CORRECT_{options['error_correction']}")
+    qr = qrcode.QRCode(**options)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    image = qr.make_image(image_factory=SvgPathImage if fmt == 'svg' else None)
+
+    buffer = BytesIO()
+    image.save(buffer)
+    return buffer.getvalue()
+
+
+def _render_many(payloads, fmt, style):
+    render = partial(render_qr, fmt=fmt, style=style)
+    processes = settings.QR_RENDER_PROCESSES or os.cpu_count() or 1
+    if processes == 1 or len(payloads) < PARALLEL_RENDER_THRESHOLD:
+        return [render(payload) for payload in payloads]
+
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return list(pool.map(render, payloads, chunksize=max(1, len(payloads) // (processes * 4))))
+
+
+def _cache_key(key, fmt, style):
+    return f"{QR_CACHE_PREFIX}{style}:{fmt}:{key}"
+
+
+def _get_cached(keys, fmt, style):
+    """Look up payload hashes in the in-process LRU, then in the shared cache."""
+    cache_keys = {_cache_key(key, fmt, style): key for key in keys}
+
+    found = _memory_cache.get_many(cache_keys)
+    missing = [cache_key for cache_key in cache_keys if cache_key not in found]
+    if missing:
+        shared = caches[QR_CACHE_ALIAS].get_many(missing)
+        _memory_cache.set_many(shared)
+        found.update(shared)
+
+    return {cache_keys[cache_key]: image for cache_key, image in found.items()}
+
+
+def get_cached_qr_image(key, fmt='png', style='print'):
+    """Return the cached image for payload hash `key`, or None when it is not cached."""
+    return _get_cached([key], fmt, style).get(key)
+
+
+def get_qr_images(payloads, fmt='png', style='print'):
+    """
+    Return a dict mapping payload hash -> image bytes for all `payloads`.
+
+    Cached codes are fetched in one cache round trip; the rest are rendered and cached.
+    """
+    by_hash = {payload_hash(payload): payload for payload in payloads}
+    images = _get_cached(by_hash, fmt, style)
+
+    missing = [key for key in by_hash if key not in images]
+    if missing:
+        rendered = dict(zip(missing, _render_many([by_hash[key] for key in missing], fmt, style)))
+        data = {_cache_key(key, fmt, style): image for key, image in rendered.items()}
+        caches[QR_CACHE_ALIAS].set_many(data)
+        _memory_cache.set_many(data)
+        images.update(rendered)
+
+    return images
+
+
+def get_qr_image(payload, fmt='png', style='print'):
+    """Return the (cached) image for a single payload."""
+    return get_qr_images([payload], fmt, style)[payload_hash(payload)]
@@ -1,4 +1,6 @@
-import qrcode
+from io import BytesIO
+
+from django.db.models import Prefetch
 from PIL import Image
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
@@ -6,75 +8,83 @@ from reportlab.lib.units import mm
 from reportlab.platypus import Table, TableStyle
 from reportlab.lib import colors
 from django.conf import settings
+import logging
 import os
 from django.utils.translation import gettext_lazy as _
 import uuid
-from django.templatetags.static import static
 from django.contrib.staticfiles import finders
 
+from orderpiqrApp.models import OrderLine
+from orderpiqrApp.utils.qr import get_qr_images, order_qr_payload, payload_hash
+
+logger = logging.getLogger(__name__)
+
+LOGO_STATIC_PATH = "orderpiqrApp/img/favicon.png"
+LOGO_FORM_NAME = "logo"
+
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgreen),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+])
+
 
 class QRPDFGenerator:
 
-    def generate_multiple(self, orders):
+    def generate_multiple(self, orders, progress=None):
+        """
+        Render one page per order into a single PDF in MEDIA_ROOT/qr_pdfs.
+
+        Lines and products are fetched with one extra query, QR codes come from the QR
+        cache (rendering misses in parallel) and the logo is drawn once as a form XObject
+        that all pages share.
+        `progress` is an optional callable, called with the number of pages rendered.
+        Returns the file name of the PDF.
+        """
         output_dir = os.path.join(settings.MEDIA_ROOT, "qr_pdfs")
         os.makedirs(output_dir, exist_ok=True)
 
         filename = f"orderpiqr_orders_{uuid.uuid4().hex}.pdf"
         output_path = os.path.join(output_dir, filename)
 
+        orders = list(orders.prefetch_related(
+            Prefetch('lines', queryset=OrderLine.objects.select_related('product').order_by('pk'))
+        ))
+        payloads = [order_qr_payload(order) for order in orders]
+        qr_pngs = get_qr_images(payloads)
+
         page_width, page_height = A4
         c = canvas.Canvas(output_path, pagesize=A4)
+        header_y = self._draw_logo_form(c, page_height)
 
-        for order in orders:
-            # Generate QR content
+        for index, (order, payload) in enumerate(zip(orders, payloads), start=1):
             margin = 20  # points (≈7mm)
             c.setStrokeColor(colors.lightgrey)
             c.setLineWidth(1)
             c.rect(margin, margin, page_width - 2 * margin, page_height - 2 * margin)
 
-            lines = [order.order_code]
-            for line in order.lines.all():
-                lines.append(f"{line.quantity}\t{line.product.code}")
-            qr_content = "\n".join(lines)
-
-            qr = qrcode.make(qr_content)
-            if not isinstance(qr, Image.Image):
-                qr = qr.get_image()
-
-            # Header: Order Code
-            static_relative_path = "orderpiqrApp/img/favicon.png"
-            logo_path = finders.find(static_relative_path)
-
-            if logo_path and os.path.exists(logo_path):
-                logo_width = 40 * mm
-                logo_height = 16 * mm
-                logo_x = 10
-                logo_y = page_height - logo_height - 50  # 20pt top margin
-                c.drawImage(
-                    logo_path,
-                    logo_x,
-                    logo_y,
-                    width=logo_width,
-                    height=logo_height,
-                    preserveAspectRatio=True,
-                    mask='auto'  # ✅ ensures transparent background
-                )
-                header_y = logo_y  # Leave space under logo
+            if header_y is not None:
+                c.doForm(LOGO_FORM_NAME)
+                order_header_y = header_y  # Leave space under logo
             else:
-                print(f"⚠️ Logo not found at: {static_relative_path}")
-                header_y = page_height - 30
+                order_header_y = page_height - 30
 
             # Draw Header
             c.setFont("Helvetica-Bold", 28)
             header_text = f"Order: {order.order_code}"
             text_width = c.stringWidth(header_text, "Helvetica-Bold", 28)
             header_x = (page_width - text_width) / 2
-            c.drawString(header_x, header_y, header_text)
-            header_y -= 10
+            c.drawString(header_x, order_header_y, header_text)
+            order_header_y -= 10
             # Centered QR Code
             qr_width = qr_height = 100 * mm
             qr_x = (page_width - qr_width) / 2
-            qr_y = header_y - qr_height  # extra space below header
+            qr_y = order_header_y - qr_height  # extra space below header
+            # Inline, since every QR is unique and inline images keep the PNG's 1-bit depth
+            qr = Image.open(BytesIO(qr_pngs[payload_hash(payload)]))
             c.drawInlineImage(qr, qr_x, qr_y, width=qr_width, height=qr_height)
 
             # Product Table
@@ -88,19 +98,42 @@ class QRPDFGenerator:
                 ])
 
             table = Table(data, colWidths=[95, 250, 90, 60])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.lightgreen),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ]))
+            table.setStyle(TABLE_STYLE)
 
             table.wrapOn(c, page_width, 100)
             table.drawOn(c, 40, 40)  # 40mm margin from bottom and left
 
             c.showPage()
+            if progress:
+                progress(index)
 
         c.save()
         return filename
+
+    def _draw_logo_form(self, c, page_height):
+        """
+        Register the logo once as a form XObject that every page reuses.
+
+        Returns the header y position below the logo, or None when the logo is missing.
+        """
+        logo_path = finders.find(LOGO_STATIC_PATH)
+        if not logo_path or not os.path.exists(logo_path):
+            logger.warning("Logo not found at: %s", LOGO_STATIC_PATH)
+            return None
+
+        logo_width = 40 * mm
+        logo_height = 16 * mm
+        logo_x = 10
+        logo_y = page_height - logo_height - 50  # 20pt top margin
+        c.beginForm(LOGO_FORM_NAME)
+        c.drawImage(
+            logo_path,
+            logo_x,
+            logo_y,
+            width=logo_width,
+            height=logo_height,
+            preserveAspectRatio=True,
+            mask='auto'  # ✅ ensures transparent background
+        )
+        c.endForm()
+        return logo_y
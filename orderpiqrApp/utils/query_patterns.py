@@ -0,0 +1,92 @@
+"""
+N+1 query detection.
+
+QueryPatternDetector is a `connection.execute_wrapper` that groups the queries of a request by
+their shape (the SQL with its values replaced, see request_metrics.fingerprint_sql). A shape
+that runs QUERY_PATTERN_THRESHOLD times or more is almost always a query per row in a loop:
+a related object read in `__str__`, a serializer field without select_related, a count in
+`save()`. For every such shape the detector keeps the code that ran it the second time.
+
+It is used by:
+- orderpiqrApp.middleware.QueryPatternMiddleware (through request_metrics.observe_queries), with QUERY_PATTERN_MODE = 'log' (staging:
+  a warning per request) or 'raise' (tests: the request fails with RepeatedQueriesError),
+- `manage.py check_query_patterns`, which requests every page and API list with the detector
+  on and fails when one of them repeats queries (for CI).
+"""
+import os
+import traceback
+from typing import List, NamedTuple
+
+from django.conf import settings
+
+from orderpiqrApp.utils.request_metrics import fingerprint_sql
+
+# Frames from these files are skipped in the reported stack: they only run the query
+_OWN_FILES = frozenset(os.path.splitext(os.path.abspath(path))[0] for path in (
+    __file__,
+    os.path.join(os.path.dirname(__file__), 'request_metrics.py'),
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'middleware.py'),
+))
+
+
+class RepeatedQuery(NamedTuple):
+    fingerprint: str
+    count: int
+    # "file:line in function" of the project code that ran the query, innermost last
+    stack: List[str]
+
+
+class RepeatedQueriesError(Exception):
+    pass
+
+
+def _project_stack():
+    base_dir = os.path.abspath(settings.BASE_DIR)
+    frames = []
+    for frame in traceback.extract_stack():
+        path = os.path.abspath(frame.filename)
+        if (not path.startswith(base_dir) or 'site-packages' in path
+                or os.path.splitext(path)[0] in _OWN_FILES):
+            continue
+        frames.append(f'{os.path.relpath(path, base_dir)}:{frame.lineno} in {frame.name}')
+    return frames
+
+
+class QueryPatternDetector:
+    def __init__(self, threshold=None):
+        self.threshold = threshold or settings.QUERY_PATTERN_THRESHOLD
+        # Raw SQL -> fingerprint; the same statement text is fingerprinted once
+        self._fingerprints = {}
+        # Fingerprint -> [count, stack of the second execution]
+        self._patterns = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        fingerprint = self._fingerprints.get(sql)
+        if fingerprint is None:
+            fingerprint = self._fingerprints[sql] = fingerprint_sql(sql)
+        pattern = self._patterns.get(fingerprint)
+        if pattern is None:
+            self._patterns[fingerprint] = [1, None]
+        else:
+            pattern[0] += 1
+            if pattern[1] is None:
+                # Only for repeated shapes: extracting the stack for every query would be slow
+                pattern[1] = _project_stack()
+        return execute(sql, params, many, context)
+
+    def repeated(self):
+        """The query shapes that ran `threshold` times or more, the most frequent first."""
+        return sorted(
+            (RepeatedQuery(fingerprint, count, stack or [])
+             for fingerprint, (count, stack) in self._patterns.items() if count >= self.threshold),
+            key=lambda query: -query.count,
+        )
+
+
+def format_repeated_queries(label, repeated):
+    lines = [f"{label} repeated {len(repeated)} query shape(s):"]
+    for query in repeated:
+        lines.append(f"  {query.count}x {query.fingerprint[:300]}")
+        for frame in query.stack[-6:]:
+            lines.append(f"      {frame}")
+    return '\n'.join(lines)
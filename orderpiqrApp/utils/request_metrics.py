@@ -0,0 +1,202 @@
+"""
+Per-request performance metrics, collected by orderpiqrApp.middleware.RequestMetricsMiddleware.
+
+For every request the middleware measures the wall time, the number and total time of the
+database queries, the slowest query, the response size and the view that handled it. The
+numbers are:
+- sent to the client as a `Server-Timing` header (visible in the browser's network tab),
+- logged with the slowest query's fingerprint when the request took SLOW_REQUEST_MS or more,
+- aggregated per view into histograms, exported in the Prometheus text format by the
+  staff-only /metrics/ endpoint.
+
+Queries are observed with `observe_queries()` rather than `connection.execute_wrapper()`:
+under ASGI the ORM calls of async views run in sync_to_async threads, on other connection
+objects than the one the middleware sees. The observers are kept in a context variable,
+which sync_to_async copies into its thread, and one wrapper installed on every connection
+(`install_query_observer`, on `connection_created`) calls them.
+
+The histograms live in process memory: every gunicorn worker keeps its own and a scrape sees
+the worker that answered it, with a `pid` label so the series of different workers do not
+mix. They are reset when a worker is recycled.
+"""
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+# Upper bounds in seconds, as in the Prometheus client libraries
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_IN_LIST_RE = re.compile(r'\bIN \((?:%s, )*%s\)', re.IGNORECASE)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+\b')
+
+
+def fingerprint_sql(sql):
+    """SQL with its values and IN lists replaced by placeholders, so equal queries group together."""
+    sql = _WHITESPACE_RE.sub(' ', sql).strip()
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    return _IN_LIST_RE.sub('IN (...)', sql)
+
+
+# execute_wrapper-style callables observing the queries of the current request
+_query_observers = ContextVar('query_observers', default=())
+
+
+@contextmanager
+def observe_queries(wrapper):
+    """
+    `connection.execute_wrapper(wrapper)` for every connection used in the current context,
+    including the threads that sync_to_async runs ORM calls in.
+    """
+    token = _query_observers.set((*_query_observers.get(), wrapper))
+    try:
+        yield
+    finally:
+        _query_observers.reset(token)
+
+
+def _call_query_observers(execute, sql, params, many, context):
+    observers = _query_observers.get()
+    for wrapper in reversed(observers):
+        execute = partial(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+def install_query_observer(sender, connection, **kwargs):
+    """`connection_created` receiver that lets observe_queries() see the connection's queries."""
+    if _call_query_observers not in connection.execute_wrappers:
+        # First, not last: `connection.execute_wrapper()` pops the last wrapper when its block
+        # ends, which would remove this one when the connection was opened inside the block
+        connection.execute_wrappers.insert(0, _call_query_observers)
+
+
+class QueryTimer:
+    """Query observer (see observe_queries) that counts and times the queries of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest_duration = 0.0
+        self.slowest_sql = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            if duration > self.slowest_duration:
+                self.slowest_duration = duration
+                # Fingerprinted once the request is done, only when it is reported
+                self.slowest_sql = sql
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'count', 'sum')
+
+    def __init__(self):
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.buckets[bisect_left(DURATION_BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+class _ViewMetrics:
+    __slots__ = ('duration', 'db_duration', 'queries', 'response_bytes', 'responses')
+
+    def __init__(self):
+        self.duration = _Histogram()
+        self.db_duration = _Histogram()
+        self.queries = 0
+        self.response_bytes = 0
+        # Status class ('2xx', '4xx', ...) -> count
+        self.responses = {}
+
+
+class RequestMetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (view, method) -> _ViewMetrics
+        self._views = {}
+
+    def observe(self, view, method, status_code, duration, db_duration, queries, response_bytes):
+        with self._lock:
+            metrics = self._views.get((view, method))
+            if metrics is None:
+                metrics = self._views[(view, method)] = _ViewMetrics()
+            metrics.duration.observe(duration)
+            metrics.db_duration.observe(db_duration)
+            metrics.queries += queries
+            metrics.response_bytes += response_bytes
+            status = f'{status_code // 100}xx'
+            metrics.responses[status] = metrics.responses.get(status, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._views.clear()
+
+    def render_prometheus(self):
+        """The aggregated metrics in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            views = sorted(self._views.items())
+            lines = []
+            self._render_histogram(lines, views, 'orderpiqr_request_duration_seconds',
+                                   "Wall time of the requests, per view.", lambda m: m.duration)
+            self._render_histogram(lines, views, 'orderpiqr_request_db_duration_seconds',
+                                   "Time spent in database queries per request, per view.", lambda m: m.db_duration)
+            self._render_counter(lines, views, 'orderpiqr_request_db_queries_total',
+                                 "Database queries run by the requests, per view.", lambda m: m.queries)
+            self._render_counter(lines, views, 'orderpiqr_response_bytes_total',
+                                 "Bytes in the response bodies, per view.", lambda m: m.response_bytes)
+
+            lines.append('# HELP orderpiqr_responses_total Responses per view and status class.')
+            lines.append('# TYPE orderpiqr_responses_total counter')
+            for (view, method), metrics in views:
+                for status, count in sorted(metrics.responses.items()):
+                    lines.append(f'orderpiqr_responses_total{{{_labels(view, method)},status="{status}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _render_histogram(lines, views, name, help_text, get):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for (view, method), metrics in views:
+            histogram = get(metrics)
+            labels = _labels(view, method)
+            cumulative = 0
+            for bound, count in zip((*DURATION_BUCKETS, '+Inf'), histogram.buckets):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{labels}}} {histogram.sum:.6f}')
+            lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+    @staticmethod
+    def _render_counter(lines, views, name, help_text, get):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for (view, method), metrics in views:
+            lines.append(f'{name}{{{_labels(view, method)}}} {get(metrics)}')
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(view, method):
+    return f'view="{_escape(view)}",method="{_escape(method)}",pid="{os.getpid()}"'
+
+
+request_metrics = RequestMetricsRegistry()
@@ -0,0 +1,52 @@
+"""
+Product search shared by the picker autocomplete, the manage UI and the REST API `?search=`.
+
+Every whitespace-separated term must occur in one of the searched fields (case-insensitive).
+Results are ranked: products whose code starts with one of the terms first, then other
+code matches, then description (or other field) matches.
+
+On PostgreSQL the substring matches are served by pg_trgm GIN indexes on UPPER(code),
+UPPER(description) and UPPER(location) (migration 0029). That is the expression Django's
+`icontains` compiles to, so the query is the same on every backend. Other databases run
+it without those indexes, which is fine for local development and small catalogs.
+"""
+from django.db.models import Case, IntegerField, Q, Value, When
+
+PRODUCT_SEARCH_FIELDS = ('code', 'description')
+
+# Rank values, lower is better
+RANK_CODE_PREFIX = 0
+RANK_CODE = 1
+RANK_OTHER = 2
+
+
+def search_products(queryset, query, fields=PRODUCT_SEARCH_FIELDS):
+    """
+    Filter a product queryset on `query` and annotate it with `search_rank`.
+
+    The queryset is ordered by rank and code; callers that want another order can call
+    `order_by()` on the result. An empty query returns the queryset unchanged.
+    """
+    terms = query.split()
+    if not terms:
+        return queryset
+
+    for term in terms:
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__icontains': term})
+        queryset = queryset.filter(condition)
+
+    code_prefix = Q()
+    code_match = Q()
+    for term in terms:
+        code_prefix |= Q(code__istartswith=term)
+        code_match |= Q(code__icontains=term)
+    return queryset.annotate(
+        search_rank=Case(
+            When(code_prefix, then=Value(RANK_CODE_PREFIX)),
+            When(code_match, then=Value(RANK_CODE)),
+            default=Value(RANK_OTHER),
+            output_field=IntegerField(),
+        )
+    ).order_by('search_rank', 'code')
@@ -0,0 +1,118 @@
+"""
+Cold start measurement, run in a fresh interpreter by `manage.py profile_startup`.
+
+    python -X importtime -m orderpiqrApp.utils.startup_profile --url /login/
+
+Starts the app the way gunicorn does (importing orderpiqr.wsgi), then sends requests to
+`--url` through the WSGI handler and prints the timings as JSON on stdout. The per-module
+import times come from `-X importtime` on stderr. With `--memory`, tracemalloc also
+reports the memory still held per module after the first request. Tracing slows imports
+down, so the command measures memory in a separate run.
+
+This module must not import Django or the app at module level: everything it imports
+before the measurement starts would be missing from the profile.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+
+def _environ(url, host):
+    path, _, query = url.partition('?')
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': host,
+        'SERVER_PORT': '80',
+        'HTTP_HOST': host,
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+
+
+def _request(application, url, host):
+    """Send one GET request; returns (status code, milliseconds)."""
+    statuses = []
+    start = time.perf_counter()
+    body = application(_environ(url, host), lambda status, headers, exc_info=None: statuses.append(status))
+    for _chunk in body:
+        pass
+    if hasattr(body, 'close'):
+        body.close()
+    return int(statuses[0].split()[0]), (time.perf_counter() - start) * 1000
+
+
+def _memory_by_module(snapshot):
+    """Bytes still allocated by the code of each loaded module, keyed by module name."""
+    modules = {}
+    for name, module in list(sys.modules.items()):
+        filename = getattr(module, '__file__', None)
+        if filename:
+            modules[os.path.realpath(filename)] = name
+
+    memory = {}
+    for stat in snapshot.statistics('filename'):
+        name = modules.get(os.path.realpath(stat.traceback[0].filename))
+        if name:
+            memory[name] = memory.get(name, 0) + stat.size
+    return memory
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', default='/login/')
+    parser.add_argument('--requests', type=int, default=3)
+    parser.add_argument('--memory', action='store_true')
+    options = parser.parse_args(argv)
+
+    if options.memory:
+        import tracemalloc
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'orderpiqr.settings')
+    from orderpiqr.wsgi import application
+    setup_ms = (time.perf_counter() - start) * 1000
+
+    from django.conf import settings
+    host = next((h for h in settings.ALLOWED_HOSTS if not h.startswith('.') and h != '*'), 'localhost')
+
+    status, first_request_ms = _request(application, options.url, host)
+    warm_ms = [_request(application, options.url, host)[1] for _ in range(max(options.requests - 1, 0))]
+
+    result = {
+        'url': options.url,
+        'status': status,
+        'setup_ms': setup_ms,
+        'first_request_ms': first_request_ms,
+        'time_to_first_request_ms': setup_ms + first_request_ms,
+        'warm_request_ms': sorted(warm_ms)[len(warm_ms) // 2] if warm_ms else None,
+        'modules': len(sys.modules),
+    }
+    try:
+        import resource
+        # KiB on Linux
+        result['max_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        pass
+
+    if options.memory:
+        result['memory'] = _memory_by_module(tracemalloc.take_snapshot())
+        tracemalloc.stop()
+
+    # On a line of its own: the app may print during startup
+    sys.stdout.write('\n' + json.dumps(result) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,407 @@
+"""
+Outbound webhooks.
+
+Completing an order or pick list, changing inventory and changing the queue enqueue one
+WebhookDelivery per subscribed endpoint, inside the transaction of the change: an event
+is sent if and only if its change was committed. `manage.py run_webhooks` sends the
+pending deliveries. Events for the same endpoint are sent together, as one POST of
+`{"events": [...]}`, over kept-alive connections. A failed batch is retried with
+exponential backoff; after WEBHOOK_MAX_ATTEMPTS attempts its deliveries are marked dead
+and can be retried from the API or the admin.
+
+Endpoints must be https URLs of public hosts. The URL is checked when an endpoint is saved
+through the API and the address is checked again on every connect, so a host that later
+resolves to a loopback, private, link-local or reserved address (DNS rebinding) is refused.
+WEBHOOK_ALLOW_PRIVATE_URLS lifts both checks for local development with `manage.py
+webhook_stub`. Only the status code of an error response is stored, never its body.
+
+Every request is signed. The `X-OrderPiqR-Signature` header is
+`t=<unix timestamp>,v1=<hex HMAC-SHA256 of "<timestamp>.<body>" with the endpoint secret>`;
+see `verify_signature()`. Events can arrive more than once and out of order, so receivers
+should deduplicate on the event `id`.
+"""
+import hashlib
+import hmac
+import http.client
+import ipaddress
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from orderpiqrApp.models import WebhookDelivery, WebhookEndpoint
+
+EventType = WebhookEndpoint.EventType
+
+SIGNATURE_HEADER = 'X-OrderPiqR-Signature'
+USER_AGENT = 'OrderPiqR-Webhooks/1.0'
+
+# Retry delays: 30s, 1m, 2m, 4m, ... up to 6 hours, with some jitter
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 6 * 60 * 60
+
+# A claimed delivery is skipped by other dispatchers for this long, so a crashed
+# dispatcher's deliveries are picked up again afterwards
+CLAIM_LEASE_SECONDS = 5 * 60
+
+# Characters of a connection error kept on a failed delivery
+MAX_ERROR_LENGTH = 500
+
+
+class UnsafeWebhookURL(ValueError):
+    pass
+
+
+def _is_public_address(address):
+    ip = ipaddress.ip_address(address.split('%', 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    # is_global is False for loopback, private, link-local (cloud metadata), shared and reserved ranges
+    return ip.is_global and not ip.is_multicast
+
+
+def resolve_public_address(host, port):
+    """
+    Resolve `host` and return one of its addresses.
+
+    Raises UnsafeWebhookURL when it does not resolve or any of its addresses is not a public
+    one, unless WEBHOOK_ALLOW_PRIVATE_URLS is set.
+    """
+    try:
+        addresses = [info[4][0] for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)]
+    except (socket.gaierror, UnicodeError):
+        raise UnsafeWebhookURL(f"{host} does not resolve")
+    if not settings.WEBHOOK_ALLOW_PRIVATE_URLS and not all(_is_public_address(a) for a in addresses):
+        raise UnsafeWebhookURL(f"{host} resolves to a non-public address")
+    return addresses[0]
+
+
+def validate_webhook_url(url):
+    """Raise UnsafeWebhookURL unless `url` is an https URL of a public host."""
+    parts = urlsplit(url)
+    allowed_schemes = ('https', 'http') if settings.WEBHOOK_ALLOW_PRIVATE_URLS else ('https',)
+    if parts.scheme not in allowed_schemes:
+        raise UnsafeWebhookURL("Webhook URLs must use https")
+    if not parts.hostname:
+        raise UnsafeWebhookURL("The URL has no host")
+    try:
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+    except ValueError:
+        raise UnsafeWebhookURL("The URL has an invalid port")
+    resolve_public_address(parts.hostname, port)
+
+
+def _create_public_connection(address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None):
+    # Replaces socket.create_connection in the pool's connections: the address is checked at
+    # connect time, and the checked address is the one connected to
+    host, port = address
+    return socket.create_connection((resolve_public_address(host, port), port), timeout, source_address)
+
+
+# ============================================
+# Enqueueing
+# ============================================
+
+def enqueue_webhook(customer_id, event_type, data):
+    """
+    Queue an event for every active endpoint of the customer that subscribes to it.
+
+    Call this inside the transaction of the change, so the event is only sent when the
+    change is committed. Returns the created deliveries.
+    """
+    endpoints = [
+        endpoint
+        for endpoint in WebhookEndpoint.objects.filter(customer_id=customer_id, is_active=True)
+        .only('endpoint_id', 'event_types')
+        if endpoint.wants(event_type)
+    ]
+    if not endpoints:
+        return []
+
+    event_id = uuid.uuid4()
+    payload = json.loads(json.dumps({
+        'id': str(event_id),
+        'type': event_type,
+        'created_at': timezone.now(),
+        'data': data,
+    }, cls=DjangoJSONEncoder))
+    return WebhookDelivery.objects.bulk_create([
+        WebhookDelivery(endpoint=endpoint, event_id=event_id, event_type=event_type, payload=payload)
+        for endpoint in endpoints
+    ])
+
+
+def enqueue_order_completed(order):
+    return enqueue_webhook(order.customer_id, EventType.ORDER_COMPLETED, {
+        'order_id': order.order_id,
+        'order_code': order.order_code,
+        'status': order.status,
+        'completed_at': order.completed_at,
+    })
+
+
+def enqueue_picklist_completed(picklist):
+    return enqueue_webhook(picklist.customer_id, EventType.PICKLIST_COMPLETED, {
+        'picklist_id': picklist.picklist_id,
+        'picklist_code': picklist.picklist_code,
+        'order_id': picklist.order_id,
+        'device_id': picklist.device_id,
+        'successful': picklist.successful,
+        'time_taken_seconds': picklist.time_taken.total_seconds() if picklist.time_taken else None,
+    })
+
+
+def enqueue_inventory_changed(log):
+    return enqueue_webhook(log.product.customer_id, EventType.INVENTORY_CHANGED, {
+        'inventory_log_id': log.pk,
+        'product_id': log.product_id,
+        'product_code': log.product.code,
+        'old_quantity': log.old_quantity,
+        'new_quantity': log.new_quantity,
+        'change_type': log.change_type,
+        'reason': log.reason,
+    })
+
+
+def enqueue_queue_changed(customer_id, action, order_ids):
+    """`action` is what happened to the orders: added, removed, claimed, unlocked, moved or reordered."""
+    return enqueue_webhook(customer_id, EventType.QUEUE_CHANGED, {
+        'action': action,
+        'order_ids': list(order_ids),
+    })
+
+
+# ============================================
+# Signing
+# ============================================
+
+def sign(secret, timestamp, body):
+    """Return the signature header value for a request body."""
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def verify_signature(secret, header, body, tolerance=300):
+    """
+    Check a signature header as sent by `sign()`.
+
+    Requests older than `tolerance` seconds are rejected, so a captured request cannot be
+    replayed later.
+    """
+    try:
+        parts = dict(item.split('=', 1) for item in header.split(','))
+        timestamp = int(parts['t'])
+    except (AttributeError, KeyError, ValueError):
+        return False
+    if abs(time.time() - timestamp) > tolerance:
+        return False
+    return hmac.compare_digest(sign(secret, timestamp, body), f"t={timestamp},v1={parts.get('v1', '')}")
+
+
+# ============================================
+# Delivery
+# ============================================
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP(S) connections per host, shared by the dispatcher threads.
+
+    Most webhook traffic goes to a few receivers, so reusing their connections saves a
+    TCP and TLS handshake per batch.
+    """
+
+    def __init__(self, timeout, max_idle_per_host=4):
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self._idle = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def post(self, url, body, headers):
+        """POST `body` to `url`. Returns the status code; the response body is read and dropped."""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+
+        connection, reused = self._acquire(key)
+        try:
+            try:
+                response = self._send(connection, path, body, headers)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                if not reused:
+                    raise
+                # The receiver closed the idle connection; try once more on a fresh one
+                connection.close()
+                connection = self._connect(key)
+                response = self._send(connection, path, body, headers)
+            # Read to the end, so the connection can be reused
+            response.read()
+        except BaseException:
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(key, connection)
+        return response.status
+
+    def close(self):
+        with self._lock:
+            for connections in self._idle.values():
+                for connection in connections:
+                    connection.close()
+            self._idle.clear()
+
+    def _send(self, connection, path, body, headers):
+        connection.request('POST', path, body=body, headers=headers)
+        return connection.getresponse()
+
+    def _acquire(self, key):
+        with self._lock:
+            if self._idle[key]:
+                return self._idle[key].pop(), True
+        return self._connect(key), False
+
+    def _release(self, key, connection):
+        with self._lock:
+            if len(self._idle[key]) < self.max_idle_per_host:
+                self._idle[key].append(connection)
+                return
+        connection.close()
+
+    def _connect(self, key):
+        scheme, host, port = key
+        if scheme == 'https':
+            connection = http.client.HTTPSConnection(host, port, timeout=self.timeout)
+        elif scheme == 'http' and settings.WEBHOOK_ALLOW_PRIVATE_URLS:
+            connection = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        else:
+            raise UnsafeWebhookURL("Webhook URLs must use https")
+        # TLS still verifies the certificate against `host`; only the TCP connect is checked
+        connection._create_connection = _create_public_connection
+        return connection
+
+
+def claim_deliveries(limit):
+    """
+    Lease up to `limit` due deliveries to this dispatcher and return them.
+
+    Rows locked by another dispatcher are skipped, so several can run at once.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        delivery_ids = list(
+            WebhookDelivery.objects.select_for_update(skip_locked=True)
+            .filter(status=WebhookDelivery.Status.PENDING, next_attempt_at__lte=now, endpoint__is_active=True)
+            .order_by('next_attempt_at')
+            .values_list('delivery_id', flat=True)[:limit]
+        )
+        if delivery_ids:
+            WebhookDelivery.objects.filter(pk__in=delivery_ids).update(
+                next_attempt_at=now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+            )
+    return list(WebhookDelivery.objects.filter(pk__in=delivery_ids).select_related('endpoint').order_by('pk'))
+
+
+def send_batch(pool, endpoint, deliveries):
+    """
+    POST a batch of deliveries to their endpoint. Does not touch the database.
+
+    Returns (status code or None, error message or '' when the receiver accepted the batch).
+    """
+    body = json.dumps({'events': [delivery.payload for delivery in deliveries]}).encode()
+    headers = {
+        'Content-Type': 'application/json',
+        'User-Agent': USER_AGENT,
+        SIGNATURE_HEADER: sign(endpoint.secret, int(time.time()), body),
+    }
+    try:
+        status = pool.post(endpoint.url, body, headers)
+    except Exception as e:
+        # Connection errors, timeouts, invalid URLs: all are retried like an error response
+        return None, (str(e) or type(e).__name__)[:MAX_ERROR_LENGTH]
+    if 200 <= status < 300:
+        return status, ''
+    # Not the response body: it is shown to API users, who must not read internal services with it
+    return status, f"HTTP {status}"
+
+
+def backoff_delay(attempts):
+    """Seconds to wait before the next attempt, after `attempts` failed attempts."""
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+    # Jitter spreads out the retries of an endpoint that was down for everyone
+    return delay * random.uniform(0.8, 1.2)
+
+
+def record_outcome(deliveries, status, error):
+    """Mark a sent batch as delivered, or schedule its retry (or dead letter) on failure."""
+    now = timezone.now()
+    for delivery in deliveries:
+        delivery.attempts += 1
+        delivery.response_status = status
+        delivery.last_error = error
+        if not error:
+            delivery.status = WebhookDelivery.Status.DELIVERED
+            delivery.delivered_at = now
+        elif delivery.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+            delivery.status = WebhookDelivery.Status.DEAD
+        else:
+            delivery.next_attempt_at = now + timedelta(seconds=backoff_delay(delivery.attempts))
+
+    WebhookDelivery.objects.bulk_update(
+        deliveries,
+        ['attempts', 'response_status', 'last_error', 'status', 'delivered_at', 'next_attempt_at'],
+    )
+
+
+def dispatch_webhooks(pool, executor):
+    """
+    Send one round of due deliveries, batched per endpoint and sent in parallel.
+
+    Returns the number of deliveries attempted.
+    """
+    batch_size = settings.WEBHOOK_BATCH_SIZE
+    deliveries = claim_deliveries(batch_size * settings.WEBHOOK_DISPATCH_THREADS)
+
+    by_endpoint = defaultdict(list)
+    for delivery in deliveries:
+        by_endpoint[delivery.endpoint_id].append(delivery)
+    batches = [
+        endpoint_deliveries[start:start + batch_size]
+        for endpoint_deliveries in by_endpoint.values()
+        for start in range(0, len(endpoint_deliveries), batch_size)
+    ]
+
+    # Only the HTTP requests run in the threads; outcomes are saved from this thread
+    futures = [(batch, executor.submit(send_batch, pool, batch[0].endpoint, batch)) for batch in batches]
+    for batch, future in futures:
+        record_outcome(batch, *future.result())
+    return len(deliveries)
+
+
+def retry_deliveries(queryset):
+    """Queue failed or dead deliveries for a new round of attempts. Returns the number queued."""
+    return queryset.exclude(status=WebhookDelivery.Status.DELIVERED).update(
+        status=WebhookDelivery.Status.PENDING,
+        attempts=0,
+        next_attempt_at=timezone.now(),
+    )
+
+
+def prune_webhook_deliveries():
+    """Delete delivered and dead deliveries older than WEBHOOK_RETENTION_DAYS. Returns the number deleted."""
+    cutoff = timezone.now() - timedelta(days=settings.WEBHOOK_RETENTION_DAYS)
+    deleted, _ = WebhookDelivery.objects.filter(
+        created_at__lt=cutoff,
+    ).exclude(status=WebhookDelivery.Status.PENDING).delete()
+    return deleted
@@ -1,4 +1,5 @@
 from .main_views import *
 from .scan_picklist_view import *
+from .scan_picklist_async_view import *
 from .queue_views import *
 from .manage_views import *
\ No newline at end of file
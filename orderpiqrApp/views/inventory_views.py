@@ -1,7 +1,6 @@
 import json
 
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
 from django.http import JsonResponse
 from django.shortcuts import render
 from django.utils import timezone
@@ -10,6 +9,8 @@ from django.views.decorators.http import require_POST
 
 from orderpiqrApp.models import Product, Device, InventoryLog
 from orderpiqrApp.utils.inventory import is_inventory_enabled, modify_inventory
+from orderpiqrApp.utils.product_index import lookup_product
+from orderpiqrApp.utils.search import search_products
 
 
 def get_device_from_request(request):
@@ -84,12 +85,7 @@ def inventory_product_search(request):
     if not query:
         return JsonResponse({'products': []})
 
-    products = Product.objects.filter(
-        customer=customer,
-        active=True
-    ).filter(
-        Q(code__icontains=query) | Q(description__icontains=query)
-    ).order_by('code')[:20]
+    products = search_products(Product.objects.filter(customer=customer, active=True), query)[:20]
 
     return JsonResponse({
         'products': [
@@ -108,7 +104,7 @@ def inventory_product_search(request):
 @login_required
 def inventory_product_lookup(request, code):
     """
-    AJAX endpoint to lookup product by exact code (for barcode scanning).
+    AJAX endpoint to lookup product by exact code or barcode alias (for barcode scanning).
     """
     try:
         customer = request.user.userprofile.customer
@@ -118,28 +114,33 @@ def inventory_product_lookup(request, code):
     if not is_inventory_enabled(customer):
         return JsonResponse({'status': 'error', 'message': _('Inventory management not enabled')}, status=403)
 
-    try:
-        product = Product.objects.get(
-            customer=customer,
-            code=code,
-            active=True
-        )
-        return JsonResponse({
-            'status': 'ok',
-            'product': {
-                'product_id': product.product_id,
-                'code': product.code,
-                'description': product.description,
-                'location': product.location,
-                'inventory_quantity': product.inventory_quantity,
-            }
-        })
-    except Product.DoesNotExist:
+    # The product code index resolves product codes and barcode aliases and has the code,
+    # location and active flag; a code it does not know is looked up in the database
+    entry = lookup_product(customer.pk, code)
+    product = None
+    if entry is not None and entry.active:
+        # Only the fields the index leaves out
+        product = Product.objects.filter(customer=customer, pk=entry.product_id).values(
+            'description', 'inventory_quantity'
+        ).first()
+    if product is None:
         return JsonResponse({
             'status': 'error',
             'message': _('Product not found')
         }, status=404)
 
+    return JsonResponse({
+        'status': 'ok',
+        'product': {
+            'product_id': entry.product_id,
+            'code': entry.code,
+            'description': product['description'],
+            'location': entry.location,
+            'inventory_quantity': product['inventory_quantity'],
+            'units_per_scan': entry.quantity,
+        }
+    })
+
 
 @login_required
 @require_POST
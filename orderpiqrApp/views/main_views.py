@@ -2,7 +2,7 @@ from django.shortcuts import render, redirect
 from django.utils.safestring import mark_safe
 from django.urls import reverse
 
-from orderpiqrApp.models import Product, Device, SettingDefinition, CustomerSettingValue, Order
+from orderpiqrApp.models import Product, ProductBarcode, Device, SettingDefinition, CustomerSettingValue, Order
 import json
 
 def index(request):
@@ -14,7 +14,15 @@ def index(request):
 
     customer = request.user.userprofile.customer
     product_data = Product.objects.filter(active=True, customer=customer)
-    product_data = product_data.values('product_id', 'code', 'description', 'location')
+    product_data = list(product_data.values('product_id', 'code', 'description', 'location'))
+    # Barcode aliases as [barcode, units per scan] pairs, so the picker resolves them offline too
+    barcodes = {}
+    for product_id, barcode, quantity in (ProductBarcode.objects.filter(customer=customer, product__active=True)
+                                          .values_list('product_id', 'barcode', 'quantity')):
+        barcodes.setdefault(product_id, []).append([barcode, quantity])
+    for product in product_data:
+        if product['product_id'] in barcodes:
+            product['barcodes'] = barcodes[product['product_id']]
     settings = get_customer_settings(customer)
 
     # Check if there's an order to load from the queue
@@ -44,7 +52,7 @@ def index(request):
             print(f"[Queue Debug] claimed_order_data: {claimed_order_data}")
 
     context = {
-        'product_data': json.dumps(list(product_data)),
+        'product_data': json.dumps(product_data),
         'username': device.name,
         'settings': mark_safe(json.dumps(settings)),
         'claimed_order': mark_safe(json.dumps(claimed_order_data)) if claimed_order_data else None,
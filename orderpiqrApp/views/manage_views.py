@@ -5,8 +5,9 @@ A user-friendly custom admin interface for company administrators.
 """
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, FileResponse, Http404
 from django.core.paginator import Paginator
+from django.db import transaction
 from django.db.models import Count, Q, Sum, Max
 from django.db.models.functions import TruncDate
 from django.utils import timezone
@@ -14,16 +15,23 @@ from django.utils.translation import gettext as _
 from datetime import timedelta
 import json
 import csv
-import io
+import os
 
 from django.contrib.auth import logout, update_session_auth_hash
 from django.contrib.auth.hashers import check_password
 
+from orderpiqrApp.utils.changes import update_tracked
 from orderpiqrApp.utils.decorators import company_admin_required
 from orderpiqrApp.utils.inventory import is_inventory_enabled, modify_inventory
-from orderpiqrApp.models import Product, Order, OrderLine, PickList, Device, CustomerSettingValue, SettingDefinition, InventoryLog
+from orderpiqrApp.utils.jobs import enqueue_job, jobs_for_user
+from orderpiqrApp.utils.order_lines import sync_order_lines
+from orderpiqrApp.utils.search import search_products
+from orderpiqrApp.models import Product, Order, OrderLine, PickList, Device, CustomerSettingValue, SettingDefinition, InventoryLog, Job
 from django.contrib.auth.models import User
 
+# Number of row-level import errors shown as messages after an import
+IMPORT_ERRORS_SHOWN = 10
+
 
 def get_customer_from_user(user):
     """Get the customer associated with the user."""
@@ -135,14 +143,10 @@ def products_list(request):
     # Get products
     products = Product.objects.filter(customer=customer)
 
-    # Search
+    # Search, best matches first unless another order is chosen
     search = request.GET.get('search', '').strip()
     if search:
-        products = products.filter(
-            Q(code__icontains=search) |
-            Q(description__icontains=search) |
-            Q(location__icontains=search)
-        )
+        products = search_products(products, search, fields=('code', 'description', 'location'))
         context['search'] = search
 
     # Filter by status
@@ -166,7 +170,7 @@ def products_list(request):
     )
 
     # Ordering
-    ordering = request.GET.get('order', 'code')
+    ordering = request.GET.get('order', '' if search else 'code')
     if ordering in ['code', '-code', 'description', '-description', 'location', '-location', 'product_id', '-product_id']:
         products = products.order_by(ordering)
     context['ordering'] = ordering
@@ -324,14 +328,14 @@ def products_bulk_action(request):
         products.delete()
         return JsonResponse({'status': 'ok', 'message': _("{count} product(s) deleted.").format(count=count)})
     elif action == 'activate':
-        products.update(active=True)
+        update_tracked(products, customer.pk, active=True)
         return JsonResponse({'status': 'ok', 'message': _("{count} product(s) activated.").format(count=count)})
     elif action == 'deactivate':
-        products.update(active=False)
+        update_tracked(products, customer.pk, active=False)
         return JsonResponse({'status': 'ok', 'message': _("{count} product(s) deactivated.").format(count=count)})
     elif action == 'set_location':
         new_location = data.get('value', '').strip()
-        products.update(location=new_location)
+        update_tracked(products, customer.pk, location=new_location)
         return JsonResponse({'status': 'ok', 'message': _("{count} product(s) updated.").format(count=count)})
     else:
         return JsonResponse({'status': 'error', 'message': _("Unknown action.")}, status=400)
@@ -400,7 +404,7 @@ def product_inline_edit(request, product_id):
 
 @company_admin_required
 def products_import(request):
-    """Import products from CSV."""
+    """Import products from CSV or XLSX."""
     context = get_base_context(request, 'products')
     customer = context['customer']
 
@@ -413,53 +417,27 @@ def products_import(request):
             messages.error(request, _("Please select a CSV file."))
             return render(request, 'manage/products/import.html', context)
 
-        if not csv_file.name.endswith('.csv'):
-            messages.error(request, _("Please upload a valid CSV file."))
+        if not csv_file.name.lower().endswith(('.csv', '.xlsx')):
+            messages.error(request, _("Please upload a valid CSV or XLSX file."))
             return render(request, 'manage/products/import.html', context)
 
-        try:
-            decoded_file = csv_file.read().decode('utf-8-sig')
-            reader = csv.DictReader(io.StringIO(decoded_file))
-
-            created_count = 0
-            updated_count = 0
-            error_count = 0
-
-            for row in reader:
-                code = row.get('code', row.get('Code', '')).strip()
-                description = row.get('description', row.get('Description', '')).strip()
-                location = row.get('location', row.get('Location', '')).strip()
-                active_str = row.get('active', row.get('Active', 'true')).strip().lower()
-                active = active_str in ['true', '1', 'yes', 'ja', 'actief']
-
-                if not code or not description:
-                    error_count += 1
-                    continue
-
-                product, created = Product.objects.update_or_create(
-                    customer=customer,
-                    code=code,
-                    defaults={
-                        'description': description,
-                        'location': location,
-                        'active': active
-                    }
-                )
-
-                if created:
-                    created_count += 1
-                else:
-                    updated_count += 1
-
-            messages.success(request, _("Import completed: {created} created, {updated} updated, {errors} errors.").format(
-                created=created_count, updated=updated_count, errors=error_count
-            ))
-            return redirect('manage_products')
-
-        except Exception as e:
-            messages.error(request, _("Error processing CSV: {error}").format(error=str(e)))
+        job = enqueue_job(Job.JobType.PRODUCT_IMPORT, customer=customer, user=request.user,
+                          params={'filename': csv_file.name}, input_file=csv_file)
+        if not job.is_finished:
+            messages.info(request, _("Import started, this page shows its progress."))
+            return redirect('manage_job_detail', job_id=job.job_id)
+        if job.status == Job.Status.FAILED:
+            messages.error(request, _("Error processing CSV: {error}").format(error=job.error))
             return render(request, 'manage/products/import.html', context)
 
+        report = job.result
+        messages.success(request, _("Import completed: {created} created, {updated} updated, {errors} errors.").format(
+            created=report['created'], updated=report['updated'] + report['unchanged'], errors=report['error_count']
+        ))
+        for error in report['errors'][:IMPORT_ERRORS_SHOWN]:
+            messages.warning(request, _("Row {row}: {message}").format(**error))
+        return redirect('manage_products')
+
     return render(request, 'manage/products/import.html', context)
 
 
@@ -647,23 +625,25 @@ def order_edit(request, order_id):
             context['form_data'] = request.POST
             return render(request, 'manage/orders/form.html', context)
 
-        # Update order
-        order.order_code = order_code
-        order.notes = notes
-        order.save()
-
-        # Delete existing order lines and create new ones
-        order.lines.all().delete()
-
+        lines = []
         for i, product_id in enumerate(product_ids):
             if product_id:
                 amount = int(amounts[i]) if i < len(amounts) and amounts[i] else 1
-                product = get_object_or_404(Product, product_id=product_id, customer=customer)
-                OrderLine.objects.create(
-                    order=order,
-                    product=product,
-                    quantity=amount
-                )
+                lines.append((int(product_id), amount))
+
+        # Check all products before anything is written
+        submitted_products = {product_id for product_id, amount in lines}
+        if Product.objects.filter(customer=customer, product_id__in=submitted_products).count() != len(submitted_products):
+            raise Http404
+
+        with transaction.atomic():
+            # Update order
+            order.order_code = order_code
+            order.notes = notes
+            order.save()
+
+            # Only the lines that changed are written, the others keep their IDs
+            sync_order_lines(customer.pk, {order.pk: lines})
 
         messages.success(request, _("Order '{code}' updated successfully.").format(code=order_code))
         return redirect('manage_orders')
@@ -691,7 +671,7 @@ def order_delete(request, order_id):
 
 @company_admin_required
 def orders_import(request):
-    """Import orders from CSV."""
+    """Import orders from CSV or XLSX."""
     context = get_base_context(request, 'orders')
     customer = context['customer']
 
@@ -704,78 +684,77 @@ def orders_import(request):
             messages.error(request, _("Please select a CSV file."))
             return render(request, 'manage/orders/import.html', context)
 
-        if not csv_file.name.endswith('.csv'):
-            messages.error(request, _("Please upload a valid CSV file."))
+        if not csv_file.name.lower().endswith(('.csv', '.xlsx')):
+            messages.error(request, _("Please upload a valid CSV or XLSX file."))
             return render(request, 'manage/orders/import.html', context)
 
-        try:
-            decoded_file = csv_file.read().decode('utf-8-sig')
-            reader = csv.DictReader(io.StringIO(decoded_file))
-
-            created_count = 0
-            line_count = 0
-            error_count = 0
-
-            # Group by order_code
-            orders_data = {}
-            for row in reader:
-                order_code = row.get('order_code', row.get('Order Code', '')).strip()
-                product_code = row.get('product_code', row.get('Product Code', '')).strip()
-                amount = row.get('amount', row.get('Amount', '1')).strip()
-                notes = row.get('notes', row.get('Notes', '')).strip()
-
-                if not order_code or not product_code:
-                    error_count += 1
-                    continue
-
-                if order_code not in orders_data:
-                    orders_data[order_code] = {
-                        'notes': notes,
-                        'lines': []
-                    }
-                orders_data[order_code]['lines'].append({
-                    'product_code': product_code,
-                    'amount': int(amount) if amount.isdigit() else 1
-                })
-
-            # Create orders
-            for order_code, data in orders_data.items():
-                if Order.objects.filter(customer=customer, order_code=order_code).exists():
-                    error_count += len(data['lines'])
-                    continue
-
-                order = Order.objects.create(
-                    customer=customer,
-                    order_code=order_code,
-                    notes=data['notes'],
-                    status='draft'
-                )
-                created_count += 1
-
-                for line_data in data['lines']:
-                    try:
-                        product = Product.objects.get(customer=customer, code=line_data['product_code'])
-                        OrderLine.objects.create(
-                            order=order,
-                            product=product,
-                            quantity=line_data['amount']
-                        )
-                        line_count += 1
-                    except Product.DoesNotExist:
-                        error_count += 1
-
-            messages.success(request, _("Import completed: {orders} orders created with {lines} lines, {errors} errors.").format(
-                orders=created_count, lines=line_count, errors=error_count
-            ))
-            return redirect('manage_orders')
-
-        except Exception as e:
-            messages.error(request, _("Error processing CSV: {error}").format(error=str(e)))
+        job = enqueue_job(Job.JobType.ORDER_IMPORT, customer=customer, user=request.user, input_file=csv_file,
+                          params={'filename': csv_file.name, 'queue': request.POST.get('add_to_queue') == 'on'})
+        if not job.is_finished:
+            messages.info(request, _("Import started, this page shows its progress."))
+            return redirect('manage_job_detail', job_id=job.job_id)
+        if job.status == Job.Status.FAILED:
+            messages.error(request, _("Error processing CSV: {error}").format(error=job.error))
             return render(request, 'manage/orders/import.html', context)
 
+        report = job.result
+        messages.success(request, _("Import completed: {orders} orders created with {lines} lines, {errors} errors.").format(
+            orders=report['created'], lines=report['lines'], errors=report['error_count']
+        ))
+        if report['queued']:
+            messages.info(request, _("{count} order(s) added to queue.").format(count=report['queued']))
+        for error in report['errors'][:IMPORT_ERRORS_SHOWN]:
+            messages.warning(request, _("Row {row}: {message}").format(**error))
+        return redirect('manage_orders')
+
     return render(request, 'manage/orders/import.html', context)
 
 
+# ============================================
+# Background Jobs
+# ============================================
+
+JOB_NAV = {
+    Job.JobType.PRODUCT_IMPORT: 'products',
+    Job.JobType.ORDER_IMPORT: 'orders',
+    Job.JobType.BARCODE_IMPORT: 'products',
+    Job.JobType.QR_PDF: 'orders',
+}
+
+
+@company_admin_required
+def job_detail(request, job_id):
+    """Progress and result page of a background job."""
+    job = get_object_or_404(jobs_for_user(request.user), job_id=job_id)
+    context = get_base_context(request, JOB_NAV.get(job.job_type, 'dashboard'))
+    context['job'] = job
+    context['errors_shown'] = (job.result or {}).get('errors', [])[:IMPORT_ERRORS_SHOWN]
+    return render(request, 'manage/jobs/detail.html', context)
+
+
+@company_admin_required
+def job_status(request, job_id):
+    """Polled by the job page while the job is pending or running."""
+    job = get_object_or_404(jobs_for_user(request.user), job_id=job_id)
+    return JsonResponse({
+        'status': job.status,
+        'progress': job.progress,
+        'total': job.total,
+        'percentage': job.percentage,
+        'finished': job.is_finished,
+    })
+
+
+@company_admin_required
+def job_download(request, job_id):
+    """Download the result file of a completed job."""
+    job = get_object_or_404(jobs_for_user(request.user), job_id=job_id)
+    if job.status != Job.Status.COMPLETED or not job.result_file:
+        raise Http404(_("This job has no result file."))
+    return FileResponse(job.result_file.open('rb'), as_attachment=True,
+                        filename=os.path.basename(job.result_file.name))
+
+
 # ============================================
 # Queue Management (redirects to existing)
 # ============================================
@@ -802,7 +781,7 @@ def picklists_list(request):
         return redirect('manage_dashboard')
 
     # Get picklists
-    picklists = PickList.objects.filter(customer=customer).select_related('device', 'order')
+    picklists = PickList.objects.filter(customer=customer).select_related('device__user', 'order')
 
     # Filter by status (using pick_started and successful fields)
     status_filter = request.GET.get('status', '')
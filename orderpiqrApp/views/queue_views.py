@@ -3,16 +3,25 @@ from datetime import timedelta
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
 from django.db.models import Count, Max
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
 from django.utils.translation import gettext as _
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import etag, require_POST
 
 from django.db.models import Subquery, OuterRef
 
 from orderpiqrApp.models import Order, Device, UserProfile, PickList, ProductPick
+from orderpiqrApp.utils.changes import update_tracked
 from orderpiqrApp.utils.decorators import company_admin_required
+from orderpiqrApp.utils.qr import (
+    QR_CONTENT_TYPES, get_cached_qr_image, get_qr_image, order_qr_payload, payload_hash,
+)
+from orderpiqrApp.utils.webhooks import enqueue_queue_changed
+
+# QR image URLs contain a hash of their content, so the images never change
+QR_IMAGE_MAX_AGE = 365 * 24 * 60 * 60
 
 
 def _annotate_picker(queryset):
@@ -102,6 +111,39 @@ def queue_display_partial(request):
     return render(request, 'queue/_order_cards.html', context)
 
 
+@login_required
+@etag(lambda request, order_id, key, fmt: f"{key}.{fmt}")
+def queue_order_qr(request, order_id, key, fmt):
+    """
+    QR code image of a queued order, as linked by the `qr_code_url` template tag.
+
+    `key` is the hash of the QR content. Cached images are served without touching the
+    database; otherwise the order is loaded and the image is only rendered when its
+    content still matches `key`.
+    """
+    if fmt not in QR_CONTENT_TYPES:
+        raise Http404
+
+    image = get_cached_qr_image(key, fmt, style='screen')
+    if image is None:
+        try:
+            customer = request.user.userprofile.customer
+        except UserProfile.DoesNotExist:
+            raise Http404
+        order = get_object_or_404(
+            Order.objects.prefetch_related('lines__product'), order_id=order_id, customer=customer
+        )
+        payload = order_qr_payload(order)
+        if payload_hash(payload) != key:
+            # The order changed since the page was rendered; the next refresh links the new code
+            raise Http404
+        image = get_qr_image(payload, fmt, style='screen')
+
+    response = HttpResponse(image, content_type=QR_CONTENT_TYPES[fmt])
+    patch_cache_control(response, private=True, max_age=QR_IMAGE_MAX_AGE, immutable=True)
+    return response
+
+
 @login_required
 def queue_picker(request):
     """
@@ -284,6 +326,8 @@ def queue_claim_order(request, order_id):
                     )
                     picklist_products.append(line.product.code)
 
+            enqueue_queue_changed(customer.pk, 'claimed', [order.order_id])
+
             print(f"[Queue Claim] Returning picklist_products: {picklist_products}")
             return JsonResponse({
                 'status': 'ok',
@@ -395,6 +439,7 @@ def queue_add_order(request, order_id):
             order.queue_position = (max_pos or 0) + 1
             order.status = 'queued'
             order.save(update_fields=['queue_position', 'status'])
+            enqueue_queue_changed(customer.pk, 'added', [order.order_id])
 
             return JsonResponse({
                 'status': 'ok',
@@ -429,6 +474,7 @@ def queue_remove_order(request, order_id):
             order.queue_position = None
             order.status = 'draft'
             order.save(update_fields=['queue_position', 'status'])
+            enqueue_queue_changed(customer.pk, 'removed', [order.order_id])
 
             return JsonResponse({
                 'status': 'ok',
@@ -461,11 +507,12 @@ def queue_reorder(request):
     try:
         with transaction.atomic():
             for position, order_id in enumerate(order_ids, start=1):
-                Order.objects.filter(
-                    order_id=order_id,
-                    customer=customer,
-                    status__in=['queued', 'in_progress']
-                ).update(queue_position=position)
+                update_tracked(
+                    Order.objects.filter(order_id=order_id, customer=customer, status__in=['queued', 'in_progress']),
+                    customer.pk,
+                    queue_position=position,
+                )
+            enqueue_queue_changed(customer.pk, 'reordered', order_ids)
 
             return JsonResponse({
                 'status': 'ok',
@@ -519,6 +566,7 @@ def queue_move_order(request, order_id, direction):
                 order.queue_position, adjacent.queue_position = adjacent.queue_position, order.queue_position
                 order.save(update_fields=['queue_position'])
                 adjacent.save(update_fields=['queue_position'])
+                enqueue_queue_changed(customer.pk, 'moved', [order.order_id, adjacent.order_id])
 
             return JsonResponse({
                 'status': 'ok',
@@ -562,6 +610,7 @@ def queue_unlock_order(request, order_id):
 
             order.status = 'queued'
             order.save(update_fields=['status'])
+            enqueue_queue_changed(customer.pk, 'unlocked', [order.order_id])
 
             return JsonResponse({
                 'status': 'ok',
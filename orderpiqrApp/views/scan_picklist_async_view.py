@@ -0,0 +1,286 @@
+"""
+Async versions of the picker endpoints in scan_picklist_view, for ASGI deployments.
+
+orderpiqr/urls.py serves these instead of the sync views when PICKER_ASYNC_VIEWS is set (the
+default under GUNICORN_MODE=asgi). The responses are the same; the differences are:
+- Every ORM call, the async ORM's included, is a hop to the one thread that runs the ORM,
+  and the calls of one request cannot run concurrently there. Lookups that follow each
+  other therefore run in one sync_to_async call.
+- The device heartbeat is written in the background (orderpiqrApp.utils.background) instead
+  of before the response.
+- Work that needs a transaction runs in one sync_to_async call, since Django has no async
+  transactions.
+"""
+import json
+import logging
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Q, TextField, Value, When
+from django.db.models.functions import Concat
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+
+from orderpiqrApp.models import ChangeEvent, Device, Order, PickList, ProductPick, UserProfile
+from orderpiqrApp.utils.background import run_in_background
+from orderpiqrApp.utils.changes import record_changes, update_tracked
+from orderpiqrApp.utils.inventory import decrement_inventory_for_picklist
+from orderpiqrApp.utils.product_index import lookup_product, lookup_products
+from orderpiqrApp.utils.webhooks import enqueue_order_completed, enqueue_picklist_completed
+
+logger = logging.getLogger(__name__)
+
+
+class _OrderUnavailable(Exception):
+    pass
+
+
+def _touch_device(device_id, when):
+    Device.objects.filter(pk=device_id).update(last_login=when)
+
+
+def _stamped_notes(stamp):
+    """Expression appending `stamp` as a line to the notes of a product pick."""
+    return Case(
+        When(Q(notes__isnull=True) | Q(notes=''), then=Value(stamp)),
+        default=Concat(F('notes'), Value(f'\n{stamp}')),
+        output_field=TextField(),
+    )
+
+
+def _start_picklist(device, order_id, codes, products, local_time):
+    """Claim the order and (re)create the pick list with one pick per unit; returns (pick_list, created)."""
+    with transaction.atomic():
+        order = Order.objects.select_for_update().filter(order_code=order_id, customer=device.customer).first()
+        if order:
+            if order.status == 'in_progress':
+                raise _OrderUnavailable('This order is already being picked by another device')
+            elif order.status == 'completed':
+                raise _OrderUnavailable('This order has already been completed')
+            elif order.status == 'queued':
+                order.status = 'in_progress'
+                order.save(update_fields=['status'])
+
+        try:
+            pick_list = PickList.objects.select_for_update().get(picklist_code=order_id, customer=device.customer)
+            pick_list.device = device
+            pick_list.updated_at = local_time
+            pick_list.pick_started = True
+            new_note = f"Restarted by device {device.name} at {local_time.strftime('%Y-%m-%d %H:%M')}"
+            pick_list.notes = (pick_list.notes or "") + "\n" + new_note
+            pick_list.save()
+
+            ProductPick.objects.filter(picklist=pick_list).delete()
+            created = False
+        except PickList.DoesNotExist:
+            pick_list = PickList.objects.create(
+                picklist_code=order_id,
+                customer=device.customer,
+                device=device,
+                updated_at=local_time,
+                pick_started=True,
+                order=order,
+            )
+            created = True
+
+        picks = ProductPick.objects.bulk_create([
+            ProductPick(product_id=products[code].product_id, picklist=pick_list, quantity=1)
+            for code in codes
+            for _ in range(products[code].quantity)
+        ])
+        record_changes(device.customer_id, ChangeEvent.Entity.PRODUCT_PICK, ChangeEvent.Action.CREATED,
+                       [pick.pk for pick in picks])
+    return pick_list, created
+
+
+@require_POST
+async def scan_picklist_async(request):
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid JSON'}, status=400)
+
+    picklist = data.get('picklist', [])
+    device_fingerprint = data.get('deviceFingerprint', '')
+    order_id = data.get('orderID', None)
+
+    if not order_id:
+        return JsonResponse({'status': 'error', 'message': 'orderID is required'}, status=400)
+    if not device_fingerprint:
+        return JsonResponse({'status': 'error', 'message': 'deviceFingerprint is required'}, status=400)
+    if not picklist:
+        return JsonResponse({'status': 'error', 'message': 'picklist is empty'}, status=400)
+
+    local_time = timezone.localtime(timezone.now())
+
+    device = await Device.objects.select_related('customer').filter(device_fingerprint=device_fingerprint).afirst()
+    if device:
+        run_in_background(_touch_device, device.pk, local_time)
+    else:
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({
+                'status': 'error',
+                'message': 'Device not found and user not authenticated'
+            }, status=401)
+        user_profile = await UserProfile.objects.select_related('customer').filter(user=user).afirst()
+        if not user_profile:
+            return JsonResponse({'status': 'error', 'message': 'User has no customer profile'}, status=400)
+        device = await Device.objects.acreate(
+            user=user,
+            device_fingerprint=device_fingerprint,
+            name=f"Auto-created device ({local_time.strftime('%Y-%m-%d %H:%M')})",
+            description=f"Automatically created for user {user.username}",
+            customer=user_profile.customer,
+            last_login=local_time,
+            lists_picked=0
+        )
+
+    # Resolved before the transaction: the index needs no lock, and an unknown code fails
+    # the scan without claiming the order
+    products = await sync_to_async(lookup_products)(device.customer_id, picklist)
+    if any(code not in products for code in picklist):
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Product not found for one of the product codes'
+        }, status=404)
+
+    try:
+        pick_list, created = await sync_to_async(_start_picklist)(device, order_id, picklist, products, local_time)
+    except _OrderUnavailable as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=409)
+    except IntegrityError as e:
+        return JsonResponse({'status': 'error', 'message': f'Database integrity error: {str(e)}'}, status=409)
+    except Exception as e:
+        return JsonResponse({'status': 'error', 'message': f'Unexpected error: {str(e)}'}, status=500)
+
+    return JsonResponse({
+        'status': 'ok',
+        'message': 'Picklist processed successfully',
+        'created': created,
+        'picklist_id': pick_list.picklist_id,
+        'product_count': len(picklist)
+    })
+
+
+def _find_pick(device_fp, order_id, product_code):
+    """The device, its pick list and the scanned product in one thread hop; None for the first one missing."""
+    device = Device.objects.filter(device_fingerprint=device_fp).first()
+    if not device:
+        return None, None, None
+    picklist = PickList.objects.filter(picklist_code=order_id, customer_id=device.customer_id, device=device).first()
+    if not picklist:
+        return device, None, None
+    # A product code index hit needs no query at all
+    return device, picklist, lookup_product(device.customer_id, product_code)
+
+
+def _mark_picks(picklist, product, successful, time_taken, stamp):
+    """
+    Mark the next `product.quantity` pending picks and append `stamp` to their notes;
+    returns (pick IDs, picks still pending).
+    """
+    with transaction.atomic():
+        qs = ProductPick.objects.filter(picklist=picklist, product_id=product.product_id).order_by('id')
+        ids = list(qs.filter(successful__isnull=True).select_for_update().values_list('pk', flat=True)[:product.quantity])
+        if len(ids) < product.quantity:
+            ids += qs.filter(successful=False).select_for_update().values_list('pk', flat=True)[:product.quantity - len(ids)]
+        if ids:
+            update_tracked(ProductPick.objects.filter(pk__in=ids), picklist.customer_id,
+                           successful=successful, time_taken=time_taken, notes=_stamped_notes(stamp),
+                           version=F('version') + 1)
+        remaining = qs.filter(successful__isnull=True).count()
+    return ids, remaining
+
+
+@require_POST
+async def product_pick_async(request):
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
+    order_id = payload.get("orderID")
+    product_code = payload.get("productCode")
+    device_fp = payload.get("deviceFingerprint")
+    successful = bool(payload.get("successful", True))
+    time_taken_ms = payload.get("timeTakenMs")
+    scanned_at = payload.get("scannedAt") or timezone.now().isoformat()
+
+    device, picklist, product = await sync_to_async(_find_pick)(device_fp, order_id, product_code)
+    if not device:
+        return JsonResponse({"status": "error", "message": "Device not found with given fingerprint"}, status=404)
+    run_in_background(_touch_device, device.pk, timezone.now())
+    if not picklist:
+        return JsonResponse({"status": "error", "message": "PickList not found for device/customer"}, status=404)
+    if not product:
+        return JsonResponse({"status": "error", "message": "Product not found"}, status=404)
+
+    time_taken = timedelta(milliseconds=int(time_taken_ms))
+    stamp = f"device={device_fp}; scanned_at={scanned_at}"
+    if product_code != product.code:
+        stamp = f"{stamp}; barcode={product_code}"
+    pick_ids, remaining_for_product = await sync_to_async(_mark_picks)(picklist, product, successful, time_taken,
+                                                                       stamp)
+    if not pick_ids:
+        # Idempotent: nothing left to update for this product
+        return JsonResponse({"status": "noop", "message": "No pending ProductPick rows for this product."},
+                            status=200, )
+
+    return JsonResponse(
+        {
+            "status": "ok",
+            "picklist_code": picklist.picklist_code,
+            "product_code": product.code,
+            "scanned_code": product_code,
+            "updated_productpick_id": pick_ids[0],
+            "updated_productpick_ids": pick_ids,
+            "remaining_for_product": remaining_for_product,
+        },
+        status=200,
+    )
+
+
+def _complete_picklist(picklist, user):
+    now = timezone.localtime(timezone.now())
+    pick_time = timezone.localtime(picklist.pick_time)
+    # Webhook events are queued in the same transaction as the completion
+    with transaction.atomic():
+        picklist.time_taken = now - pick_time
+        picklist.successful = True
+        picklist.save()
+        enqueue_picklist_completed(picklist)
+
+        decrement_inventory_for_picklist(picklist, user)
+
+        if picklist.order:
+            picklist.order.status = 'completed'
+            picklist.order.completed_at = now
+            picklist.order.save(update_fields=['status', 'completed_at'])
+            enqueue_order_completed(picklist.order)
+
+
+async def complete_picklist_async(request):
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'Invalid method'}, status=405)
+    try:
+        data = json.loads(request.body)
+        device_fingerprint = data.get('deviceFingerprint', '')
+        order_id = data.get('orderID', None)
+
+        device = await Device.objects.filter(device_fingerprint=device_fingerprint).afirst()
+        if not device:
+            return JsonResponse({'status': 'error', 'message': 'Device not found with given fingerprint'}, status=404)
+        run_in_background(_touch_device, device.pk, timezone.now())
+
+        picklist = await (PickList.objects.select_related('device', 'order')
+                          .filter(picklist_code=order_id, customer_id=device.customer_id, device=device).afirst())
+        if picklist:
+            await sync_to_async(_complete_picklist)(picklist, await request.auser())
+        else:
+            logger.warning("No pick list %s found for device %s", order_id, device.pk)
+
+        return JsonResponse({'status': 'ok', 'message': 'Picklist processed successfully'})
+    except Exception as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
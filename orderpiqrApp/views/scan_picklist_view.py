@@ -1,12 +1,17 @@
 from datetime import timedelta
 
 from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Q, TextField, Value, When
+from django.db.models.functions import Concat
 from django.http import JsonResponse
 from django.utils import timezone
 import json
 from django.views.decorators.http import require_POST
 from orderpiqrApp.models import Device, Order, PickList, Product, ProductPick, UserProfile
+from orderpiqrApp.utils.changes import update_tracked
 from orderpiqrApp.utils.inventory import decrement_inventory_for_picklist
+from orderpiqrApp.utils.product_index import lookup_product, lookup_products
+from orderpiqrApp.utils.webhooks import enqueue_order_completed, enqueue_picklist_completed
 
 
 @require_POST
@@ -116,16 +121,19 @@ def scan_picklist(request):
                 )
                 created = True
 
-            # Original product handling
+            # Resolve all scanned codes (product codes or barcode aliases) through the in-memory
+            # product code index. A case barcode stands for several units, one row per unit.
+            products = lookup_products(device.customer_id, picklist)
             for product_code in picklist:
-                product = Product.objects.filter(customer=device.customer, code=product_code).first()
+                product = products.get(product_code)
                 if not product:
                     raise Product.DoesNotExist()
-                ProductPick.objects.create(
-                    product=product,
-                    picklist=pick_list,
-                    quantity=1,
-                )
+                for _ in range(product.quantity):
+                    ProductPick.objects.create(
+                        product_id=product.product_id,
+                        picklist=pick_list,
+                        quantity=1,
+                    )
 
     except Product.DoesNotExist:
         return JsonResponse({
@@ -152,8 +160,12 @@ def scan_picklist(request):
     })
 
 
+@require_POST
 def product_pick(request):
-    payload = json.loads(request.body.decode("utf-8"))
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
     order_id = payload.get("orderID")
     product_code = payload.get("productCode")
     device_fp = payload.get("deviceFingerprint")
@@ -174,41 +186,52 @@ def product_pick(request):
     if not picklist:
         return JsonResponse({"status": "error", "message": "PickList not found for device/customer"}, status=404)
 
-    try:
-        product = Product.objects.filter(customer=device.customer, code=product_code).first()
-        if not product:
-            raise Product.DoesNotExist()
-    except Product.DoesNotExist:
+    product = lookup_product(device.customer_id, product_code)
+    if not product:
         return JsonResponse({"status": "error", "message": "Product not found"}, status=404)
 
-    # Find the next unpicked row for this product in this picklist
-    qs = ProductPick.objects.filter(picklist=picklist, product=product).order_by("id")
-    pp = qs.filter(successful__isnull=True).first() or qs.filter(successful=False).first()
-    if not pp:
-        # Idempotent: nothing left to update for this product
-        return JsonResponse({"status": "noop", "message": "No pending ProductPick rows for this product."},
-                            status=200, )
-
     time_taken = timedelta(milliseconds=int(time_taken_ms))
 
-    # Update fields
-    pp.successful = successful
-    pp.time_taken = time_taken
-
     # Append device/scanned info to notes
     stamp = f"device={device_fp}; scanned_at={scanned_at}"
-    pp.notes = f"{pp.notes}\n{stamp}" if pp.notes else stamp
-
-    pp.save(update_fields=["successful", "time_taken", "notes"])
-
-    remaining_for_product = qs.filter(successful__isnull=True).count()
+    if product_code != product.code:
+        stamp = f"{stamp}; barcode={product_code}"
+
+    # Find the next unpicked rows for this product in this picklist; a case barcode picks
+    # as many rows as it has units, all in one UPDATE
+    with transaction.atomic():
+        qs = ProductPick.objects.filter(picklist=picklist, product_id=product.product_id).order_by("id")
+        pick_ids = list(qs.filter(successful__isnull=True).select_for_update()
+                        .values_list("pk", flat=True)[:product.quantity])
+        if len(pick_ids) < product.quantity:
+            pick_ids += qs.filter(successful=False).select_for_update().values_list(
+                "pk", flat=True)[:product.quantity - len(pick_ids)]
+        if not pick_ids:
+            # Idempotent: nothing left to update for this product
+            return JsonResponse({"status": "noop", "message": "No pending ProductPick rows for this product."},
+                                status=200, )
+
+        update_tracked(
+            ProductPick.objects.filter(pk__in=pick_ids), picklist.customer_id,
+            successful=successful,
+            time_taken=time_taken,
+            notes=Case(
+                When(Q(notes__isnull=True) | Q(notes=""), then=Value(stamp)),
+                default=Concat(F("notes"), Value(f"\n{stamp}")),
+                output_field=TextField(),
+            ),
+            version=F("version") + 1,
+        )
+        remaining_for_product = qs.filter(successful__isnull=True).count()
 
     return JsonResponse(
         {
             "status": "ok",
             "picklist_code": picklist.picklist_code,
             "product_code": product.code,
-            "updated_productpick_id": pp.id,
+            "scanned_code": product_code,
+            "updated_productpick_id": pick_ids[0],
+            "updated_productpick_ids": pick_ids,
             "remaining_for_product": remaining_for_product,
         },
         status=200,
@@ -232,18 +255,22 @@ def complete_picklist(request):
             if picklist:
                 now = timezone.localtime(timezone.now())  # now in local time
                 pick_time = timezone.localtime(picklist.pick_time)  # ensure pick_time is also local
-                picklist.time_taken = now - pick_time
-                picklist.successful = True  # or set based on some logic
-                picklist.save()
-
-                # Decrement inventory for picked products (if inventory management enabled)
-                decrement_inventory_for_picklist(picklist, request.user)
-
-                # Mark the linked order as completed if it exists
-                if picklist.order:
-                    picklist.order.status = 'completed'
-                    picklist.order.completed_at = now
-                    picklist.order.save(update_fields=['status', 'completed_at'])
+                # Webhook events are queued in the same transaction as the completion
+                with transaction.atomic():
+                    picklist.time_taken = now - pick_time
+                    picklist.successful = True  # or set based on some logic
+                    picklist.save()
+                    enqueue_picklist_completed(picklist)
+
+                    # Decrement inventory for picked products (if inventory management enabled)
+                    decrement_inventory_for_picklist(picklist, request.user)
+
+                    # Mark the linked order as completed if it exists
+                    if picklist.order:
+                        picklist.order.status = 'completed'
+                        picklist.order.completed_at = now
+                        picklist.order.save(update_fields=['status', 'completed_at'])
+                        enqueue_order_completed(picklist.order)
             else:
                 print('No picklist found, contact support')
 